@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+
+
+# minimum cost matching of a rectangular cost matrix
+# shortest augmenting path with potentials (Hungarian method), one python loop per
+# augmenting step and numpy over the long side, so it suits few machines x long queue
+# return (row, column) index arrays of the min(rows, columns) matched pairs, by row
+def assign(cost):
+    cost = np.asarray(cost, dtype = float)
+    transpose = cost.shape[0] > cost.shape[1]
+    if transpose:
+        cost = cost.T
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype = np.int64)   # row matched to column j, 1-based, 0 is free
+    way = np.zeros(m + 1, dtype = np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype = bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            # reduced cost from row i0 to every column
+            cur = np.empty(m + 1)
+            cur[0] = np.inf
+            cur[1:] = cost[i0 - 1] - u[i0] - v[1:]
+            better = ~used & (cur < minv)
+            minv[better] = cur[better]
+            way[better] = j0
+            free_minv = np.where(used, np.inf, minv)
+            j1 = int(np.argmin(free_minv))
+            delta = free_minv[j1]
+            # shift potentials so the tight edges stay tight
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # augment along the path
+        while j0 != 0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    col = np.flatnonzero(p[1:])
+    row = p[1:][col] - 1
+    if transpose:
+        row, col = col, row
+    order = np.argsort(row)
+    return row[order], col[order]
+
+
+# idle machines matched to waiting orders on setup plus process time
+# return (machine ID, order ID) pairs, by machine
+def match(store, machine, last, idx):
+    machine = np.asarray(machine)
+    last = np.asarray(last)
+    idx = np.asarray(idx)
+    cost = store.process_time[idx][:, machine].T.astype(float)
+    setup = last != -1
+    cost[setup] += store.setup_time[last[setup]][:, idx]
+    row, col = assign(cost)
+    return list(zip(machine[row].tolist(), idx[col].tolist()))
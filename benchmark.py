@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import simpy
+
+
+# import files
+from main import Factory
+from dispatching_rule import RULES
+from test_instance_generator import generate
+
+
+# factory setting of each configuration
+CONFIG = {"default": {},
+          "fast": {"incremental": True, "buffer": "array", "record": False},
+          "heap": {"engine": "heap", "record": False}}
+
+# simulation modules checked for import time, and packages they must not load
+CORE_MODULES    = ["main", "dispatching_rule", "fast_engine", "vector_factory"]
+HEAVY_MODULES   = ["matplotlib", "pandas"]
+
+
+def make_instance(N, M, T_FACTOR, seed):
+    # fixed seed, so every version sees the same instance
+    np.random.seed(seed)
+    order, setup = generate(N, M, T_FACTOR)
+    return order, setup
+
+def run_episode(config, N, M, order, setup, action):
+    # return reset time and latency of every step
+    env = Factory(**CONFIG[config])
+    if CONFIG[config].get("engine") == "heap":
+        start = time.perf_counter()
+        env.run(N, M, order, setup, action)
+        return time.perf_counter() - start, [], env.makespan
+    start = time.perf_counter()
+    env.reset(N, M, order, setup)
+    reset_time = time.perf_counter() - start
+    latency = []
+    while True:
+        start = time.perf_counter()
+        _, _, done = env.step(action)
+        latency.append(time.perf_counter() - start)
+        if done:
+            break
+    return reset_time, latency, env.makespan
+
+def peak_memory(config, N, M, order, setup, action):
+    # separate run, tracemalloc slows down the timed one
+    tracemalloc.start()
+    run_episode(config, N, M, order, setup, action)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def measure(config, N, M, action, T_FACTOR, episodes, seed, memory = True):
+    reset_time = []
+    episode_time = []
+    latency = []
+    makespan = []
+    for e in range(episodes):
+        order, setup = make_instance(N, M, T_FACTOR, seed + e)
+        t, step_latency, ms = run_episode(config, N, M, order, setup, action)
+        reset_time.append(t)
+        episode_time.append(t + sum(step_latency))
+        latency.extend(step_latency)
+        makespan.append(ms)
+    total = sum(episode_time)
+    steps = len(latency)
+    row = {"config": config, "N": N, "M": M, "rule": RULES[action],
+           "T_FACTOR": T_FACTOR, "episodes": episodes, "steps": steps,
+           "episodes_per_sec": episodes / total if total > 0 else float("inf"),
+           "steps_per_sec": steps / total if total > 0 and steps > 0 else None,
+           "reset_ms": 1000 * float(np.mean(reset_time)),
+           "mean_makespan": float(np.mean(makespan))}
+    for q in (50, 90, 99):
+        row[f"step_p{q}_ms"] = 1000 * float(np.percentile(latency, q)) if steps > 0 else None
+    if memory:
+        order, setup = make_instance(N, M, T_FACTOR, seed)
+        row["peak_memory_mb"] = peak_memory(config, N, M, order, setup, action) / 2**20
+    return row
+
+def import_time(module, repeat = 3):
+    # best time of a fresh interpreter, and heavy packages the import loaded
+    code = (f"import sys, time; t = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - t); "
+            f"print(*[i for i in {HEAVY_MODULES!r} if i in sys.modules])")
+    seconds = float("inf")
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output = True, text = True,
+                             check = True, cwd = os.path.dirname(os.path.abspath(__file__)))
+        lines = out.stdout.split("\n")
+        seconds = min(seconds, float(lines[0]))
+    return {"module": module, "seconds": seconds, "heavy": lines[1].split()}
+
+def check_import(result, budget):
+    # list of budget violations
+    error = []
+    for i in result:
+        if i["heavy"]:
+            error.append(f"{i['module']} imports {', '.join(i['heavy'])}")
+        if budget is not None and i["seconds"] > budget:
+            error.append(f"{i['module']} imports in {i['seconds']:.3f}s > {budget}s")
+    return error
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "simpy": simpy.__version__, "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+def compare(old_path, new_result):
+    # ratio of throughput between two result files, > 1 means faster
+    with open(old_path) as f:
+        old_result = json.load(f)
+    key = lambda i: (i["config"], i["N"], i["M"], i["rule"], i["T_FACTOR"])
+    old = {key(i): i for i in old_result["results"]}
+    print(f"{'config':>8} {'N':>6} {'M':>4} {'rule':>5} {'T':>5} {'speedup':>8} {'memory':>8}")
+    for i in new_result["results"]:
+        if key(i) not in old:
+            continue
+        j = old[key(i)]
+        speedup = i["episodes_per_sec"] / j["episodes_per_sec"]
+        memory = ""
+        if i.get("peak_memory_mb") and j.get("peak_memory_mb"):
+            memory = f"{i['peak_memory_mb'] / j['peak_memory_mb']:8.2f}"
+        print(f"{i['config']:>8} {i['N']:>6} {i['M']:>4} {i['rule']:>5} "
+              f"{i['T_FACTOR']:>5} {speedup:8.2f} {memory:>8}")
+
+
+# main program
+# measure simulator throughput over a grid of instance size
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Benchmark Factory.reset/step throughput.")
+    parser.add_argument("-N", type = int, nargs = "+", default = [10, 100, 1000])
+    parser.add_argument("-M", type = int, nargs = "+", default = [2, 5, 20])
+    parser.add_argument("--rules", type = int, nargs = "+", default = list(range(len(RULES))))
+    parser.add_argument("--t-factor", type = float, nargs = "+", default = [1.5])
+    parser.add_argument("--config", nargs = "+", default = ["fast"], choices = list(CONFIG))
+    parser.add_argument("--episodes", type = int, default = 3)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--no-memory", action = "store_true", help = "skip the peak memory run")
+    parser.add_argument("--output", default = "benchmark.json")
+    parser.add_argument("--compare", default = None, help = "earlier result file")
+    parser.add_argument("--import-budget", type = float, default = None,
+                        help = "seconds allowed to import each core module, exit 1 if over")
+    args = parser.parse_args()
+    # import time of the simulation core
+    result = {"environment": environment(), "import": [], "results": []}
+    for module in CORE_MODULES:
+        row = import_time(module)
+        result["import"].append(row)
+        print(f"import {module:>16}: {1000 * row['seconds']:8.1f} ms {' '.join(row['heavy'])}")
+    # run grid
+    for config, N, M, action, T_FACTOR in itertools.product(
+            args.config, args.N, args.M, args.rules, args.t_factor):
+        row = measure(config, N, M, action, T_FACTOR, args.episodes, args.seed,
+                      not args.no_memory)
+        result["results"].append(row)
+        print(f"{config:>8} N={N:<5} M={M:<3} {RULES[action]:>4} T={T_FACTOR}: "
+              f"{row['episodes_per_sec']:10.2f} episodes/s")
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent = 1)
+    if args.compare:
+        compare(args.compare, result)
+    error = check_import(result["import"], args.import_budget)
+    for i in error:
+        print(f"import budget: {i}")
+    if error:
+        sys.exit(1)
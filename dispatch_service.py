@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+import numpy as np
+
+
+# import files
+from dispatching_rule import Batch_Rule, RULES
+from streaming import to_record
+
+
+# waiting orders as arrays in arrival order
+# removed rows are masked and compacted once they outnumber the live ones
+class Live_Queue:
+    def __init__(self, M, capacity = 64):
+        # attribute
+        self.M          = M
+        self.row        = {}    # order ID -> row
+        self.end        = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.ID         = np.full(capacity, -1, dtype = np.int64)
+        self.process    = np.zeros((capacity, self.M))
+        self.due        = np.zeros(capacity)
+        self.alive      = np.zeros(capacity, dtype = bool)
+
+    def __len__(self):
+        return len(self.row)
+
+    def append(self, ID, process_time, due_date):
+        if ID in self.row:
+            raise ValueError(f"order {ID} is already waiting")
+        if len(process_time) != self.M:
+            raise ValueError(f"order needs {self.M} process times")
+        if self.end == len(self.ID):
+            self.compact()
+        self.ID[self.end]       = ID
+        self.process[self.end]  = process_time
+        self.due[self.end]      = due_date
+        self.alive[self.end]    = True
+        self.row[ID] = self.end
+        self.end += 1
+
+    def remove(self, ID):
+        self.alive[self.row.pop(ID)] = False
+        if self.end - len(self.row) > len(self.row) + 64:
+            self.compact()
+
+    def compact(self):
+        # keep live rows in order, grow when more than half are live
+        live = np.flatnonzero(self.alive[:self.end])
+        ID, process, due = self.ID[live], self.process[live], self.due[live]
+        if len(live) > len(self.ID) // 2:
+            self.allocate(2 * len(self.ID))
+        else:
+            self.alive[:] = False
+        self.end = len(live)
+        self.ID[:self.end]      = ID
+        self.process[:self.end] = process
+        self.due[:self.end]     = due
+        self.alive[:self.end]   = True
+        self.row = dict(zip(ID.tolist(), range(self.end)))
+
+    def live(self):
+        # rows of waiting orders in arrival order
+        return np.flatnonzero(self.alive[:self.end])
+
+
+# dispatch decisions for machines of a running shop
+# orders arrive by arrive(), idle machines ask dispatch(); queries that come together
+# are answered by one Batch_Rule evaluation per rule. setup is an N x N array or a
+# setup source of streaming.py (called as setup(last order ID, order ID))
+class Dispatch_Service:
+    def __init__(self, M, setup, rule = 0, policy = None, max_batch = 64, window = 0,
+                 history = 10000):
+        # setting
+        self.M          = M
+        self.setup      = setup
+        self.rule       = rule
+        self.policy     = policy    # policy(service, machines, times) -> rule of each query
+        self.max_batch  = max_batch
+        self.window     = window    # seconds to wait for more queries, 0 yields once
+        # state
+        self.queue      = Live_Queue(M)
+        self.ID         = itertools.count() # IDs of orders without one
+        self.last       = [-1] * M  # last finished order of each machine
+        self.current    = [-1] * M  # order given to each machine
+        # batching
+        self.pending    = []    # (machine, time, rule, last, future, start)
+        self.ready      = None
+        self.task       = None
+        # statistic
+        self.latency    = deque(maxlen = history)   # seconds of recent decisions
+        self.decisions  = 0
+        self.batches    = 0
+
+    # state update
+    def arrive(self, record):
+        record = to_record(record)
+        ID = record["ID"] if "ID" in record else next(self.ID)
+        self.queue.append(ID, record["process_time"], record["due_date"])
+        if hasattr(self.setup, "add"):
+            self.setup.add(ID, record)
+        return ID
+
+    def release(self, ID):
+        # finished order leaves memory once it is not the last order of its machine
+        if ID != -1 and hasattr(self.setup, "drop"):
+            self.setup.drop(ID)
+
+    def setup_rows(self, last, ID):
+        # setup time from each last order to each waiting order
+        if isinstance(self.setup, np.ndarray):
+            return self.setup[np.ix_(np.maximum(last, 0), ID)]
+        return np.array([[self.setup(i, j) for j in ID.tolist()] if i != -1
+                         else np.zeros(len(ID)) for i in last.tolist()]).reshape(len(last), -1)
+
+    # decision
+    def evaluate(self, query):
+        # query is a list of (machine, time, rule, last), answered in order
+        # the picked orders stay in the queue until assign
+        for machine, _, _, last in query:
+            if self.current[machine] != -1:
+                # the order given before is finished
+                self.release(self.last[machine])
+                self.last[machine] = self.current[machine]
+                self.current[machine] = -1
+            if last is not None and last != self.last[machine]:
+                self.release(self.last[machine])
+                self.last[machine] = last
+        pick = np.full(len(query), -1, dtype = np.int64)
+        rows = self.queue.live()
+        if len(rows) > 0:
+            ID = self.queue.ID[rows]
+            rule = Batch_Rule(self.queue.process[rows], self.queue.due[rows])
+            machine = np.array([i[0] for i in query], dtype = np.int64)
+            time_now = np.array([i[1] for i in query], dtype = float)
+            last = np.array([self.last[i] for i in machine.tolist()], dtype = np.int64)
+            action = np.array([i[2] for i in query])
+            key = np.empty((len(query), len(rows)))
+            for a in np.unique(action).tolist():
+                i = np.flatnonzero(action == a)
+                setup = self.setup_rows(last[i], ID) if a == 3 else None
+                key[i] = rule.key(a, machine[i], last[i], time_now[i], setup)
+            column = rule.assign(key)
+            pick[column != -1] = ID[column[column != -1]]
+        self.batches += 1
+        return pick.tolist()
+
+    def assign(self, machine, ID):
+        # machine takes the order, -1 leaves it idle
+        if ID != -1:
+            self.queue.remove(ID)
+            self.current[machine] = ID
+        self.decisions += 1
+
+    def decide(self, query):
+        pick = self.evaluate(query)
+        for (machine, _, _, _), ID in zip(query, pick):
+            self.assign(machine, ID)
+        return pick
+
+    async def dispatch(self, machine, time_now, rule = None, last = None):
+        # order ID for an idle machine, -1 when no order waits
+        if not 0 <= machine < self.M:
+            raise ValueError(f"unknown machine {machine}")
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((machine, time_now, rule, last, future, time.perf_counter()))
+        self.ready.set()
+        return await future
+
+    async def batcher(self):
+        while True:
+            await self.ready.wait()
+            await asyncio.sleep(self.window)    # let concurrent queries join
+            batch = self.pending[:self.max_batch]
+            del self.pending[:self.max_batch]
+            if len(self.pending) == 0:
+                self.ready.clear()
+            # cancelled queries are dropped
+            batch = [i for i in batch if not i[4].done()]
+            if len(batch) == 0:
+                continue
+            # a failing policy or rule fails the queries of its batch, not the batcher
+            try:
+                rule = [i[2] for i in batch]
+                if self.policy is not None and any(i is None for i in rule):
+                    action = list(self.policy(self, [i[0] for i in batch],
+                                              [i[1] for i in batch]))
+                    if len(action) != len(batch):
+                        raise ValueError(f"policy gave {len(action)} rules "
+                                         f"for {len(batch)} queries")
+                    rule = [a if r is None else r for a, r in zip(action, rule)]
+                query = [(i[0], i[1], self.rule if r is None else r, i[3])
+                         for i, r in zip(batch, rule)]
+                pick = self.evaluate(query)
+                end = time.perf_counter()
+                for i, ID in zip(batch, pick):
+                    # a query cancelled meanwhile leaves its order waiting
+                    if i[4].done():
+                        continue
+                    self.assign(i[0], ID)
+                    i[4].set_result(ID)
+                    self.latency.append(end - i[5])
+            except Exception as error:
+                for i in batch:
+                    if not i[4].done():
+                        i[4].set_exception(error)
+
+    def stats(self):
+        latency = np.array(self.latency) * 1000
+        return {"decisions": self.decisions,
+                "batches": self.batches,
+                "mean_batch": self.decisions / self.batches if self.batches > 0 else 0,
+                "p50_ms": float(np.percentile(latency, 50)) if len(latency) > 0 else 0,
+                "p99_ms": float(np.percentile(latency, 99)) if len(latency) > 0 else 0,
+                "queue": len(self.queue)}
+
+    # line json protocol, one response line per request line
+    # {"op": "arrive", "arrival_time": ..., "process_time": [...], "due_date": ...}
+    # {"op": "dispatch", "machine": m, "time": t, "rule": optional, "last": optional}
+    # {"op": "stats"}
+    async def request(self, message):
+        op = message.get("op")
+        if op == "arrive":
+            return {"ID": self.arrive(message)}
+        elif op == "dispatch":
+            ID = await self.dispatch(int(message["machine"]), float(message.get("time", 0)),
+                                     message.get("rule"), message.get("last"))
+            return {"machine": message["machine"], "order": ID}
+        elif op == "stats":
+            return self.stats()
+        raise ValueError(f"unknown op {op!r}")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # any failure of a request, also one raised by the policy in the
+                # batcher, is answered on the connection
+                try:
+                    response = await self.request(json.loads(line))
+                except Exception as error:
+                    response = {"error": str(error) or type(error).__name__}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host = "127.0.0.1", port = 0):
+        # server with its batcher, both run in the current event loop
+        self.ready = asyncio.Event()
+        self.task = asyncio.create_task(self.batcher())
+        return await asyncio.start_server(self.handle, host, port)
+
+
+# client of one connection, requests are answered in order
+class Dispatch_Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, message):
+        self.writer.write((json.dumps(message) + "\n").encode())
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+# main program
+# machines of a generated stream ask a local service concurrently
+if __name__ == '__main__':
+    # import files
+    from streaming import generated_feed, random_setup
+    parser = argparse.ArgumentParser(description = "Serve dispatch decisions over tcp.")
+    parser.add_argument("-M", type = int, default = 20)
+    parser.add_argument("--rule", type = int, default = 2)
+    parser.add_argument("--orders", type = int, default = 20000)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--window", type = float, default = 0)
+    parser.add_argument("--max-batch", type = int, default = 64)
+    parser.add_argument("--port", type = int, default = 0)
+    parser.add_argument("--serve", action = "store_true", help = "serve until stopped")
+    args = parser.parse_args()
+
+    async def machine(host, port, m, stop):
+        # ask for an order, pretend to process it, repeat
+        client = await Dispatch_Client.connect(host, port)
+        clock = 0
+        while not stop.is_set():
+            response = await client.request({"op": "dispatch", "machine": m, "time": clock})
+            clock += 1
+            if response["order"] == -1:
+                await asyncio.sleep(0.001)
+        await client.close()
+
+    async def main():
+        service = Dispatch_Service(args.M, random_setup(args.seed), args.rule,
+                                   max_batch = args.max_batch, window = args.window)
+        server = await service.start(port = args.port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"dispatch service {RULES[args.rule]} on {host}:{port}")
+        if args.serve:
+            async with server:
+                await server.serve_forever()
+        # orders arrive through one connection while machines ask through theirs
+        stop = asyncio.Event()
+        task = [asyncio.create_task(machine(host, port, m, stop)) for m in range(args.M)]
+        client = await Dispatch_Client.connect(host, port)
+        for record in generated_feed(args.M, 1.5, args.seed, count = args.orders):
+            await client.request(dict(record, op = "arrive"))
+        while len(service.queue) > 0:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await asyncio.gather(*task)
+        print(await client.request({"op": "stats"}))
+        await client.close()
+        server.close()
+
+    asyncio.run(main())
@@ -9,6 +9,10 @@ Created on Mon Sep  6 22:25:05 2021
 import numpy as np
 
 
+# rule name of each action
+RULES = ["FIFO", "LIFO", "SPT", "MST", "EDD", "LST", "CR"]
+
+
 # dispatching rule
 class Dispatching_Rule:
     def FIFO(self, buffer):
@@ -52,4 +56,95 @@ class Dispatching_Rule:
                                for order in buffer]
         index = np.argmin(critical_ratio_list)
         order = buffer[index]
-        return order
\ No newline at end of file
+        return order
+
+
+# dispatching rule over order store arrays
+# idx holds waiting order IDs in queue sequence, the rule returns one of them
+class Vector_Rule:
+    def __init__(self, store):
+        # global table
+        self.P = store.process_time
+        self.D = store.due_date
+        self.S = store.setup_time
+
+    def FIFO(self, idx):
+        return idx[0]
+
+    def LIFO(self, idx):
+        return idx[-1]
+
+    def SPT(self, idx, machine_ID):
+        return idx[np.argmin(self.P[idx, machine_ID])]
+
+    def MST(self, idx, last_order_ID):
+        if last_order_ID == -1:
+            return self.FIFO(idx) # if no setup time, FIFO
+        return idx[np.argmin(self.S[last_order_ID, idx])]
+
+    def EDD(self, idx):
+        return idx[np.argmin(self.D[idx])]
+
+    def LST(self, idx, machine_ID, time_now):
+        return idx[np.argmin(self.D[idx] - time_now - self.P[idx, machine_ID])]
+
+    def CR(self, idx, machine_ID, time_now):
+        return idx[np.argmin((self.D[idx] - time_now) / self.P[idx, machine_ID])]
+
+    def pick(self, action, idx, machine_ID, last_order_ID, time_now):
+        # order ID chosen by rule action
+        if action == 0:
+            return self.FIFO(idx)
+        elif action == 1:
+            return self.LIFO(idx)
+        elif action == 2:
+            return self.SPT(idx, machine_ID)
+        elif action == 3:
+            return self.MST(idx, last_order_ID)
+        elif action == 4:
+            return self.EDD(idx)
+        elif action == 5:
+            return self.LST(idx, machine_ID, time_now)
+        elif action == 6:
+            return self.CR(idx, machine_ID, time_now)
+
+
+# dispatching rule for several idle machines at once over a table of waiting orders
+# P (Q x M) and D hold the waiting orders in queue sequence; a key matrix has one row
+# per query and ties go to the earlier order like np.argmin over a list buffer
+class Batch_Rule:
+    def __init__(self, P, D):
+        # global table
+        self.P = P
+        self.D = D
+
+    def key(self, action, machine_ID, last_order_ID, time_now, setup = None):
+        # machine_ID, last_order_ID and time_now have one entry per query,
+        # setup holds the setup time from each last order to each waiting order (MST only)
+        k, Q = len(machine_ID), len(self.D)
+        if action == 0:
+            return np.tile(np.arange(Q, dtype = float), (k, 1))
+        elif action == 1:
+            return np.tile(-np.arange(Q, dtype = float), (k, 1))
+        elif action == 2:
+            return self.P[:, machine_ID].T.astype(float)
+        elif action == 3:
+            key = np.tile(np.arange(Q, dtype = float), (k, 1)) # if no setup time, FIFO
+            row = last_order_ID != -1
+            key[row] = setup[row]
+            return key
+        elif action == 4:
+            return np.tile(self.D.astype(float), (k, 1))
+        elif action == 5:
+            return self.D - time_now[:, None] - self.P[:, machine_ID].T
+        elif action == 6:
+            return (self.D - time_now[:, None]) / self.P[:, machine_ID].T
+
+    def assign(self, key):
+        # queries pick in row order, each without the orders of earlier rows
+        key = np.array(key, dtype = float)
+        pick = np.full(len(key), -1, dtype = np.int64)
+        for i in range(min(len(key), key.shape[1])):
+            pick[i] = np.argmin(key[i])
+            key[:, pick[i]] = np.inf
+        return pick
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import heapq
+import itertools
+import numpy as np
+
+
+# import files
+from gantt_plot import Gantt
+from order_store import Order_Store
+from assignment import match
+from tracer import TRACE_ORDER, TRACE_ALL
+from tracer import EVENT_ARRIVE, EVENT_SETUP, EVENT_START, EVENT_FINISH
+
+
+# event priority, same as simpy
+URGENT  = 0
+NORMAL  = 1
+
+# event kind
+ARRIVAL         = 0 # source resumes at order i
+SETUP_START     = 1 # processor.setup is initialized
+SETUP_END       = 2 # setup timeout
+PROCESS_START   = 3 # processor.process is initialized
+PROCESS_END     = 4 # process timeout
+DECISION        = 5 # decision_point is processed
+
+
+# next-event engine for episodes with a fixed dispatching rule
+# events are ordered by (time, priority, eid) as in simpy, so schedules are identical
+class Event_Engine:
+    def __init__(self, factory, N, M, order_data, setup_data):
+        # reference
+        self.factory    = factory
+        self.tracer     = factory.tracer
+        # global table
+        self.O = order_data
+        self.S = setup_data
+        # attribute
+        self.N          = N
+        self.M          = M
+        self.now        = 0
+        self.events     = []
+        self.eid        = itertools.count()
+        self.buffer     = []
+        self.throughput = 0
+        self.makespan   = 0
+        self.decisions  = 0
+        self.next_arrival = order_data[0][0]
+        # decision point: only the awaited one stops the run and dispatches
+        self.current_point  = 0
+        self.waited_point   = 0
+        # processor
+        self.idle               = [True] * M
+        self.MAT                = [0] * M
+        self.last_order_ID      = [-1] * M
+        self.current_order_ID   = [-1] * M
+        self.latest_setup_time  = [-1] * M
+        self.order_status       = [1] * N
+        # record
+        self.gantt      = Gantt()
+        # joint assignment of several idle machines
+        self.matching   = factory.assignment == "matching"
+        self.store      = Order_Store(order_data, setup_data) if self.matching else None
+        # setup lookup returns python scalars
+        if isinstance(setup_data, np.ndarray):
+            self.setup_time = setup_data.item
+        else:
+            self.setup_time = lambda last, i: setup_data[last][i]
+
+    def schedule(self, time, priority, kind, a, b = 0):
+        heapq.heappush(self.events, (time, priority, next(self.eid), kind, a, b))
+
+    def run(self, action):
+        self.action = action
+        # source process is initialized at build
+        self.schedule(0, URGENT, ARRIVAL, 0, 0)
+        while self.throughput < self.N:
+            time, _, _, kind, a, b = heapq.heappop(self.events)
+            self.now = time
+            if kind == ARRIVAL:
+                self.arrival(a, b)
+            elif kind == SETUP_START:
+                self.setup_start(a, b)
+            elif kind == SETUP_END:
+                self.latest_setup_time[a] = self.now
+                self.schedule(self.now, URGENT, PROCESS_START, a, b)
+            elif kind == PROCESS_START:
+                self.process_start(a, b)
+            elif kind == PROCESS_END:
+                self.process_end(a, b)
+            elif kind == DECISION and a == self.waited_point:
+                self.dispatch(action)
+                self.decisions += 1
+                self.waited_point = self.current_point
+        self.export()
+
+    def export(self):
+        # write result back to factory
+        self.factory.makespan   = self.makespan
+        self.factory.gantt      = self.gantt
+        self.factory.step_record = []
+        self.factory.order_status = self.order_status
+        self.factory.decisions  = self.decisions
+
+    def arrival(self, i, resumed):
+        O = self.O
+        while i < self.N:
+            if not resumed:
+                inter_arrival_time = O[i][0] if i == 0 else O[i][0] - O[i-1][0]
+                if inter_arrival_time != 0:
+                    self.schedule(self.now + inter_arrival_time, NORMAL, ARRIVAL, i, 1)
+                    return
+            resumed = 0
+            self.next_arrival = O[i+1][0] if i < self.N-1 else float('inf')
+            self.buffer.append(i)
+            if self.tracer.level >= TRACE_ORDER:
+                self.tracer.record(self.now, EVENT_ARRIVE, i)
+            # release batch arrival continually
+            if not (i < self.N-1 and O[i][0] == O[i+1][0]):
+                self.check_dispatch()
+            i += 1
+
+    def check_dispatch(self):
+        for m in range(self.M):
+            if self.idle[m]:
+                if len(self.buffer) == 1:
+                    self.schedule(self.now, URGENT, SETUP_START, m, self.buffer.pop(0))
+                elif len(self.buffer) > 1:
+                    self.schedule(self.now, NORMAL, DECISION, self.current_point)
+                    self.current_point += 1
+                break
+
+    def dispatch(self, action):
+        idle = [m for m in range(self.M) if self.idle[m]]
+        if self.matching and len(idle) > 1 and len(self.buffer) > 1:
+            last = [self.last_order_ID[m] for m in idle]
+            for m, order in match(self.store, idle, last, self.buffer):
+                self.buffer.remove(order)
+                self.schedule(self.now, URGENT, SETUP_START, m, order)
+            return
+        for m in range(self.M):
+            if self.idle[m] and len(self.buffer) > 0:
+                order = self.select(action, m)
+                self.buffer.remove(order)
+                self.schedule(self.now, URGENT, SETUP_START, m, order)
+
+    def select(self, action, m):
+        # same tie-breaking as np.argmin over the buffer
+        O = self.O
+        buffer = self.buffer
+        now = self.now
+        if action == 0:
+            return buffer[0]
+        elif action == 1:
+            return buffer[-1]
+        elif action == 2:
+            return min(buffer, key = lambda i: O[i][1][m])
+        elif action == 3:
+            last = self.last_order_ID[m]
+            if last == -1:
+                return buffer[0]
+            setup_time = self.setup_time
+            return min(buffer, key = lambda i: setup_time(last, i))
+        elif action == 4:
+            return min(buffer, key = lambda i: O[i][2])
+        elif action == 5:
+            return min(buffer, key = lambda i: O[i][2] - now - O[i][1][m])
+        elif action == 6:
+            return min(buffer, key = lambda i: (O[i][2] - now) / O[i][1][m])
+
+    def setup_start(self, m, order):
+        self.idle[m] = False
+        last = self.last_order_ID[m]
+        if last != -1:
+            setup_time = self.setup_time(last, order)
+            self.gantt.update_gantt(m, -1, self.now, setup_time, -1)
+            if self.tracer.level >= TRACE_ALL:
+                self.tracer.record(self.now, EVENT_SETUP, order, m)
+            self.schedule(self.now + setup_time, NORMAL, SETUP_END, m, order)
+        else:
+            self.schedule(self.now, URGENT, PROCESS_START, m, order)
+
+    def process_start(self, m, order):
+        process_time = self.O[order][1][m]
+        self.gantt.update_gantt(m, order, self.now, process_time, self.O[order][2])
+        self.order_status[order] = 0
+        self.MAT[m] = self.now + process_time
+        self.current_order_ID[m] = order
+        if self.tracer.level >= TRACE_ALL:
+            self.tracer.record(self.now, EVENT_START, order, m)
+        self.schedule(self.now + process_time, NORMAL, PROCESS_END, m, order)
+
+    def process_end(self, m, order):
+        if self.tracer.level >= TRACE_ORDER:
+            self.tracer.record(self.now, EVENT_FINISH, order, m)
+        self.idle[m] = True
+        self.last_order_ID[m] = order
+        self.current_order_ID[m] = -1
+        self.order_status[order] = -1
+        # sink
+        self.throughput += 1
+        if self.throughput == self.N:
+            self.makespan = self.now
+            return
+        if self.next_arrival != self.now:
+            self.check_dispatch()
@@ -7,88 +7,160 @@ Created on Fri Sep  17 23:18:51 2021
 
 # import packages
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
 
 
-# cover INFO logging
-plt.set_loglevel("WARNING")
+# matplotlib and pandas are imported on first use, the simulation never needs them
+def pyplot():
+    import matplotlib.pyplot as plt
+    # cover INFO logging
+    plt.set_loglevel("WARNING")
+    return plt
 
 
 # gantt
+# bars are kept in typed arrays grown by doubling, order -1 is a setup bar
 class Gantt:
-    def __init__(self):
-        self.gantt_data = {"M": [], "Order": [], \
-                           "Start time": [], "Process time": [], 
-                           "Due Date": []}
+    def __init__(self, capacity = 64):
+        self.size = 0
+        self.allocate(capacity)
         self.makespan = 0
 
+    def allocate(self, capacity):
+        self.machine    = np.zeros(capacity, dtype = np.int32)
+        self.order      = np.zeros(capacity, dtype = np.int64)
+        self.start      = np.zeros(capacity)
+        self.duration   = np.zeros(capacity)
+        self.due        = np.zeros(capacity)
+
+    def grow(self):
+        old = (self.machine, self.order, self.start, self.duration, self.due)
+        self.allocate(2 * len(self.machine))
+        for i, j in zip((self.machine, self.order, self.start, self.duration, self.due), old):
+            i[:len(j)] = j
+
     def update_gantt(self, M, order, ST, PT, DD):
-        self.gantt_data["M"].append(f"Machine {M}")
-        self.gantt_data["Order"].append(order)
-        self.gantt_data["Start time"].append(ST)
-        self.gantt_data["Process time"].append(PT)
-        self.gantt_data["Due Date"].append(DD)
+        if self.size == len(self.machine):
+            self.grow()
+        i = self.size
+        self.machine[i]     = M
+        self.order[i]       = order
+        self.start[i]       = ST
+        self.duration[i]    = PT
+        self.due[i]         = DD
+        self.size += 1
+
+    @property
+    def gantt_data(self):
+        # bars in the former dict of lists form
+        n = self.size
+        return {"M": [f"Machine {i}" for i in self.machine[:n].tolist()],
+                "Order": self.order[:n].tolist(),
+                "Start time": self.start[:n].tolist(),
+                "Process time": self.duration[:n].tolist(),
+                "Due Date": self.due[:n].tolist()}
+
+    def __len__(self):
+        return self.size
 
-    def draw_gantt(self, time):
+    def truncate(self, size):
+        # keep the first size bars
+        self.size = min(size, self.size)
+
+    def process_bar(self, start = 0):
+        # index of process bars from the start-th bar on
+        return np.flatnonzero(self.order[start:self.size] != -1) + start
+
+    def tardiness(self, start = 0):
+        # total tardiness of process bars from the start-th bar on
+        i = self.process_bar(start)
+        lateness = self.start[i] + self.duration[i] - self.due[i]
+        return float(np.maximum(lateness, 0).sum())
+
+    def draw_gantt(self, time, path = None, label_width = 20, label_limit = 2000):
+        # one collection for all bars, labels only on bars wide enough to read
+        # path saves the chart to a file instead of showing it
+        plt = pyplot()
+        import matplotlib.colors as mcolors
+        from matplotlib.collections import PolyCollection
         self.makespan = time
+        n = self.size
+        machine, order = self.machine[:n], self.order[:n]
+        start, duration = self.start[:n], self.duration[:n]
         # figure setting
         fig, axes = plt.subplots(figsize=(16, 6))
         axes.set_xlabel("Time")
         #axes.set_ylabel("Machine")
         axes.set_title("Gantt Chart")
-        axes.set_xticks(np.arange(0, max(time + 1, 20), 10))
-        # color set
+        if time <= 500:
+            axes.set_xticks(np.arange(0, max(time + 1, 20), 10))
+        # color set, black is kept for setup bars
         colors = list(mcolors.CSS4_COLORS.keys())
-        # data processing
-        machine = self.gantt_data["M"]
-        order = self.gantt_data["Order"]
-        start = self.gantt_data["Start time"]
-        duration = self.gantt_data["Process time"]
-        color = []
-        for j in self.gantt_data["Order"]:
-            if j == -1:
-                color.append("#000000")
-            else:
-                if colors[j] == "black":
-                    color.append(colors[-1]) # avoid black
-                else:
-                    color.append(colors[j])
+        colors = [colors[-1] if i == "black" else i for i in colors] # avoid black
+        palette = np.array([mcolors.to_rgba(i, 0.6) for i in colors])
+        color = palette[order % len(colors)]
+        color[order == -1] = mcolors.to_rgba("#000000", 0.6)
         # draw bar
-        axes.barh(y = machine, left = start, width = duration, \
-                  height = 0.5, color = color, align = "center", \
-                  alpha = 0.6, edgecolor = "black", linewidth = 1)
+        row = np.unique(machine)
+        y = np.searchsorted(row, machine)
+        verts = np.empty((n, 4, 2))
+        verts[:, [0, 1], 0] = start[:, None]
+        verts[:, [2, 3], 0] = (start + duration)[:, None]
+        verts[:, [0, 3], 1] = (y - 0.25)[:, None]
+        verts[:, [1, 2], 1] = (y + 0.25)[:, None]
+        axes.add_collection(PolyCollection(verts, facecolors = color, edgecolors = "black",
+                                           linewidths = 1 if n <= 5000 else 0.2))
+        axes.set_yticks(np.arange(len(row)), [f"Machine {i}" for i in row])
+        axes.set_xlim(0, max(time, start[-1] + duration[-1] if n > 0 else 0, 1))
+        axes.set_ylim(-0.5, max(len(row), 1) - 0.5)
         # add order text
-        for i in range(len(order)):
-            text_x = start[i] + duration[i] / 2
-            text_y = machine[i]
-            text = f"J{order[i]}"
-            if order[i] != -1:
-                axes.text(text_x, text_y, text, fontsize=8, \
+        xlim = axes.get_xlim()
+        pixel = axes.bbox.width / (xlim[1] - xlim[0])
+        label = np.flatnonzero((order != -1) & (duration * pixel >= label_width))
+        if len(label) <= label_limit:
+            for i in label.tolist():
+                axes.text(start[i] + duration[i] / 2, y[i], f"J{order[i]}", fontsize=8, \
                           verticalalignment='center', \
                           horizontalalignment='center')
 
         # show plot
-        plt.show()
+        if path is None:
+            plt.show()
+        else:
+            fig.savefig(path)
+            plt.close(fig)
     
+    def kpi(self, makespan):
+        # lateness of process bars and utilization per machine
+        i = self.process_bar()
+        lateness = self.start[i] + self.duration[i] - self.due[i]
+        tardiness = np.maximum(lateness, 0)
+        busy = np.bincount(self.machine[i], weights = self.duration[i])
+        utilization = {f"Machine {m}": busy[m] / makespan if makespan > 0 else 0
+                       for m in np.unique(self.machine[i]).tolist()}
+        return {"makespan": makespan,
+                "total_lateness": lateness.sum(),
+                "max_lateness": lateness.max() if len(lateness) > 0 else 0,
+                "total_tardiness": tardiness.sum(),
+                "tardy_orders": int((tardiness > 0).sum()),
+                "utilization": utilization}
+
     def output_report(self):
-        df = pd.DataFrame(self.gantt_data)
-        df = df[df["Order"] != -1]
+        import pandas as pd
+        i = self.process_bar()
+        kpi = self.kpi(self.makespan)
 
         # Lateness
-        df["completion_time"] = df["Start time"] + df["Process time"]
-        df["lateness"] = df["completion_time"] - df["Due Date"]
+        lateness = self.start[i] + self.duration[i] - self.due[i]
+        df = pd.DataFrame({"Order": self.order[i], "lateness": lateness}, index = i)
         print("\nLateness:")
-        print(df[["Order", "lateness"]])
+        print(df)
         
         # Machine Utilization
-        machine_utilization = df.groupby("M")["Process time"].sum() / self.makespan
-        machine_utilization = machine_utilization.reset_index()
-        machine_utilization.columns = ["Machine", "Utilization"]
+        machine_utilization = pd.DataFrame({"Machine": list(kpi["utilization"].keys()),
+                                            "Utilization": list(kpi["utilization"].values())})
         print("\nMachine Utilization:")
         print(machine_utilization)
 
         # makespan
         print("\nMakespan:")
-        print(self.makespan)
\ No newline at end of file
+        print(self.makespan)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+import ast
+import json
+import struct
+import numpy as np
+
+
+# file layout: magic, json header length, json header, then raw arrays
+# every array starts on an ALIGN boundary and can be mapped with np.memmap
+# setup_max holds the column maxima of setup_time, so loading never scans the matrix;
+# files written before it are still read
+MAGIC       = b"UPMS\x00\x01\x00\x00"
+HEADER_SIZE = 1024
+ALIGN       = 64
+FIELDS      = ["arrival_time", "process_time", "due_date", "setup_time", "setup_max"]
+
+
+def shapes(N, M):
+    return {"arrival_time": (N,), "process_time": (N, M), "due_date": (N,),
+            "setup_time": (N, N), "setup_max": (N,)}
+
+def layout(N, M, dtypes):
+    header = {"N": N, "M": M, "arrays": {}}
+    offset = HEADER_SIZE
+    for name in FIELDS:
+        dtype = np.dtype(dtypes[name])
+        shape = shapes(N, M)[name]
+        header["arrays"][name] = {"dtype": dtype.str, "shape": shape, "offset": offset}
+        size = int(np.prod(shape)) * dtype.itemsize
+        offset += -(-size // ALIGN) * ALIGN
+    return header, offset
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an instance file")
+        length = struct.unpack("<I", f.read(4))[0]
+        return json.loads(f.read(length))
+
+
+# writer filling a preallocated file, so the setup matrix can come in row chunks
+class Instance_Writer:
+    def __init__(self, path, N, M, setup_dtype = np.int32, process_dtype = np.int64,
+                 arrival_dtype = np.int64, due_dtype = np.float64):
+        # attribute
+        self.path = path
+        dtypes = {"arrival_time": arrival_dtype, "process_time": process_dtype,
+                  "due_date": due_dtype, "setup_time": setup_dtype, "setup_max": setup_dtype}
+        self.header, size = layout(N, M, dtypes)
+        text = json.dumps(self.header).encode()
+        if len(MAGIC) + 4 + len(text) > HEADER_SIZE:
+            raise ValueError("instance header too long")
+        with open(path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(text)) + text)
+            f.truncate(size)
+        self.array = {name: self.open(name) for name in FIELDS}
+
+    def open(self, name):
+        info = self.header["arrays"][name]
+        if 0 in info["shape"]:
+            return np.zeros(info["shape"], dtype = info["dtype"])
+        return np.memmap(self.path, dtype = info["dtype"], mode = "r+",
+                         offset = info["offset"], shape = tuple(info["shape"]))
+
+    def write_orders(self, arrival_time, process_time, due_date):
+        self.array["arrival_time"][:] = arrival_time
+        self.array["process_time"][:] = process_time
+        self.array["due_date"][:] = due_date
+
+    def write_setup(self, start, rows):
+        # setup times are not negative, so the zero-filled maxima start below them
+        self.array["setup_time"][start:start+len(rows)] = rows
+        if len(rows) > 0:
+            np.maximum(self.array["setup_max"], np.max(rows, axis = 0),
+                       out = self.array["setup_max"])
+
+    def close(self):
+        for array in self.array.values():
+            if isinstance(array, np.memmap):
+                array.flush()
+        self.array = {}
+
+
+def save_instance(path, arrival_time, process_time, due_date, setup_time):
+    arrival_time = np.asarray(arrival_time)
+    process_time = np.asarray(process_time)
+    due_date = np.asarray(due_date)
+    setup_time = np.asarray(setup_time)
+    N, M = process_time.shape
+    writer = Instance_Writer(path, N, M, setup_time.dtype, process_time.dtype,
+                             arrival_time.dtype, due_date.dtype)
+    writer.write_orders(arrival_time, process_time, due_date)
+    writer.write_setup(0, setup_time)
+    writer.close()
+
+def load_arrays(path, mmap = True):
+    # dict of arrays, the setup matrix is paged in lazily when mmap is set
+    header = read_header(path)
+    array = {}
+    for name in FIELDS:
+        if name not in header["arrays"]:
+            continue
+        info = header["arrays"][name]
+        if 0 in info["shape"]:
+            array[name] = np.zeros(info["shape"], dtype = info["dtype"])
+            continue
+        array[name] = np.memmap(path, dtype = info["dtype"], mode = "r",
+                                offset = info["offset"], shape = tuple(info["shape"]))
+        if name != "setup_time" or not mmap:
+            array[name] = np.array(array[name])
+    return array
+
+# return N, M, order data and setup data for Factory.reset
+# a mapped setup matrix carries its column maxima as column_max, see Order_Store
+def load_instance(path, mmap = True):
+    array = load_arrays(path, mmap)
+    N, M = array["process_time"].shape
+    order_data = to_order_data(array["arrival_time"], array["process_time"],
+                               array["due_date"])
+    setup_time = array["setup_time"]
+    if isinstance(setup_time, np.memmap) and "setup_max" in array:
+        setup_time.column_max = array["setup_max"]
+    return N, M, order_data, setup_time
+
+# return order data in the list form of order_data
+def to_order_data(arrival_time, process_time, due_date):
+    return [[a, p, d] for a, p, d in zip(arrival_time.tolist(), process_time.tolist(),
+                                         due_date.tolist())]
+
+
+# convert a case written by test_instance_generator to an instance file
+def excel_to_instance(excel_path, path):
+    import pandas as pd # reading xlsx also needs openpyxl
+    order = pd.read_excel(excel_path, sheet_name = "order", index_col = 0)
+    setup = pd.read_excel(excel_path, sheet_name = "setup", index_col = 0)
+    # process_time column is a stringified list
+    process_time = [ast.literal_eval(i) if isinstance(i, str) else i
+                    for i in order["process_time"]]
+    save_instance(path, order["arrival_time"].to_numpy(), np.array(process_time),
+                  order["due_date"].to_numpy(), setup.to_numpy())
+
+
+# main program
+# convert excel cases
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Convert Excel cases to instance files.")
+    parser.add_argument("excel", nargs = "+")
+    parser.add_argument("--suffix", default = ".upms")
+    args = parser.parse_args()
+    for i in args.excel:
+        path = i.rsplit(".", 1)[0] + args.suffix
+        excel_to_instance(i, path)
+        print(f"{i} -> {path}")
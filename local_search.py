@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+import math
+import random
+import numpy as np
+
+
+# import files
+from main import Factory
+from dispatching_rule import RULES
+from gantt_plot import Gantt
+from order_store import Order_Store
+
+
+# timing of machine sequences from the order store, without simulation
+# an order is set up once the machine is free and the order has arrived, the first
+# order of a machine has no setup, like Processor in the simulation
+class Schedule_Evaluator:
+    def __init__(self, order_data, setup_data):
+        store = Order_Store(order_data, setup_data)
+        # attribute
+        self.N          = store.N
+        self.M          = store.M
+        # global table
+        self.arrival    = store.arrival_time.astype(float)
+        self.process    = store.process_time.astype(float)
+        self.due        = store.due_date.astype(float)
+        self.setup      = store.setup_time
+
+    def work(self, machine, sequence, last = -1):
+        # setup and process time of each order of sequence after order last
+        if len(sequence) == 0:
+            return np.empty(0), np.empty(0)
+        prev = np.empty(len(sequence), dtype = np.int64)
+        prev[0] = last
+        prev[1:] = sequence[:-1]
+        setup = self.setup[prev, sequence].astype(float)
+        if last == -1:
+            setup[0] = 0
+        return setup, self.process[sequence, machine]
+
+    def completion(self, machine, sequence, finish = 0, last = -1):
+        # C[k] = max(C[k-1], arrival[k]) + work[k] as one prefix maximum:
+        # C[k] = W[k] + max(finish, max over j <= k of arrival[j] - W[j-1])
+        setup, process = self.work(machine, sequence, last)
+        work = setup + process
+        total = np.cumsum(work)
+        start = np.maximum.accumulate(self.arrival[sequence] - total + work)
+        return total + np.maximum(start, finish)
+
+    def evaluate(self, sequence):
+        # makespan and total tardiness of per-machine sequences
+        makespan, tardiness = 0, 0
+        for m in range(self.M):
+            C = self.completion(m, np.asarray(sequence[m], dtype = np.int64))
+            if len(C) > 0:
+                makespan = max(makespan, C[-1])
+                tardiness += np.maximum(C - self.due[sequence[m]], 0).sum()
+        return makespan, tardiness
+
+
+# candidate move: new suffixes of one or two machines, kept to apply without retiming
+class Move:
+    def __init__(self, change, makespan, tardiness):
+        self.change     = change    # (machine, start, suffix, completion, tardiness)
+        self.makespan   = makespan
+        self.tardiness  = tardiness
+
+    def value(self, objective):
+        return self.makespan if objective == "makespan" else self.tardiness
+
+
+# per-machine order sequences with completion times and cumulative tardiness
+# a move retimes only the changed suffix of each machine it touches
+class Schedule:
+    def __init__(self, evaluator, sequence):
+        # reference
+        self.evaluator  = evaluator
+        # attribute
+        self.sequence   = [np.asarray(i, dtype = np.int64) for i in sequence]
+        self.completion = []
+        self.late       = []    # cumulative tardiness along each sequence
+        self.finish     = np.zeros(evaluator.M)
+        self.total      = np.zeros(evaluator.M)
+        for m in range(evaluator.M):
+            C = evaluator.completion(m, self.sequence[m])
+            self.completion.append(C)
+            self.late.append(np.cumsum(np.maximum(C - evaluator.due[self.sequence[m]], 0)))
+            self.update(m)
+
+    def update(self, m):
+        self.finish[m]  = self.completion[m][-1] if len(self.completion[m]) > 0 else 0
+        self.total[m]   = self.late[m][-1] if len(self.late[m]) > 0 else 0
+
+    @property
+    def makespan(self):
+        return self.finish.max()
+
+    @property
+    def tardiness(self):
+        return self.total.sum()
+
+    def value(self, objective):
+        return self.makespan if objective == "makespan" else self.tardiness
+
+    def copy(self):
+        schedule = Schedule.__new__(Schedule)
+        schedule.evaluator  = self.evaluator
+        schedule.sequence   = [i.copy() for i in self.sequence]
+        schedule.completion = [i.copy() for i in self.completion]
+        schedule.late       = [i.copy() for i in self.late]
+        schedule.finish     = self.finish.copy()
+        schedule.total      = self.total.copy()
+        return schedule
+
+    # move evaluation
+    def retime(self, m, start, suffix):
+        # machine m keeps its sequence before start and continues with suffix
+        finish = self.completion[m][start-1] if start > 0 else 0
+        last = self.sequence[m][start-1] if start > 0 else -1
+        C = self.evaluator.completion(m, suffix, finish, last)
+        tardiness = np.maximum(C - self.evaluator.due[suffix], 0)
+        return (m, start, suffix, C, tardiness)
+
+    def move(self, change):
+        finish = self.finish.copy()
+        total = self.total.copy()
+        for m, start, suffix, C, tardiness in change:
+            prefix = self.late[m][start-1] if start > 0 else 0
+            finish[m] = C[-1] if len(C) > 0 else (self.completion[m][start-1] if start > 0 else 0)
+            total[m] = prefix + tardiness.sum()
+        return Move(change, finish.max(), total.sum())
+
+    def insert(self, a, i, b, j):
+        # order at position i of machine a to position j of machine b, j counted after removal
+        s = self.sequence[a]
+        if a != b:
+            t = self.sequence[b]
+            return self.move([self.retime(a, i, s[i+1:]),
+                              self.retime(b, j, np.concatenate(([s[i]], t[j:])))])
+        if i == j:
+            return None
+        if i < j:
+            suffix = np.concatenate((s[i+1:j+1], [s[i]], s[j+1:]))
+        else:
+            suffix = np.concatenate(([s[i]], s[j:i], s[i+1:]))
+        return self.move([self.retime(a, min(i, j), suffix)])
+
+    def swap(self, a, i, b, j):
+        # exchange the orders at position i of machine a and position j of machine b
+        s = self.sequence[a]
+        if a != b:
+            t = self.sequence[b]
+            return self.move([self.retime(a, i, np.concatenate(([t[j]], s[i+1:]))),
+                              self.retime(b, j, np.concatenate(([s[i]], t[j+1:])))])
+        if i == j:
+            return None
+        i, j = min(i, j), max(i, j)
+        suffix = np.concatenate(([s[j]], s[i+1:j], [s[i]], s[j+1:]))
+        return self.move([self.retime(a, i, suffix)])
+
+    def apply(self, move):
+        for m, start, suffix, C, tardiness in move.change:
+            prefix = self.late[m][start-1] if start > 0 else 0
+            self.sequence[m]    = np.concatenate((self.sequence[m][:start], suffix))
+            self.completion[m]  = np.concatenate((self.completion[m][:start], C))
+            self.late[m]        = np.concatenate((self.late[m][:start],
+                                                  prefix + np.cumsum(tardiness)))
+            self.update(m)
+
+    # replay into a gantt chart for draw_gantt, kpi and output_report
+    def gantt(self):
+        gantt = Gantt()
+        for m in range(self.evaluator.M):
+            sequence = self.sequence[m]
+            setup, process = self.evaluator.work(m, sequence)
+            C = self.completion[m]
+            for k in range(len(sequence)):
+                if k > 0:
+                    gantt.update_gantt(m, -1, C[k] - process[k] - setup[k], setup[k], -1)
+                gantt.update_gantt(m, sequence[k], C[k] - process[k], process[k],
+                                   self.evaluator.due[sequence[k]])
+        gantt.makespan = self.makespan
+        return gantt
+
+
+# schedule dispatched by a fixed rule in the simulation
+def seed_schedule(evaluator, order_data, setup_data, rule):
+    env = Factory(engine = "heap", record = False)
+    env.run(evaluator.N, evaluator.M, order_data, setup_data, rule)
+    i = env.gantt.process_bar()
+    machine, order, start = env.gantt.machine[i], env.gantt.order[i], env.gantt.start[i]
+    sequence = []
+    for m in range(evaluator.M):
+        k = np.flatnonzero(machine == m)
+        sequence.append(order[k[np.argsort(start[k], kind = "stable")]])
+    return Schedule(evaluator, sequence)
+
+
+# simulated annealing over insert and swap moves, temperature 0 is a descent
+# that also takes equal moves; half of the moves start from the critical machine
+class Local_Search:
+    def __init__(self, objective = "makespan", iterations = 100000, temperature = None,
+                 final = 1e-3, rules = None, seed = None):
+        if objective not in ("makespan", "tardiness"):
+            raise ValueError(f"unknown objective {objective!r}")
+        # setting
+        self.objective      = objective
+        self.iterations     = iterations
+        self.temperature    = temperature   # start temperature, None estimates it
+        self.final          = final         # end temperature over start temperature
+        self.rules          = list(range(len(RULES))) if rules is None else list(rules)
+        self.rng            = random.Random(seed)
+        # statistic
+        self.seed_value     = {}    # rule -> objective of its schedule
+        self.evaluated      = 0
+        self.accepted       = 0
+        self.improved       = 0
+
+    def propose(self, schedule):
+        length = [len(i) for i in schedule.sequence]
+        busy = [m for m in range(len(length)) if length[m] > 0]
+        value = (schedule.finish if self.objective == "makespan" else schedule.total)[busy]
+        if self.rng.random() < 0.5 and value.max() > 0:
+            # critical machine, an empty machine is never one
+            a = busy[int(np.argmax(value))]
+        else:
+            a = self.rng.choice(busy)
+        i = self.rng.randrange(length[a])
+        b = self.rng.randrange(len(length))
+        if self.rng.random() < 0.5 or length[b] == 0:
+            j = self.rng.randrange(length[b] if a == b else length[b] + 1)
+            return schedule.insert(a, i, b, j)
+        return schedule.swap(a, i, b, self.rng.randrange(length[b]))
+
+    def start_temperature(self, schedule):
+        # mean worsening of random moves
+        value = schedule.value(self.objective)
+        worse = []
+        for _ in range(100):
+            move = self.propose(schedule)
+            if move is not None and move.value(self.objective) > value:
+                worse.append(move.value(self.objective) - value)
+        return float(np.mean(worse)) if worse else 0
+
+    def run(self, schedule):
+        # improve a copy of schedule, return the best one found
+        current = schedule.copy()
+        best = current.copy()
+        value = best_value = current.value(self.objective)
+        T = self.start_temperature(current) if self.temperature is None else self.temperature
+        cooling = self.final ** (1 / max(self.iterations, 1))
+        for _ in range(self.iterations):
+            move = self.propose(current)
+            T *= cooling
+            if move is None:
+                continue
+            self.evaluated += 1
+            delta = move.value(self.objective) - value
+            if delta <= 0 or (T > 0 and self.rng.random() < math.exp(-delta / T)):
+                current.apply(move)
+                value += delta
+                self.accepted += 1
+                if value < best_value:
+                    best = current.copy()
+                    best_value = value
+                    self.improved += 1
+        return best
+
+    # seed from the best rule of the candidates, then improve
+    def solve(self, order_data, setup_data):
+        evaluator = Schedule_Evaluator(order_data, setup_data)
+        best = None
+        for rule in self.rules:
+            schedule = seed_schedule(evaluator, order_data, setup_data, rule)
+            self.seed_value[rule] = schedule.value(self.objective)
+            if best is None or self.seed_value[rule] < best.value(self.objective):
+                best = schedule
+        return self.run(best)
+
+
+# main program
+# improve the best rule schedule of one generated instance
+if __name__ == '__main__':
+    # import files
+    from test_instance_generator import generate
+    parser = argparse.ArgumentParser(description = "Improve a rule schedule by local search.")
+    parser.add_argument("-N", type = int, default = 50)
+    parser.add_argument("-M", type = int, default = 5)
+    parser.add_argument("--t-factor", type = float, default = 1.5)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--objective", default = "makespan", choices = ["makespan", "tardiness"])
+    parser.add_argument("--iterations", type = int, default = 100000)
+    parser.add_argument("--temperature", type = float, default = None)
+    parser.add_argument("--plot", action = "store_true")
+    args = parser.parse_args()
+    # parameter setting
+    np.random.seed(args.seed)
+    ORDER, SETUP = generate(args.N, args.M, args.t_factor)
+    # start search
+    search = Local_Search(args.objective, args.iterations, args.temperature, seed = args.seed)
+    schedule = search.solve(ORDER, SETUP)
+    for rule, value in search.seed_value.items():
+        print(f"{RULES[rule]:>5}: {args.objective} {value}")
+    print(f"local search: makespan {schedule.makespan}, total tardiness {schedule.tardiness}")
+    print(f"{search.evaluated} moves evaluated, {search.accepted} accepted, "
+          f"{search.improved} improvements")
+    if args.plot:
+        gantt = schedule.gantt()
+        gantt.draw_gantt(schedule.makespan)
+        gantt.output_report()
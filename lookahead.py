@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+
+
+# import files
+from main import Factory
+from dispatching_rule import RULES
+
+
+# branch factory of each worker, built once per pool by init_worker
+WORKER_ENV      = None
+WORKER_SETTING  = None
+
+
+def branch_factory(N, M, order_data, setup_data, assignment = "greedy"):
+    # simulation only, no observation copy and no record
+    env = Factory(incremental = True, copy_obs = False, buffer = "array", record = False,
+                  assignment = assignment)
+    env.reset(N, M, order_data, setup_data)
+    return env
+
+# objective of one branch: the action, then the base rule until done or horizon
+# a branch still running at deadline (time.time(), shared by worker processes) stops
+# and returns None, so an abandoned branch frees its worker
+def simulate(env, snapshot, action, base, objective, horizon, deadline = None):
+    if deadline is not None and time.time() > deadline:
+        return None
+    env.restore(snapshot)
+    start = len(env.gantt)
+    _, _, done = env.step(action)
+    steps = 1
+    while not done and (horizon is None or steps < horizon):
+        if deadline is not None and time.time() > deadline:
+            return None
+        _, _, done = env.step(action if base is None else base)
+        steps += 1
+    if objective == "makespan":
+        # planned completion when the horizon cuts the branch
+        return env.makespan if done else max(i.MAT for i in env.processor_list)
+    # orders started before the snapshot add the same tardiness to every branch
+    return env.gantt.tardiness(start)
+
+def init_worker(N, M, order_data, setup_data, assignment, setting):
+    global WORKER_ENV, WORKER_SETTING
+    WORKER_ENV      = branch_factory(N, M, order_data, setup_data, assignment)
+    WORKER_SETTING  = setting
+
+def run_branch(snapshot, action, deadline = None):
+    return simulate(WORKER_ENV, snapshot, action, *WORKER_SETTING, deadline)
+
+
+# rollout policy: simulate every candidate rule from the decision point, take the best
+class Rollout_Policy:
+    def __init__(self, base = None, objective = "makespan", horizon = None, actions = None,
+                 workers = 1, budget = None, memo_size = 4096):
+        if objective not in ("makespan", "tardiness"):
+            raise ValueError(f"unknown objective {objective!r}")
+        # setting
+        self.base       = base      # rule after the first step, None keeps the candidate
+        self.objective  = objective
+        self.horizon    = horizon   # decisions per branch, None runs to the end
+        self.actions    = list(range(len(RULES))) if actions is None else list(actions)
+        self.workers    = workers   # 1 simulates in this process
+        self.budget     = budget    # seconds per decision, None waits for every branch
+        self.memo_size  = memo_size
+        # attribute
+        self.instance   = None  # order and setup data of the branch factory or worker pool
+        self.env        = None
+        self.pool       = None
+        self.memo       = OrderedDict() # (state key, action) -> objective
+        # statistic
+        self.decisions  = 0
+        self.hits       = 0
+        self.misses     = 0
+        self.skipped    = 0     # branches left out by the budget
+        self.latency    = 0     # seconds of the last decision
+
+    def start(self, factory):
+        # new instance, memo of the old one is no longer valid
+        self.close()
+        self.instance = (factory.order_data, factory.setup_data, factory.assignment)
+        self.memo.clear()
+        instance = (factory.N, factory.M, factory.order_data, factory.setup_data,
+                    factory.assignment)
+        if self.workers == 1:
+            self.env = branch_factory(*instance)
+        else:
+            setting = (self.base, self.objective, self.horizon)
+            self.pool = ProcessPoolExecutor(max_workers = self.workers,
+                                            initializer = init_worker,
+                                            initargs = instance + (setting,))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures = True)
+        self.pool       = None
+        self.env        = None
+        self.instance   = None
+
+    def remember(self, key, value):
+        self.memo[key] = value
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last = False)
+
+    def left(self, begin):
+        # remaining budget in seconds
+        if self.budget is None:
+            return None
+        return max(self.budget - (time.perf_counter() - begin), 0)
+
+    def deadline(self, begin):
+        # end of the budget on the clock of simulate
+        if self.budget is None:
+            return None
+        return time.time() + self.left(begin)
+
+    # action for the current decision point of factory
+    def act(self, factory):
+        begin = time.perf_counter()
+        # memo and workers are kept over episodes of the same instance
+        if self.instance is None or factory.order_data is not self.instance[0] \
+                or factory.setup_data is not self.instance[1] \
+                or factory.assignment != self.instance[2]:
+            self.start(factory)
+        snapshot = factory.snapshot().detach()
+        state = snapshot.key()
+        value = {}
+        todo = []
+        for a in self.actions:
+            if (state, a) in self.memo:
+                self.memo.move_to_end((state, a))
+                value[a] = self.memo[(state, a)]
+                self.hits += 1
+            else:
+                todo.append(a)
+        self.misses += len(todo)
+        deadline = self.deadline(begin)
+        if self.pool is None:
+            for a in todo:
+                result = simulate(self.env, snapshot, a, self.base, self.objective,
+                                  self.horizon, deadline)
+                if result is None:
+                    self.skipped += len(todo) - todo.index(a)
+                    break
+                value[a] = result
+                self.remember((state, a), result)
+        elif len(todo) > 0:
+            future = {self.pool.submit(run_branch, snapshot, a, deadline): a for a in todo}
+            done, not_done = wait(future, timeout = self.left(begin))
+            for i in done:
+                if i.result() is None:
+                    self.skipped += 1
+                    continue
+                value[future[i]] = i.result()
+                self.remember((state, future[i]), value[future[i]])
+            # queued branches are dropped, running ones stop at the deadline
+            for i in not_done:
+                i.cancel()
+            self.skipped += len(not_done)
+        if len(value) > 0:
+            # ties go to the earlier candidate
+            action = min(value, key = lambda a: (value[a], self.actions.index(a)))
+        else:
+            action = self.actions[0] if self.base is None else self.base
+        self.decisions += 1
+        self.latency = time.perf_counter() - begin
+        return action
+
+
+# main program
+# compare rollout with its base rule on one instance
+if __name__ == '__main__':
+    # import packages
+    import numpy as np
+    # import files
+    from test_instance_generator import generate
+    parser = argparse.ArgumentParser(description = "Run a rollout policy on a generated instance.")
+    parser.add_argument("-N", type = int, default = 50)
+    parser.add_argument("-M", type = int, default = 5)
+    parser.add_argument("--t-factor", type = float, default = 1.5)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--base", type = int, default = None)
+    parser.add_argument("--objective", default = "makespan", choices = ["makespan", "tardiness"])
+    parser.add_argument("--horizon", type = int, default = None)
+    parser.add_argument("--workers", type = int, default = 1)
+    parser.add_argument("--budget", type = float, default = None, help = "seconds per decision")
+    args = parser.parse_args()
+    # parameter setting
+    np.random.seed(args.seed)
+    ORDER, SETUP = generate(args.N, args.M, args.t_factor)
+    policy = Rollout_Policy(args.base, args.objective, args.horizon, workers = args.workers,
+                            budget = args.budget)
+    # start simulation
+    env = Factory(record = False)
+    env.reset(args.N, args.M, ORDER, SETUP)
+    while True:
+        _, _, done = env.step(policy.act(env))
+        if done:
+            break
+    policy.close()
+    kpi = env.gantt.kpi(env.makespan)
+    print(f"rollout: makespan {kpi['makespan']}, total tardiness {kpi['total_tardiness']}")
+    print(f"{policy.decisions} decisions, {policy.hits} memo hits, "
+          f"{policy.skipped} branches over budget")
+    for a in range(len(RULES)):
+        rule_env = Factory(record = False)
+        rule_env.run(args.N, args.M, ORDER, SETUP, a)
+        kpi = rule_env.gantt.kpi(rule_env.makespan)
+        print(f"{RULES[a]:>5}: makespan {kpi['makespan']}, total tardiness {kpi['total_tardiness']}")
@@ -6,69 +6,90 @@ Created on Sat Sep  4 12:49:51 2021
 """
 
 # import packages
+import itertools
 import numpy as np
 import simpy
 import logging
 
 
 # import files
-from dispatching_rule import Dispatching_Rule
+from dispatching_rule import Dispatching_Rule, Vector_Rule, RULES
+from assignment import match
+from profiling import Profiler
 from gantt_plot import Gantt
+from fast_engine import Event_Engine, ARRIVAL, SETUP_END, PROCESS_END
+from order_buffer import Order_Buffer
+from order_store import Order_Store, Mask_Buffer, Key_Index
+from transition_buffer import Transition_Buffer, Queue_Transition_Buffer
+from tracer import Tracer, TRACE_OFF, TRACE_ORDER, TRACE_ALL
+from tracer import EVENT_ARRIVE, EVENT_SETUP, EVENT_START, EVENT_FINISH
 
 
 # logging setting
 FORMAT = "{levelname} - {message}"
-logging.basicConfig(level = logging.INFO, format = FORMAT, style = '{')
 
 
 # entity
 class Order:
-    def __init__(self, ID, arrival_time, process_time, due_date, setup_time):
+    def __init__(self, ID, arrival_time, process_time, due_date, setup_time,
+                 max_process_time, max_setup_time):
         # attribute
-        self.ID             = ID
-        self.arrival_time   = arrival_time
-        self.process_time   = process_time
-        self.due_date       = due_date
-        self.setup_time     = setup_time
+        self.ID                 = ID
+        self.arrival_time       = arrival_time
+        self.process_time       = process_time
+        self.due_date           = due_date
+        self.setup_time         = setup_time    # column of the shared setup matrix
+        self.max_process_time   = max_process_time
+        self.max_setup_time     = max_setup_time
 
 
 # resource
 class Source:
-    def __init__(self, factory, order_data, setup_data):
+    def __init__(self, factory, order_data):
         # reference
         self.factory    = factory
         self.env        = factory.env
         # global table
         self.O = order_data
-        self.S = setup_data
+        self.store = factory.store
         # attribute
-        self.N = len(order_data)
+        self.N          = len(order_data)
+        self.event      = None  # pending timeout
+        self.pending    = None  # (sequence, end time, kind, machine, order ID) of it
         # initial process
         self.env.process(self.arrival())
         
     def connect(self, queue):
         # reference
         self.queue      = queue
+
+    def order(self, i):
+        return Order(i, self.O[i][0], self.O[i][1], self.O[i][2],
+                     self.store.setup_column(i),
+                     self.store.max_process_time[i],
+                     self.store.max_setup_time[i])
         
-    def arrival(self):
-        # release order one by one
-        for i in range(self.N):
-            # compute inter-arrival time and call a timeout
-            inter_arrival_time = self.O[i][0] if i == 0 \
-                else self.O[i][0] - self.O[i-1][0]
-            if inter_arrival_time != 0:
-                yield self.env.timeout(inter_arrival_time)
+    def arrival(self, start = 0, event = None):
+        # release order one by one, a restored source first waits on its pending timeout
+        for i in range(start, self.N):
+            if event is not None:
+                yield event
+                event = None
+            else:
+                # compute inter-arrival time and call a timeout
+                inter_arrival_time = self.O[i][0] if i == 0 \
+                    else self.O[i][0] - self.O[i-1][0]
+                if inter_arrival_time != 0:
+                    yield self.factory.timeout(self, inter_arrival_time, ARRIVAL, -1, i)
             # update next_arrival
             self.factory.next_arrival = self.O[i+1][0] if i < self.N-1 \
                 else float('inf')
             # create an order and send to queue
-            setup_time = [self.S[j][i] for j in range(self.N)]
-            order = Order(i, self.O[i][0], self.O[i][1], self.O[i][2], 
-                          setup_time)
+            order = self.order(i)
             self.queue.pull(order)
             # record debug message
-            self.factory.sim_record.append(
-                f"{self.env.now}: order {order.ID} arrive.")
+            if self.factory.tracer.level >= TRACE_ORDER:
+                self.factory.tracer.record(self.env.now, EVENT_ARRIVE, order.ID)
             # if batch arrival, release continually
             if i < self.N-1 and self.O[i][0] == self.O[i+1][0]:
                 continue
@@ -82,7 +103,25 @@ class Queue:
         self.factory    = factory
         self.env        = factory.env
         # attribute
-        self.buffer     = []
+        self.buffer = self.new_buffer()
+        self.index  = self.new_index()  # waiting orders by key, queue observation only
+
+    def new_buffer(self):
+        if self.factory.buffer_type == "indexed":
+            store = self.factory.store
+            return Order_Buffer(self.factory.M, setup = None if store is None else store.setup_time)
+        elif self.factory.buffer_type == "array":
+            return Mask_Buffer(self.factory.store)
+        return []
+
+    def new_index(self):
+        if self.factory.queue_obs is None:
+            return None
+        return Key_Index(self.factory.index_key)
+
+    def clear(self):
+        self.buffer = self.new_buffer()
+        self.index  = self.new_index()
     
     def connect(self, dispatcher):
         # reference
@@ -90,7 +129,19 @@ class Queue:
     
     def pull(self, order):
         # pull order to queue
-        self.buffer.append(order)       
+        self.buffer.append(order)
+        if self.index is not None:
+            self.index.add(order.ID)
+
+    def take(self, order = None):
+        # take order, or the first one, out of queue
+        if order is None:
+            order = self.buffer.pop(0)
+        else:
+            self.buffer.remove(order)
+        if self.index is not None:
+            self.index.remove(order.ID)
+        return order
 
     def arrival_over(self):
         # call dispatcher
@@ -115,7 +166,7 @@ class Dispatcher:
             if i.idle == True:
                 if len(self.queue.buffer) == 1:
                     # without decision
-                    order = self.queue.buffer.pop(0)
+                    order = self.queue.take()
                     self.env.process(i.setup(order))
                 elif len(self.queue.buffer) > 1:
                     # with decision
@@ -124,26 +175,49 @@ class Dispatcher:
                 break
                 
     def dispatch(self, action):
+        if self.factory.assignment == "matching" and self.joint_dispatch():
+            return
         # dispatch according to action
         for i in range(len(self.processor_list)):
             if (self.processor_list[i].idle == True) and (len(self.queue.buffer) > 0):
-                if action == 0:
-                    order = self.DR.FIFO(self.queue.buffer)
-                elif action == 1:
-                    order = self.DR.LIFO(self.queue.buffer)
-                elif action == 2:
-                    order = self.DR.SPT(self.queue.buffer, i)
-                elif action == 3:
-                    order = self.DR.MST(self.queue.buffer, 
-                                        self.processor_list[i].last_order_ID)
-                elif action == 4:
-                    order = self.DR.EDD(self.queue.buffer)
-                elif action == 5:
-                    order = self.DR.LST(self.queue.buffer, i, self.env.now)
-                elif action == 6:
-                    order = self.DR.CR(self.queue.buffer, i, self.env.now)
-                self.queue.buffer.remove(order)
+                order = self.select(action, i)
+                self.queue.take(order)
                 self.env.process(self.processor_list[i].setup(order))
+
+    def joint_dispatch(self):
+        # several idle machines and orders are matched together, the action is not used
+        idle = [i for i in self.processor_list if i.idle == True]
+        if len(idle) < 2 or len(self.queue.buffer) < 2:
+            return False
+        order = {i.ID: i for i in self.queue.buffer}
+        pair = match(self.factory.store, [i.ID for i in idle],
+                     [i.last_order_ID for i in idle], list(order))
+        for machine, ID in pair:
+            self.queue.take(order[ID])
+            self.env.process(self.processor_list[machine].setup(order[ID]))
+        return True
+
+    def select(self, action, i):
+        buffer = self.queue.buffer
+        if not isinstance(buffer, list):
+            # indexed and array buffers apply the rule themselves
+            return buffer.select(action, i, self.processor_list[i].last_order_ID,
+                                 self.env.now)
+        if action == 0:
+            order = self.DR.FIFO(buffer)
+        elif action == 1:
+            order = self.DR.LIFO(buffer)
+        elif action == 2:
+            order = self.DR.SPT(buffer, i)
+        elif action == 3:
+            order = self.DR.MST(buffer, self.processor_list[i].last_order_ID)
+        elif action == 4:
+            order = self.DR.EDD(buffer)
+        elif action == 5:
+            order = self.DR.LST(buffer, i, self.env.now)
+        elif action == 6:
+            order = self.DR.CR(buffer, i, self.env.now)
+        return order
                     
 
 class Processor:
@@ -158,6 +232,8 @@ class Processor:
         self.last_order_ID      = -1
         self.current_order_ID   = -1
         self.latest_setup_time  = -1
+        self.event              = None  # pending setup or process timeout
+        self.pending            = None
 
     def connect(self, dispatcher, sink):
         # reference
@@ -174,12 +250,20 @@ class Processor:
             self.factory.gantt.update_gantt(
                 self.ID, -1, self.env.now, order.setup_time[self.last_order_ID], -1)
             # record debug message
-            self.factory.sim_record.append(
-                f"{self.env.now}: order {order.ID} setup at machine {self.ID}.")
+            if self.factory.tracer.level >= TRACE_ALL:
+                self.factory.tracer.record(self.env.now, EVENT_SETUP, order.ID, self.ID)
             # call a timeout
-            yield self.env.timeout(order.setup_time[self.last_order_ID])
-            # update attribute
-            self.latest_setup_time = self.env.now
+            yield self.factory.timeout(self, order.setup_time[self.last_order_ID],
+                                       SETUP_END, self.ID, order.ID)
+            self.setup_over(order)
+        else:
+            # start process
+            self.env.process(self.process(order))
+
+    def setup_over(self, order):
+        # update attribute
+        self.latest_setup_time = self.env.now
+        self.factory.update_processor(self)
         # start process
         self.env.process(self.process(order))
     
@@ -191,22 +275,36 @@ class Processor:
         self.factory.order_status[order.ID] = 0
         self.MAT = self.env.now + order.process_time[self.ID]
         self.current_order_ID = order.ID
+        self.factory.update_processor(self)
         # start process and record debug message
-        self.factory.sim_record.append(
-            f"{self.env.now}: order {order.ID} start at machine {self.ID}.")
-        yield self.env.timeout(order.process_time[self.ID])
-        self.factory.sim_record.append(
-            f"{self.env.now}: order {order.ID} finish at machine {self.ID}.")
+        if self.factory.tracer.level >= TRACE_ALL:
+            self.factory.tracer.record(self.env.now, EVENT_START, order.ID, self.ID)
+        yield self.factory.timeout(self, order.process_time[self.ID],
+                                   PROCESS_END, self.ID, order.ID)
+        self.process_over(order)
+
+    def process_over(self, order):
+        if self.factory.tracer.level >= TRACE_ORDER:
+            self.factory.tracer.record(self.env.now, EVENT_FINISH, order.ID, self.ID)
         # update attribute
         self.idle = True
         self.last_order_ID = order.ID
         self.current_order_ID = -1 
         self.factory.order_status[order.ID] = -1
+        self.factory.update_processor(self)
         # try to get more order
         self.sink.finish_order(order)
         if self.factory.next_arrival != self.env.now:
             self.dispatcher.check_dispatch()
 
+    def resume(self, event, kind, order):
+        # continue a restored setup or process from its pending timeout
+        yield event
+        if kind == SETUP_END:
+            self.setup_over(order)
+        else:
+            self.process_over(order)
+
 
 class Sink:
     def __init__(self, factory, N):
@@ -228,7 +326,101 @@ class Sink:
             self.factory.makespan = self.env.now
 
 
+# simulation state between two steps, without the static instance data
+class Snapshot:
+    def __init__(self, factory):
+        # reference
+        self.store          = factory.store # None once detached
+        self.instance       = None          # content hash of the instance once detached
+        # attribute
+        self.N              = factory.N
+        self.M              = factory.M
+        self.now            = factory.env.now
+        self.next_arrival   = factory.next_arrival
+        self.makespan       = factory.makespan
+        self.step_reward    = factory.step_reward
+        self.throughput     = factory.sink.throughput
+        self.done           = factory.terminal.triggered
+        self.queue          = tuple(i.ID for i in factory.queue.buffer)
+        self.processor      = tuple((i.idle, i.MAT, i.last_order_ID, i.current_order_ID,
+                                     i.latest_setup_time) for i in factory.processor_list)
+        # timeouts not yet processed, in creation order
+        pending = [i.pending for i in [factory.source] + factory.processor_list
+                   if i.event is not None and not i.event.processed]
+        self.pending        = sorted(pending)
+        source = factory.source
+        self.arrived        = source.pending[4] if source.event is not None \
+            and not source.event.processed else factory.N
+        # record length
+        self.gantt          = len(factory.gantt)
+        self.trace          = factory.tracer.mark()
+        self.record         = factory.step_record.count if factory.record else None
+
+    def key(self):
+        # equal keys have equal futures under equal actions
+        return (self.now, self.queue, self.processor, self.arrived,
+                tuple(i[1:] for i in self.pending))
+
+    def __getstate__(self):
+        # a pickled snapshot is detached, the order store stays in this process and
+        # its content hash identifies the instance
+        state = self.__dict__.copy()
+        if self.store is not None:
+            state["instance"] = self.store.fingerprint()
+        state["store"] = None
+        return state
+
+    def detach(self):
+        # copy for any factory built on the same instance
+        snapshot = Snapshot.__new__(Snapshot)
+        snapshot.__dict__.update(self.__getstate__())
+        return snapshot
+
+
 class Factory: 
+    def __init__(self, incremental = False, copy_obs = True, engine = "simpy",
+                 buffer = "array", record = True, capacity = None, trace = TRACE_OFF,
+                 skip_rules = None, assignment = "greedy", profiler = None,
+                 queue_obs = None, queue_key = "due"):
+        # observation setting
+        self.incremental    = incremental   # update preallocated tables in place
+        self.copy_obs       = copy_obs      # return copies instead of read-only views
+        # engine of run(): "simpy" or "heap" (fixed rule only, no observation)
+        if engine not in ("simpy", "heap"):
+            raise ValueError(f"unknown engine {engine!r}")
+        self.engine         = engine
+        # queue buffer: "array" (waiting mask), "list" or "indexed" (heap index per rule);
+        # indexed only pays off for queues of thousands of orders, see order_buffer.py
+        if buffer not in ("list", "indexed", "array"):
+            raise ValueError(f"unknown buffer {buffer!r}")
+        self.buffer_type    = buffer
+        # transition record: off for evaluation, capacity keeps the latest ones
+        self.record         = record
+        self.capacity       = capacity
+        # event trace: a level for a new in-memory trace per episode, or a shared Tracer
+        self.trace          = trace
+        # action set of the agent: decision points where all of them dispatch the same
+        # orders are resolved inside step(); with every rule nothing is skipped, since
+        # FIFO and LIFO differ whenever a decision point is raised
+        if skip_rules is not None and not all(i in range(len(RULES)) for i in skip_rules):
+            raise ValueError(f"unknown rule in skip_rules {skip_rules!r}")
+        self.skip_rules     = [] if skip_rules is None else list(skip_rules)
+        # idle machines: "greedy" takes the rule machine by machine, "matching" assigns
+        # orders jointly on setup plus process time when several machines are idle
+        if assignment not in ("greedy", "matching"):
+            raise ValueError(f"unknown assignment {assignment!r}")
+        self.assignment     = assignment
+        # queue observation: the first queue_obs waiting orders by queue_key ("fifo",
+        # "due" or "slack") padded to a fixed shape, instead of all N orders
+        if queue_key not in ("fifo", "due", "slack"):
+            raise ValueError(f"unknown queue key {queue_key!r}")
+        self.queue_obs      = queue_obs
+        self.queue_key      = queue_key
+        # component timing: a Profiler, or True for a new one
+        self.profiler       = Profiler() if profiler is True else profiler
+        if self.profiler is not None:
+            self.profiler.attach_entry(self)
+
     def build(self, N, M, order_data, setup_data):
         # environment
         self.env = simpy.Environment()
@@ -241,8 +433,14 @@ class Factory:
         self.next_arrival       = order_data[0][0]
         self.step_reward        = 0
         self.order_status       = [1 for i in range(N)] # waiting
+        self.store              = Order_Store(order_data, setup_data)
+        self.sequence           = itertools.count() # creation order of timeouts
+        self.skipped            = 0 # decision points resolved inside step()
+        self.rule               = Vector_Rule(self.store)
+        if self.queue_obs is not None:
+            self.index_key      = self.queue_rank()
         # build
-        self.source         = Source(self, order_data, setup_data)
+        self.source         = Source(self, order_data)
         self.queue          = Queue(self)
         self.dispatcher     = Dispatcher(self)
         self.processor_list = [Processor(self, i) for i in range(M)]
@@ -251,13 +449,36 @@ class Factory:
         self.decision_point = self.env.event()
         self.terminal       = self.env.event()
         # record
-        self.sim_record     = []
+        self.new_tracer()
         self.step_record    = []
         # gantt plot
         self.gantt = Gantt()
+        # observation table
+        if self.incremental:
+            self.build_table()
         # initialize
         self.initialize()
+        if self.profiler is not None:
+            self.profiler.attach(self)
     
+    def timeout(self, owner, delay, kind, machine, ID):
+        # timeout kept on its resource, snapshot recreates it in creation order
+        owner.event = self.env.timeout(delay)
+        owner.pending = (next(self.sequence), self.env.now + delay, kind, machine, ID)
+        return owner.event
+
+    def new_tracer(self):
+        if isinstance(self.trace, Tracer):
+            self.tracer = self.trace
+            self.tracer.new_episode()
+        else:
+            self.tracer = Tracer(self.trace)
+
+    @property
+    def sim_record(self):
+        # debug message rendered from the trace
+        return list(self.tracer.messages())
+
     def initialize(self):
         # connect resource
         self.source.connect(self.queue)
@@ -266,7 +487,89 @@ class Factory:
         for i in self.processor_list:
             i.connect(self.dispatcher, self.sink)
         
+    def build_table(self):
+        # order table: static columns converted once, status column updated in place
+        self.order_table = np.empty((self.N, self.M + 3))
+        self.order_table[:, 0] = self.store.arrival_time
+        self.order_table[:, 1:self.M+1] = self.store.process_time
+        self.order_table[:, self.M+1] = self.store.due_date
+        self.order_table[:, self.M+2] = 1 # waiting
+        self.order_status = self.order_table[:, self.M+2]
+        # setup table shares the store matrix
+        self.setup_table = self.store.setup_time.view()
+        self.setup_table.flags.writeable = False
+        # processor table: MAT, last order, current order, latest setup time
+        self.processor_table = np.tile([0.0, -1.0, -1.0, -1.0], (self.M, 1))
+        self.processor_obs = np.zeros((self.M, 4))
+        # read-only views
+        self.order_view = self.order_table.view()
+        self.order_view.flags.writeable = False
+        self.processor_view = self.processor_obs.view()
+        self.processor_view.flags.writeable = False
+
+    def queue_rank(self):
+        # static key of the queue index; slack on the fastest machine, and slack at
+        # any time differs from it by the same now for every order
+        if self.queue_key == "fifo":
+            return self.store.arrival_time
+        elif self.queue_key == "due":
+            return self.store.due_date
+        return self.store.due_date - self.store.process_time.min(axis = 1)
+
+    def new_record(self):
+        if self.queue_obs is not None:
+            return Queue_Transition_Buffer(self.M, self.queue_obs, self.capacity)
+        return Transition_Buffer(self, self.capacity)
+
+    def update_processor(self, processor):
+        # sync processor row of the table
+        if self.incremental:
+            row = self.processor_table[processor.ID]
+            row[0] = processor.MAT
+            row[1] = processor.last_order_ID
+            row[2] = processor.current_order_ID
+            row[3] = processor.latest_setup_time
+
+    def table_observation(self):
+        # processor data, only setup age depends on time
+        if self.copy_obs:
+            m1 = self.processor_table.copy()
+        else:
+            m1 = self.processor_obs
+            m1[:, :3] = self.processor_table[:, :3]
+        latest = self.processor_table[:, 3]
+        m1[:, 3] = np.where(latest == -1, 0, round(self.env.now, 2) - latest)
+        if self.copy_obs:
+            return self.order_table.copy(), m1, self.setup_table
+        return self.order_view, self.processor_view, self.setup_table
+
+    def queue_observation(self):
+        # O(K x M): order rows are waiting time, process time on each machine, time to due
+        # date and a mask; setup is from the last order of each machine to each row
+        K, M = self.queue_obs, self.M
+        ID = np.array(self.queue.index.top(K), dtype = np.int64)
+        now = self.env.now
+        m0 = np.zeros((K, M + 3))
+        m0[:len(ID), 0] = now - self.store.arrival_time[ID]
+        m0[:len(ID), 1:M+1] = self.store.process_time[ID]
+        m0[:len(ID), M+1] = self.store.due_date[ID] - now
+        m0[:len(ID), M+2] = 1
+        # processor data
+        m1 = np.array([[i.MAT, i.last_order_ID, i.current_order_ID,
+                        0 if i.latest_setup_time == -1 else round(now, 2) - i.latest_setup_time]
+                       for i in self.processor_list], dtype = float)
+        # setup data
+        m2 = np.zeros((M, K))
+        last = np.array([i.last_order_ID for i in self.processor_list], dtype = np.int64)
+        row = np.flatnonzero(last != -1)
+        m2[row, :len(ID)] = self.store.setup_time[last[row][:, None], ID]
+        return m0, m1, m2
+
     def observation(self):
+        if self.queue_obs is not None:
+            return self.queue_observation()
+        if self.incremental:
+            return self.table_observation()
         # state data
         m0 = []
         for i in range(self.N):
@@ -299,11 +602,11 @@ class Factory:
     def calculate_reward(self, order, processor):
         if processor.last_order_ID == -1:
             total_time = order.process_time[processor.ID]
-            upper_bound = max(order.process_time)
+            upper_bound = order.max_process_time
         else:
             wait_setup = order.setup_time[processor.last_order_ID]
             total_time = wait_setup + order.process_time[processor.ID]
-            upper_bound = max(order.setup_time) + max(order.process_time)
+            upper_bound = order.max_setup_time + order.max_process_time
         self.step_reward += (upper_bound - total_time)
 
 
@@ -322,33 +625,157 @@ class Factory:
     def reset(self, N, M, order_data, setup_data):
         self.build(N, M, order_data, setup_data)
         self.env.run(self.decision_point)
+        self.skip_decisions()
         m1, m2, m3 = self.observation() # state at t
-        return [m1, m2, m3]
+        state = [m1, m2, m3]
+        if self.record:
+            self.step_record = self.new_record()
+            self.step_record.start(state)
+        return state
     
     # run with this process
     def step(self, action):
-        old_m1, old_m2, old_m3 = self.observation()
-        old_state = [old_m1, old_m2, old_m3] # state at t
+        # state at t is the new state of the last transition
         self.dispatcher.dispatch(action)
         self.env.run(self.decision_point) # run until next input of action
+        self.skip_decisions()
         m1, m2, m3 = self.observation() 
         state = [m1, m2, m3] # state at t+1
         done = self.terminal.triggered
         reward = self.new_reward(done) # reward at t
-        self.store_transition(old_state, action, reward, state)
+        self.store_transition(action, reward, state, done)
         self.step_reward = 0
+        if done:
+            self.tracer.flush()
         return state, reward, done
+
+    # capture the simulation between two steps
+    def snapshot(self):
+        return Snapshot(self)
+
+    # go back to a snapshot of this episode, later transitions and records are dropped
+    # a detached snapshot starts new records at the snapshot instead
+    def restore(self, snapshot):
+        detached = snapshot.store is None
+        if detached and ((snapshot.N, snapshot.M) != (self.N, self.M)
+                         or snapshot.instance != self.store.fingerprint()):
+            raise ValueError("snapshot belongs to another instance")
+        if not detached and snapshot.store is not self.store:
+            raise ValueError("snapshot belongs to another episode")
+        if self.record and not detached:
+            self.step_record.check_rewind(snapshot.record)
+        if not detached:
+            self.tracer.check_rewind(snapshot.trace)
+        # fresh environment at the snapshot time
+        self.env = simpy.Environment(initial_time = snapshot.now)
+        for i in [self.source, self.queue, self.dispatcher, self.sink] + self.processor_list:
+            i.env = self.env
+        self.decision_point = self.env.event()
+        self.terminal       = self.env.event()
+        if snapshot.done:
+            # as left by the sink
+            self.decision_point.succeed()
+            self.terminal.succeed()
+        # attribute
+        self.next_arrival       = snapshot.next_arrival
+        self.makespan           = snapshot.makespan
+        self.step_reward        = snapshot.step_reward
+        self.sink.throughput    = snapshot.throughput
+        self.source.event       = None
+        self.queue.clear()
+        for i in snapshot.queue:
+            self.queue.pull(self.source.order(i))
+        for i, state in zip(self.processor_list, snapshot.processor):
+            (i.idle, i.MAT, i.last_order_ID, i.current_order_ID,
+             i.latest_setup_time) = state
+            i.event = None
+            self.update_processor(i)
+        # order status: arrived orders are finished unless waiting, in setup or in process
+        status = np.full(self.N, -1, dtype = np.int8)
+        status[snapshot.arrived:] = 1
+        status[list(snapshot.queue)] = 1
+        # pending timeouts in their original order, so ties break as before
+        for _, end, kind, machine, ID in snapshot.pending:
+            if kind == ARRIVAL:
+                event = self.timeout(self.source, end - self.env.now, kind, machine, ID)
+                self.env.process(self.source.arrival(ID, event))
+                continue
+            processor = self.processor_list[machine]
+            event = self.timeout(processor, end - self.env.now, kind, machine, ID)
+            self.env.process(processor.resume(event, kind, self.source.order(ID)))
+            status[ID] = 0 if kind == PROCESS_END else 1
+        if self.incremental:
+            self.order_status[:] = status
+        else:
+            self.order_status = status.tolist()
+        # record
+        if detached:
+            self.gantt = Gantt()
+            self.new_tracer()
+            if self.record:
+                self.step_record = self.new_record()
+                self.step_record.start(self.observation())
+        else:
+            self.gantt.truncate(snapshot.gantt)
+            self.tracer.rewind(snapshot.trace)
+            if self.record:
+                self.step_record.rewind(snapshot.record)
+        if self.profiler is not None:
+            self.profiler.attach(self)
+
+    def trivial_decision(self):
+        # every rule of the action set gives the same dispatch
+        if self.assignment == "matching" and len(self.queue.buffer) > 1 \
+                and sum(i.idle for i in self.processor_list) > 1:
+            return True
+        idx = np.array([i.ID for i in self.queue.buffer], dtype = np.int64)
+        for i in self.processor_list:
+            if not i.idle or len(idx) == 0:
+                continue
+            order = self.rule.pick(self.skip_rules[0], idx, i.ID, i.last_order_ID, self.env.now)
+            for action in self.skip_rules[1:]:
+                if self.rule.pick(action, idx, i.ID, i.last_order_ID, self.env.now) != order:
+                    return False
+            idx = idx[idx != order]
+        return True
+
+    def skip_decisions(self):
+        # step_reward keeps accumulating over the skipped decision points
+        while self.skip_rules and not self.terminal.triggered and self.trivial_decision():
+            self.dispatcher.dispatch(self.skip_rules[0])
+            self.env.run(self.decision_point)
+            self.skipped += 1
+
+    def copy_state(self, state):
+        # setup table is static and shared
+        return [state[0].copy(), state[1].copy(), state[2]]
     
+    # run a whole episode with a fixed dispatching rule
+    def run(self, N, M, order_data, setup_data, action):
+        if self.engine == "heap":
+            self.new_tracer()
+            engine = Event_Engine(self, N, M, order_data, setup_data)
+            if self.profiler is not None:
+                self.profiler.attach_engine(engine)
+            engine.run(action)
+            self.tracer.flush()
+            return self.makespan
+        self.reset(N, M, order_data, setup_data)
+        while True:
+            _, _, done = self.step(action)
+            if done:
+                break
+        return self.makespan
+
     def show_debug(self):
         # show event of simulation in logging
-        for i in self.sim_record:
+        for i in self.tracer.messages():
             logging.info(i)
         
-    def store_transition(self, old_state, action, reward, new_state):
-        # record state, action, reward
-        dic = {'old state': old_state, 'action': action, 
-               'reward': reward, 'new state': new_state}
-        self.step_record.append(dic)
+    def store_transition(self, action, reward, new_state, done):
+        # record dynamic state, action, reward
+        if self.record:
+            self.step_record.store_transition(action, reward, new_state, done)
         
     def show_transition(self):
         # show state, action, reward of RL in console
@@ -370,6 +797,8 @@ class Factory:
 if __name__ == '__main__':
     # import files
     from test_instance_generator import generate
+    # logging setting
+    logging.basicConfig(level = logging.INFO, format = FORMAT, style = '{')
     # parameter setting
     np.random.seed(2)
     N = 8
@@ -377,7 +806,7 @@ if __name__ == '__main__':
     T_FACTOR = 1.5
     ORDER, SETUP = generate(N, M, T_FACTOR)
     # start simulation
-    env = Factory()
+    env = Factory(trace = TRACE_ALL)
     env.reset(N, M, ORDER, SETUP)
     while True:
         action = 0
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import bisect
+import hashlib
+import numpy as np
+
+
+# import files
+from dispatching_rule import Vector_Rule
+
+
+# content hash of arrays, equal for equal data in any container
+def hash_arrays(arrays):
+    h = hashlib.blake2b(digest_size = 16)
+    for i in arrays:
+        i = np.ascontiguousarray(i)
+        h.update(f"{i.dtype.str}{i.shape}".encode())
+        h.update(memoryview(i).cast("B"))
+    return h.hexdigest()
+
+# content hash of an instance
+def fingerprint(order_data, setup_data):
+    return hash_arrays([np.array([i[0] for i in order_data]),
+                        np.array([i[1] for i in order_data]),
+                        np.array([i[2] for i in order_data]), np.asarray(setup_data)])
+
+
+# order data as structure of arrays
+# setup_data may carry column_max, its column maxima, so a memory-mapped matrix is
+# not read in full just to bound the reward
+class Order_Store:
+    def __init__(self, order_data, setup_data):
+        # attribute
+        self.N = len(order_data)
+        self.M = len(order_data[0][1])
+        # global table
+        self.arrival_time   = np.array([i[0] for i in order_data])
+        self.process_time   = np.array([i[1] for i in order_data])  # N x M
+        self.due_date       = np.array([i[2] for i in order_data])
+        self.setup_time     = np.asarray(setup_data)                # from row order to column order
+        # upper bound of each order, used by reward
+        self.max_process_time   = self.process_time.max(axis = 1)
+        column_max = getattr(setup_data, "column_max", None)
+        self.max_setup_time     = self.setup_time.max(axis = 0) if column_max is None \
+            else np.asarray(column_max)
+        self.key                = None  # content hash, computed on first use
+
+    def fingerprint(self):
+        # equal for stores of equal instances, also in other processes
+        if self.key is None:
+            self.key = hash_arrays([self.arrival_time, self.process_time, self.due_date,
+                                    self.setup_time])
+        return self.key
+
+    def setup_column(self, ID):
+        # setup time from every last order to this order, a view without copy
+        return self.setup_time[:, ID]
+
+
+# queue buffer as a waiting mask over order ID
+# orders are released in ID order, so ascending ID is the buffer sequence
+class Mask_Buffer:
+    def __init__(self, store):
+        # reference
+        self.store  = store
+        self.DR     = Vector_Rule(store)
+        # attribute
+        self.waiting    = np.zeros(store.N, dtype = bool)
+        self.order      = [None] * store.N
+        self.count      = 0
+        self.head       = 0 # no waiting order before head
+        self.end        = 0 # no waiting order from end
+
+    # list-like interface used by Queue and Dispatcher
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter([self.order[i] for i in self.index()])
+
+    def __getitem__(self, index):
+        if index == 0:
+            return self.order[self.first()]
+        return self.order[self.index()[index]]
+
+    def append(self, order):
+        self.waiting[order.ID] = True
+        self.order[order.ID] = order
+        self.count += 1
+        self.head = min(self.head, order.ID)
+        self.end = max(self.end, order.ID + 1)
+
+    def remove(self, order):
+        self.waiting[order.ID] = False
+        self.order[order.ID] = None
+        self.count -= 1
+
+    def pop(self, index = -1):
+        order = self[index]
+        self.remove(order)
+        return order
+
+    def first(self):
+        while not self.waiting[self.head]:
+            self.head += 1
+        return self.head
+
+    def index(self):
+        # waiting order IDs in buffer sequence
+        if self.count == 0:
+            return np.empty(0, dtype = np.int64)
+        head = self.first()
+        return np.flatnonzero(self.waiting[head:self.end]) + head
+
+    # dispatching rule
+    def select(self, action, machine_ID, last_order_ID, time_now):
+        if action == 0:
+            return self.order[self.first()]
+        ID = self.DR.pick(action, self.index(), machine_ID, last_order_ID, time_now)
+        return self.order[ID]
+
+
+# waiting order IDs sorted by a static key, ties by ID (arrival order)
+# the first K are read without touching the rest of the queue
+class Key_Index:
+    def __init__(self, key):
+        # global table
+        self.key        = key.tolist()
+        # attribute
+        self.entries    = []    # sorted (key, ID)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, ID):
+        bisect.insort(self.entries, (self.key[ID], ID))
+
+    def remove(self, ID):
+        del self.entries[bisect.bisect_left(self.entries, (self.key[ID], ID))]
+
+    def top(self, K):
+        return [i[1] for i in self.entries[:K]]
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+from collections import OrderedDict
+import numpy as np
+
+
+# import files
+from main import Factory
+from order_store import fingerprint
+
+
+# decision point reached by an action prefix
+class Prefix_Node:
+    def __init__(self, parent, action, reward = 0, done = False):
+        # reference
+        self.parent     = parent
+        self.children   = {}    # action -> node
+        # attribute
+        self.action     = action    # instance key for a root
+        self.depth      = 0 if parent is None else parent.depth + 1
+        self.reward     = reward    # of the step into this node
+        self.done       = done
+        self.snapshot   = None      # detached Snapshot, kept every interval decisions
+
+
+# trie of decision points per instance, at most capacity nodes
+# leaves are evicted least recently used first, so a kept node always has its
+# ancestors and the root checkpoint to resume from. a node is reached through its
+# parent, so a parent left without children is older than every leaf.
+class Prefix_Cache:
+    def __init__(self, capacity = 100000, interval = 1):
+        # setting
+        self.capacity   = capacity
+        self.interval   = interval  # decisions between checkpoints
+        # attribute
+        self.roots      = {}            # instance key -> root node
+        self.nodes      = set()
+        self.leaves     = OrderedDict() # leaf node -> None, least recently used first
+        # statistic
+        self.hits       = 0     # decision points taken from the trie
+        self.misses     = 0     # decision points simulated
+        self.resumed    = 0     # restores from a checkpoint
+        self.replayed   = 0     # steps simulated again after a restore
+        self.evictions  = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def touch(self, node):
+        if node in self.leaves:
+            self.leaves.move_to_end(node)
+
+    def insert(self, node):
+        self.nodes.add(node)
+        self.leaves[node] = None
+        while len(self.nodes) > self.capacity:
+            self.evict()
+
+    def evict(self):
+        leaf, _ = self.leaves.popitem(last = False)
+        self.nodes.remove(leaf)
+        if leaf.parent is None:
+            self.roots.pop(leaf.action, None)
+        else:
+            parent = leaf.parent
+            parent.children.pop(leaf.action, None)
+            if not parent.children and parent in self.nodes:
+                self.leaves[parent] = None
+                self.leaves.move_to_end(parent, last = False)
+        self.evictions += 1
+
+    def root(self, key):
+        node = self.roots.get(key)
+        if node is None:
+            node = Prefix_Node(None, key)
+            self.roots[key] = node
+            self.insert(node)
+        else:
+            self.touch(node)
+        return node
+
+    def child(self, node, action):
+        node = node.children.get(action)
+        if node is not None:
+            self.touch(node)
+        return node
+
+    def add(self, node, action, reward, done):
+        # a node evicted from a full cache gets no children, the path goes on uncached
+        child = Prefix_Node(node, action, reward, done)
+        if node in self.nodes:
+            node.children[action] = child
+            self.leaves.pop(node, None)
+            self.insert(child)  # may evict it again when the cache is full of one path
+        return child
+
+    def checkpoint(self, node, factory):
+        if node.snapshot is None and node.depth % self.interval == 0 and node in self.nodes:
+            node.snapshot = factory.snapshot().detach()
+
+    def clear(self):
+        self.roots.clear()
+        self.nodes.clear()
+        self.leaves.clear()
+
+
+# factory that takes reset and step from a shared prefix cache
+# steps along cached prefixes only move a cursor; the simulation restores the deepest
+# checkpoint when it is needed: to observe, to simulate a new action, or at the end.
+# without observe, states are None and only rewards and done are returned.
+# records (gantt, trace) start again at the restored checkpoint, like a detached restore
+class Cached_Factory(Factory):
+    def __init__(self, cache = None, observe = True, **kwargs):
+        if kwargs.get("record", False):
+            raise ValueError("a cached factory does not record transitions")
+        Factory.__init__(self, record = False, **kwargs)
+        # setting
+        self.cache      = Prefix_Cache() if cache is None else cache
+        self.observe    = observe
+        # attribute
+        self.instance   = None  # (order_data, setup_data, instance key)
+        self.built      = None  # instance key of the simulation
+        self.args       = None
+        self.cursor     = None  # node of the current decision point
+        self.lazy       = False # cursor is ahead of the simulation
+
+    def key(self, order_data, setup_data):
+        # the fingerprint is computed once per instance object
+        if self.instance is None or order_data is not self.instance[0] \
+                or setup_data is not self.instance[1]:
+            key = (fingerprint(order_data, setup_data), self.assignment, tuple(self.skip_rules))
+            self.instance = (order_data, setup_data, key)
+        return self.instance[2]
+
+    def observation(self):
+        if not self.observe:
+            return None, None, None
+        return Factory.observation(self)
+
+    def materialize(self):
+        # bring the simulation to the cursor
+        if not self.lazy:
+            return
+        path = []
+        node = self.cursor
+        while node.snapshot is None:
+            path.append(node)
+            node = node.parent
+        if self.built != self.instance[2]:
+            self.build(*self.args)
+            self.built = self.instance[2]
+        self.restore(node.snapshot)
+        self.cache.resumed += 1
+        self.lazy = False
+        for node in reversed(path):
+            Factory.step(self, node.action)
+            self.cache.replayed += 1
+            self.cache.checkpoint(node, self)
+
+    # start with this function
+    def reset(self, N, M, order_data, setup_data):
+        key = self.key(order_data, setup_data)
+        self.args = (N, M, order_data, setup_data)
+        self.cursor = self.cache.root(key)
+        if self.cursor.snapshot is not None:
+            self.cache.hits += 1
+            self.lazy = True
+            if not self.observe:
+                return None
+            self.materialize()
+            return list(self.observation())
+        self.cache.misses += 1
+        self.lazy = False
+        state = Factory.reset(self, N, M, order_data, setup_data)
+        self.built = key
+        self.cache.checkpoint(self.cursor, self)
+        return state if self.observe else None
+
+    # run with this process
+    def step(self, action):
+        node = self.cache.child(self.cursor, action)
+        if node is not None:
+            self.cache.hits += 1
+            self.cursor = node
+            self.lazy = True
+            # the simulation is left at the end of an episode
+            if self.observe or node.done:
+                self.materialize()
+            state = list(self.observation()) if self.observe else None
+            return state, node.reward, node.done
+        self.cache.misses += 1
+        self.materialize()
+        state, reward, done = Factory.step(self, action)
+        self.cursor = self.cache.add(self.cursor, action, reward, done)
+        self.cache.checkpoint(self.cursor, self)
+        return (state if self.observe else None), reward, done
+
+
+# main program
+# episodes sharing a rule prefix, with and without the cache
+if __name__ == '__main__':
+    # import packages
+    import random
+    import time
+    # import files
+    from test_instance_generator import generate
+    parser = argparse.ArgumentParser(description = "Replay action prefixes from a cache.")
+    parser.add_argument("-N", type = int, default = 500)
+    parser.add_argument("-M", type = int, default = 10)
+    parser.add_argument("--t-factor", type = float, default = 1.5)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--episodes", type = int, default = 20)
+    parser.add_argument("--prefix", type = int, default = 100, help = "FIFO decisions of every episode")
+    parser.add_argument("--interval", type = int, default = 1)
+    args = parser.parse_args()
+    # parameter setting
+    np.random.seed(args.seed)
+    ORDER, SETUP = generate(args.N, args.M, args.t_factor)
+    # without observation in both, a cache of no node simulates every step
+    cache = Prefix_Cache(interval = args.interval)
+    for env in [Cached_Factory(Prefix_Cache(0), observe = False),
+                Cached_Factory(cache, observe = False)]:
+        rng = random.Random(args.seed)
+        start = time.perf_counter()
+        result = []
+        for _ in range(args.episodes):
+            env.reset(args.N, args.M, ORDER, SETUP)
+            steps = 0
+            while True:
+                action = 0 if steps < args.prefix else rng.randrange(7)
+                _, _, done = env.step(action)
+                steps += 1
+                if done:
+                    break
+            result.append(env.makespan)
+        print(f"cache of {env.cache.capacity} nodes: {time.perf_counter() - start:.2f} s, "
+              f"mean makespan {np.mean(result)}")
+    print(f"{cache.hits} hits, {cache.misses} misses, {cache.resumed} resumed, "
+          f"{cache.replayed} replayed, {len(cache)} nodes")
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+import cProfile
+import pstats
+import time
+
+
+# component timer, attached by wrapping methods of one factory's objects
+# nothing is wrapped without a profiler, so a plain factory pays nothing
+# total time includes nested components, self time does not
+class Profiler:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls      = {}
+        self.total      = {}
+        self.self_time  = {}
+        self.stack      = []    # time of nested components of each open call
+
+    def wrap(self, name, function):
+        def timed(*args, **kwargs):
+            self.stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                child = self.stack.pop()
+                self.calls[name]        = self.calls.get(name, 0) + 1
+                self.total[name]        = self.total.get(name, 0) + elapsed
+                self.self_time[name]    = self.self_time.get(name, 0) + elapsed - child
+                if self.stack:
+                    self.stack[-1] += elapsed
+        timed.profiled = True
+        return timed
+
+    def patch(self, obj, attr, name):
+        function = getattr(obj, attr)
+        if not getattr(function, "profiled", False):
+            setattr(obj, attr, self.wrap(name, function))
+
+    def attach_entry(self, factory):
+        # called once by the factory constructor
+        self.patch(factory, "reset", "reset")
+        self.patch(factory, "step", "step")
+
+    def attach(self, factory):
+        # called by the factory after build and restore, which create new objects
+        self.patch(factory.env, "run", "simulation")
+        self.patch(factory, "observation", "observation")
+        self.patch(factory.dispatcher, "dispatch", "dispatch")
+        self.patch(factory.dispatcher, "select", "rule")
+        self.patch(factory, "calculate_reward", "reward")
+        self.patch(factory, "new_reward", "reward")
+        self.patch(factory.gantt, "update_gantt", "gantt")
+        self.patch(factory, "store_transition", "transition")
+        self.patch(factory.tracer, "record", "trace")
+
+    def attach_engine(self, engine):
+        self.patch(engine, "run", "simulation")
+        self.patch(engine, "dispatch", "dispatch")
+        self.patch(engine, "select", "rule")
+        self.patch(engine.gantt, "update_gantt", "gantt")
+        self.patch(engine.tracer, "record", "trace")
+
+    def result(self):
+        # component -> calls, total and self seconds
+        return {i: {"calls": self.calls[i], "total": self.total[i], "self": self.self_time[i]}
+                for i in self.calls}
+
+    def table(self):
+        import pandas as pd
+        df = pd.DataFrame.from_dict(self.result(), orient = "index")
+        df["self %"] = 100 * df["self"] / df["self"].sum() if len(df) > 0 else []
+        return df.sort_values("self", ascending = False)
+
+
+# run one episode under cProfile, the dump is read by pstats, snakeviz or gprof2dot
+# policy is a rule or a function of the factory returning the action
+def profile_episode(factory, N, M, order_data, setup_data, policy, path = None):
+    profile = cProfile.Profile()
+    profile.enable()
+    factory.reset(N, M, order_data, setup_data)
+    while True:
+        action = policy(factory) if callable(policy) else policy
+        _, _, done = factory.step(action)
+        if done:
+            break
+    profile.disable()
+    if path is not None:
+        profile.dump_stats(path)
+    return pstats.Stats(profile)
+
+
+# main program
+# time the components of one generated episode
+if __name__ == '__main__':
+    # import files
+    from main import Factory
+    from test_instance_generator import generate_arrays
+    from instance_io import to_order_data
+    parser = argparse.ArgumentParser(description = "Time the components of one episode.")
+    parser.add_argument("-N", type = int, default = 1000)
+    parser.add_argument("-M", type = int, default = 10)
+    parser.add_argument("--t-factor", type = float, default = 1.5)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--rule", type = int, default = 0)
+    parser.add_argument("--buffer", default = "array", choices = ["list", "indexed", "array"])
+    parser.add_argument("--incremental", action = "store_true")
+    parser.add_argument("--dump", default = None, help = "cProfile output of a second run")
+    args = parser.parse_args()
+    # parameter setting
+    arrival_time, process_time, due_date, SETUP = generate_arrays(args.N, args.M, args.t_factor,
+                                                                  args.seed)
+    ORDER = to_order_data(arrival_time, process_time, due_date)
+    # component timing
+    env = Factory(incremental = args.incremental, buffer = args.buffer, profiler = True)
+    env.run(args.N, args.M, ORDER, SETUP, args.rule)
+    print(env.profiler.table())
+    # function profile
+    if args.dump:
+        env = Factory(incremental = args.incremental, buffer = args.buffer)
+        stats = profile_episode(env, args.N, args.M, ORDER, SETUP, args.rule, args.dump)
+        stats.sort_stats("cumulative").print_stats(15)
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+
+# import files
+from main import Factory
+from dispatching_rule import RULES
+from test_instance_generator import generate
+from instance_io import load_instance
+from lookahead import Rollout_Policy
+
+
+# worker cache, filled once per process by init_worker
+WORKER_ORDER    = []
+WORKER_SETUP    = {}
+WORKER_SHM      = None
+WORKER_HANDLE   = None
+WORKER_PATH     = []
+WORKER_INSTANCE = {}
+
+
+# setup matrices of all instances packed in one shared memory block
+class Shared_Setup:
+    def __init__(self, setup_list):
+        arrays = [np.asarray(i) for i in setup_list]
+        self.dtype  = np.result_type(*arrays)
+        self.shape  = [i.shape for i in arrays]
+        self.offset = np.cumsum([0] + [i.size for i in arrays]).tolist()
+        size = max(self.offset[-1] * self.dtype.itemsize, 1)
+        self.shm = shared_memory.SharedMemory(create = True, size = size)
+        buffer = np.ndarray((self.offset[-1],), dtype = self.dtype, buffer = self.shm.buf)
+        for i in range(len(arrays)):
+            buffer[self.offset[i]:self.offset[i+1]] = arrays[i].ravel()
+        del buffer
+
+    def handle(self):
+        # small picklable description sent to workers
+        return (self.shm.name, self.dtype.str, self.shape, self.offset)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def init_worker(order_list, handle):
+    global WORKER_ORDER, WORKER_SHM, WORKER_HANDLE
+    WORKER_ORDER    = order_list
+    WORKER_SHM      = shared_memory.SharedMemory(name = handle[0])
+    WORKER_HANDLE   = handle
+    WORKER_SETUP.clear()
+
+def worker_setup(index):
+    # read-only view into shared memory, created on first use
+    if index not in WORKER_SETUP:
+        _, dtype, shape, offset = WORKER_HANDLE
+        dtype = np.dtype(dtype)
+        setup = np.ndarray(shape[index], dtype = dtype, buffer = WORKER_SHM.buf,
+                           offset = offset[index] * dtype.itemsize)
+        setup.flags.writeable = False
+        WORKER_SETUP[index] = setup
+    return WORKER_SETUP[index]
+
+def init_file_worker(path_list):
+    global WORKER_PATH
+    WORKER_PATH = path_list
+    WORKER_INSTANCE.clear()
+
+def worker_instance(index):
+    # instance file mapped on first use, its pages are shared through the os cache
+    if index not in WORKER_INSTANCE:
+        WORKER_INSTANCE[index] = load_instance(WORKER_PATH[index])
+    return WORKER_INSTANCE[index]
+
+def run_job(job):
+    index, policy, seed = job
+    if WORKER_PATH:
+        N, M, order_data, setup_data = worker_instance(index)
+    else:
+        N, M, order_data = WORKER_ORDER[index]
+        setup_data = worker_setup(index)
+    row = run_episode(N, M, order_data, setup_data, policy, seed)
+    row["instance"] = index
+    return row
+
+
+# run one episode with a fixed rule, uniformly random rules or a serial rollout
+def run_episode(N, M, order_data, setup_data, policy, seed = 0):
+    rng = random.Random(seed)
+    env = Factory(incremental = True, record = False)
+    env.reset(N, M, order_data, setup_data)
+    rollout = Rollout_Policy() if policy == "rollout" else None
+    # an episode can be over at reset, then no decision is taken
+    steps = 0
+    done = env.terminal.triggered
+    while not done:
+        if policy == "random":
+            action = rng.randrange(len(RULES))
+        elif policy == "rollout":
+            action = rollout.act(env)
+        else:
+            action = policy
+        _, _, done = env.step(action)
+        steps += 1
+    kpi = env.gantt.kpi(env.makespan)
+    return {"policy": policy if policy in ("random", "rollout") else RULES[policy],
+            "seed": seed,
+            "N": N,
+            "M": M,
+            "steps": steps,
+            "makespan": kpi["makespan"],
+            "total_lateness": kpi["total_lateness"],
+            "max_lateness": kpi["max_lateness"],
+            "total_tardiness": kpi["total_tardiness"],
+            "tardy_orders": kpi["tardy_orders"],
+            "utilization": sum(kpi["utilization"].values()) / M}
+
+
+def generate_instances(count, N, M, T_FACTOR, seed = 0):
+    instances = []
+    for k in range(count):
+        np.random.seed(seed + k)
+        order, setup = generate(N, M, T_FACTOR)
+        instances.append((N, M, order, setup))
+    return instances
+
+
+# distribute (instance, policy, seed) jobs over a process pool
+# instances are (N, M, order_data, setup_data) tuples or instance file paths
+def run_sweep(instances, policies = range(len(RULES)), seeds = (0,), workers = None,
+              chunksize = 8):
+    jobs = list(itertools.product(range(len(instances)), policies, seeds))
+    import pandas as pd # workers only run episodes
+    columns = ["instance", "policy", "seed", "N", "M", "steps", "makespan",
+               "total_lateness", "max_lateness", "total_tardiness",
+               "tardy_orders", "utilization"]
+    files = all(isinstance(i, str) for i in instances)
+    if workers == 1:
+        # serial run in this process
+        rows = []
+        for index, policy, seed in jobs:
+            instance = load_instance(instances[index]) if files else instances[index]
+            row = run_episode(*instance, policy, seed)
+            row["instance"] = index
+            rows.append(row)
+        return pd.DataFrame(rows, columns = columns)
+    if files:
+        # workers map the files themselves
+        with ProcessPoolExecutor(max_workers = workers, initializer = init_file_worker,
+                                 initargs = (list(instances),)) as pool:
+            rows = list(pool.map(run_job, jobs, chunksize = chunksize))
+        return pd.DataFrame(rows, columns = columns)
+    # order data is small and pickled once per worker, setup data is shared
+    order_list = [(N, M, order_data) for N, M, order_data, _ in instances]
+    shared = Shared_Setup([i[3] for i in instances])
+    try:
+        with ProcessPoolExecutor(max_workers = workers, initializer = init_worker,
+                                 initargs = (order_list, shared.handle())) as pool:
+            rows = list(pool.map(run_job, jobs, chunksize = chunksize))
+    finally:
+        shared.close()
+    return pd.DataFrame(rows, columns = columns)
+
+def summary(result):
+    # mean KPI of each policy
+    kpi = ["makespan", "total_lateness", "total_tardiness", "tardy_orders", "utilization"]
+    return result.groupby("policy", sort = False)[kpi].mean()
+
+
+# main program
+# evaluate dispatching rules on generated instances
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Evaluate dispatching rules in parallel.")
+    parser.add_argument("--instances", type = int, default = 100)
+    parser.add_argument("--files", nargs = "+", default = None, help = "instance files instead of generated ones")
+    parser.add_argument("-N", type = int, default = 8)
+    parser.add_argument("-M", type = int, default = 3)
+    parser.add_argument("--t-factor", type = float, default = 1.5)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--rules", type = int, nargs = "+", default = list(range(len(RULES))))
+    parser.add_argument("--random", action = "store_true", help = "add a random-rule policy")
+    parser.add_argument("--rollout", action = "store_true", help = "add a rollout policy")
+    parser.add_argument("--seeds", type = int, nargs = "+", default = [0])
+    parser.add_argument("--workers", type = int, default = None)
+    parser.add_argument("--output", default = None, help = "csv file of all episodes")
+    args = parser.parse_args()
+    # parameter setting
+    if args.files:
+        instances = args.files
+    else:
+        instances = generate_instances(args.instances, args.N, args.M, args.t_factor, args.seed)
+    policies = args.rules + (["random"] if args.random else []) \
+        + (["rollout"] if args.rollout else [])
+    # start evaluation
+    result = run_sweep(instances, policies, args.seeds, args.workers)
+    print(summary(result))
+    if args.output:
+        result.to_csv(args.output, index = False)
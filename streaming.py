@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import argparse
+import itertools
+import json
+import socket
+import threading
+from collections import deque
+import numpy as np
+import simpy
+
+
+# import files
+from main import Factory, Order, Queue, Dispatcher, Processor, Sink
+from fast_engine import ARRIVAL
+from tracer import TRACE_OFF, TRACE_ORDER, EVENT_ARRIVE, scalar
+from test_instance_generator import SETUP_UL, PT_UL, AT_FACTOR
+
+
+# feed
+# an order record is a dict with arrival_time, process_time (one per machine) and
+# due_date, optionally ID and setup ({last order ID: setup time from it}),
+# or an [arrival_time, process_time, due_date] row of order_data
+def to_record(record):
+    if isinstance(record, dict):
+        return record
+    return {"arrival_time": record[0], "process_time": record[1], "due_date": record[2]}
+
+def dump_record(record):
+    # record as one json line
+    record = to_record(record)
+    data = {"arrival_time": scalar(record["arrival_time"]),
+            "process_time": np.asarray(record["process_time"]).tolist(),
+            "due_date": scalar(record["due_date"])}
+    if "ID" in record:
+        data["ID"] = int(record["ID"])
+    if "setup" in record:
+        data["setup"] = {str(i): scalar(t) for i, t in record["setup"].items()}
+    return json.dumps(data) + "\n"
+
+# orders of a stored instance, in arrival order
+def instance_feed(order_data):
+    for i in range(len(order_data)):
+        yield {"ID": i, "arrival_time": order_data[i][0], "process_time": order_data[i][1],
+               "due_date": order_data[i][2]}
+
+# endless orders with the distributions of test_instance_generator
+# inter-arrival time is uniform around its mean, AT_FACTOR / M as in order_data
+def generated_feed(M, T_FACTOR, rng = None, inter_arrival = None, count = None):
+    rng = np.random.default_rng(rng)
+    gap = AT_FACTOR / M if inter_arrival is None else inter_arrival
+    time = 0
+    for _ in (itertools.count() if count is None else range(count)):
+        time += int(rng.integers(0, int(2 * gap) + 1))
+        process_time = rng.integers(1, PT_UL + 1, size = M)
+        yield {"arrival_time": time, "process_time": process_time.tolist(),
+               "due_date": time + T_FACTOR * process_time.mean()}
+
+# json lines file, read as the simulation goes
+def file_feed(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def write_feed(path, records):
+    with open(path, "w") as f:
+        for i in records:
+            f.write(dump_record(i))
+
+# json lines from a tcp connection, a read blocks until the next order is sent
+def socket_feed(address, timeout = None):
+    with socket.create_connection(address, timeout) as sock, sock.makefile("r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+# stand-in of an order server: send records to the first client, then close
+# return the (host, port) to connect to
+def serve_feed(records, host = "127.0.0.1", port = 0):
+    server = socket.create_server((host, port))
+    def send():
+        with server:
+            conn, _ = server.accept()
+            with conn, conn.makefile("w") as f:
+                for i in records:
+                    f.write(dump_record(i))
+    threading.Thread(target = send, daemon = True).start()
+    return server.getsockname()
+
+
+# setup time
+# a setup source is called as setup(last order ID, order ID); it may also have
+# add(ID, record), called on arrival, and drop(ID), called once the order is finished
+# and no longer the last order of its machine
+class Sparse_Setup:
+    def __init__(self, default = 0, fill = None):
+        # setting
+        self.default    = default
+        self.fill       = fill      # fill(last order ID, order ID) for missing pairs
+        # attribute
+        self.column     = {}    # order ID -> {last order ID: setup time}
+        self.row        = {}    # last order ID -> order IDs with an entry from it
+
+    def __len__(self):
+        return sum(len(i) for i in self.column.values())
+
+    def add(self, ID, record):
+        for last, time in record.get("setup", {}).items():
+            self.put(int(last), ID, time)
+
+    def put(self, last, ID, time):
+        self.column.setdefault(ID, {})[last] = time
+        self.row.setdefault(last, set()).add(ID)
+
+    def __call__(self, last, ID):
+        column = self.column.get(ID)
+        if column is not None and last in column:
+            return column[last]
+        if self.fill is None:
+            return self.default
+        time = self.fill(last, ID)
+        self.put(last, ID, time)
+        return time
+
+    def drop(self, ID):
+        # entries from a last order that was dropped before go with the order holding
+        # them, and so does the row they left behind
+        for last in self.column.pop(ID, {}):
+            if last in self.row:
+                self.row[last].discard(ID)
+                if len(self.row[last]) == 0:
+                    del self.row[last]
+        for i in self.row.pop(ID, ()):
+            if i in self.column:
+                self.column[i].pop(ID, None)
+                if len(self.column[i]) == 0:
+                    del self.column[i]
+
+# setup times drawn on first lookup like setup_data, kept while both orders are live
+def random_setup(rng = None):
+    rng = np.random.default_rng(rng)
+    return Sparse_Setup(fill = lambda last, ID: int(rng.integers(1, SETUP_UL + 1)))
+
+# lookup into a stored setup matrix, to replay an instance as a stream
+def matrix_setup(setup_data):
+    setup_data = np.asarray(setup_data)
+    return lambda last, ID: setup_data[last, ID]
+
+
+# column of the setup matrix of one order, looked up on demand
+class Setup_Column:
+    def __init__(self, factory, ID):
+        self.factory    = factory
+        self.ID         = ID
+
+    def __getitem__(self, last_order_ID):
+        return self.factory.setup_time(last_order_ID, self.ID)
+
+
+# KPI over the bars of the last window time units
+# bars come in start order, so ones ended before the window are dropped from the left
+class Window_KPI:
+    def __init__(self, M, window):
+        # attribute
+        self.M      = M
+        self.window = window
+        self.bars   = deque()   # (machine, order, start, duration, due), order -1 is setup
+        self.count  = 0         # bars ever drawn
+
+    def __len__(self):
+        return self.count
+
+    def update_gantt(self, machine, order, start, duration, due):
+        self.bars.append((machine, order, start, duration, due))
+        self.count += 1
+        edge = start - self.window
+        while self.bars[0][2] + self.bars[0][3] < edge:
+            self.bars.popleft()
+
+    def kpi(self, now):
+        begin = max(now - self.window, 0)
+        span = now - begin
+        bar = np.array(self.bars, dtype = float).reshape(-1, 5)
+        machine = bar[:, 0].astype(np.int64)
+        start, end = bar[:, 2], bar[:, 2] + bar[:, 3]
+        process = bar[:, 1] != -1
+        # orders finished in the window
+        finished = process & (end > begin) & (end <= now)
+        lateness = end[finished] - bar[finished, 4]
+        tardiness = np.maximum(lateness, 0)
+        # busy time inside the window, running bars count up to now
+        busy = np.maximum(np.minimum(end, now) - np.maximum(start, begin), 0)
+        process_busy = np.bincount(machine[process], weights = busy[process], minlength = self.M)
+        setup_busy = busy[~process].sum()
+        return {"time": now,
+                "window": span,
+                "finished": int(finished.sum()),
+                "throughput": finished.sum() / span if span > 0 else 0,
+                "mean_lateness": lateness.mean() if len(lateness) > 0 else 0,
+                "max_lateness": lateness.max() if len(lateness) > 0 else 0,
+                "total_tardiness": tardiness.sum(),
+                "tardy_orders": int((tardiness > 0).sum()),
+                "utilization": {f"Machine {m}": process_busy[m] / span if span > 0 else 0
+                                for m in range(self.M)},
+                "setup_ratio": setup_busy / (span * self.M) if span > 0 else 0}
+
+
+# resource
+class Stream_Source:
+    def __init__(self, factory, feed):
+        # reference
+        self.factory    = factory
+        self.env        = factory.env
+        # attribute
+        self.agen       = feed if hasattr(feed, "__anext__") else None
+        self.feed       = None if self.agen is not None else iter(feed)
+        self.ID         = itertools.count() # IDs of records without one
+        self.records    = deque()   # records of an async feed fetched ahead
+        self.ended      = False     # async feed has no more records
+        self.arrived    = 0
+        self.event      = None
+        self.pending    = None
+        # initial process
+        self.env.process(self.arrival())
+
+    def connect(self, queue):
+        # reference
+        self.queue      = queue
+
+    def normalize(self, record):
+        record = to_record(record)
+        if len(record["process_time"]) != self.factory.M:
+            raise ValueError(f"order needs {self.factory.M} process times")
+        if "ID" not in record:
+            record["ID"] = next(self.ID)
+        return record
+
+    def read(self):
+        if self.agen is None:
+            record = next(self.feed, None)
+            return None if record is None else self.normalize(record)
+        if len(self.records) > 0:
+            return self.records.popleft()
+        if not self.ended:
+            raise RuntimeError("async feed read before its next record was fetched")
+        return None
+
+    async def fetch(self, time):
+        # records arriving up to time, which the next event may read, and one after
+        while not self.ended and (len(self.records) == 0
+                                  or self.records[-1]["arrival_time"] <= time):
+            try:
+                self.records.append(self.normalize(await self.agen.__anext__()))
+            except StopAsyncIteration:
+                self.ended = True
+
+    def arrival(self):
+        record = self.read()
+        while record is not None:
+            # a late record arrives now
+            if record["arrival_time"] > self.env.now:
+                yield self.factory.timeout(self, record["arrival_time"] - self.env.now,
+                                           ARRIVAL, -1, record["ID"])
+            # create an order and send to queue
+            order = self.factory.new_order(record)
+            self.queue.pull(order)
+            self.arrived += 1
+            # record debug message
+            if self.factory.tracer.level >= TRACE_ORDER:
+                self.factory.tracer.record(self.env.now, EVENT_ARRIVE, order.ID)
+            # update next_arrival
+            record = self.read()
+            self.factory.next_arrival = float('inf') if record is None \
+                else record["arrival_time"]
+            # if batch arrival, release continually
+            if record is not None and record["arrival_time"] <= self.env.now:
+                continue
+            # confirm arrival over
+            self.queue.arrival_over()
+        self.factory.exhausted = True
+        if self.factory.live == 0:
+            self.factory.sink.stop()
+
+
+class Stream_Sink(Sink):
+    def __init__(self, factory):
+        Sink.__init__(self, factory, None)
+        # attribute
+        self.last = [-1] * factory.M   # last order of each machine, kept for setup lookup
+
+    def finish_order(self, order):
+        # finish
+        self.throughput += 1
+        self.factory.live -= 1
+        del self.factory.order_status[order.ID]
+        # the order replaced the last order of its machine, which is released
+        for i in self.factory.processor_list:
+            if i.last_order_ID != self.last[i.ID]:
+                self.factory.release(self.last[i.ID])
+                self.last[i.ID] = i.last_order_ID
+        # check terminal, a stream ends with its feed
+        if self.factory.exhausted and self.factory.live == 0:
+            self.stop()
+
+    def stop(self):
+        self.factory.decision_point.succeed() # to stop the step
+        self.factory.terminal.succeed()
+        self.factory.makespan = self.env.now
+
+
+# factory fed by an order stream instead of order_data and setup_data
+# memory is held by live orders and the KPI window only; the observation covers
+# waiting orders, and snapshot and restore are not available since the feed is consumed.
+# an async feed runs with areset, astep and arun, which await the feed between events
+# inside the running event loop
+class Stream_Factory(Factory):
+    def __init__(self, M, setup, window = 1000, buffer = "list", setup_bound = None,
+                 trace = TRACE_OFF, profiler = None):
+        if buffer == "array":
+            raise ValueError("array buffer needs a dense order store")
+        Factory.__init__(self, buffer = buffer, record = False, trace = trace,
+                         profiler = profiler)
+        # setting
+        self.M              = M
+        self.setup          = setup         # setup source, see Sparse_Setup
+        self.window         = window        # time units of the KPI window
+        self.setup_bound    = setup_bound   # upper bound of setup time in the reward,
+                                            # None uses the largest one looked up so far
+
+    def build(self, feed):
+        # environment
+        self.env = simpy.Environment()
+        # attribute
+        self.N                  = None  # the stream may not end
+        self.makespan           = 0
+        self.next_arrival       = 0
+        self.step_reward        = 0
+        self.order_status       = {}    # live order ID -> 1 waiting, 0 in process
+        self.store              = None
+        self.sequence           = itertools.count()
+        self.skipped            = 0
+        self.live               = 0     # orders arrived and not finished
+        self.exhausted          = False # feed has no more orders
+        self.max_setup          = 0 if self.setup_bound is None else self.setup_bound
+        # build
+        self.source         = Stream_Source(self, feed)
+        self.queue          = Queue(self)
+        self.dispatcher     = Dispatcher(self)
+        self.processor_list = [Processor(self, i) for i in range(self.M)]
+        self.sink           = Stream_Sink(self)
+        # event
+        self.decision_point = self.env.event()
+        self.terminal       = self.env.event()
+        # record
+        self.new_tracer()
+        self.step_record    = []
+        # windowed KPI in place of the gantt plot
+        self.gantt = Window_KPI(self.M, self.window)
+        # initialize
+        self.initialize()
+        if self.profiler is not None:
+            self.profiler.attach(self)
+
+    def new_order(self, record):
+        ID = record["ID"]
+        process_time = record["process_time"]
+        if hasattr(self.setup, "add"):
+            self.setup.add(ID, record)
+        self.order_status[ID] = 1
+        self.live += 1
+        return Order(ID, record["arrival_time"], process_time, record["due_date"],
+                     Setup_Column(self, ID), max(process_time), self.max_setup)
+
+    def setup_time(self, last_order_ID, ID):
+        time = self.setup(last_order_ID, ID)
+        if self.setup_bound is None and time > self.max_setup:
+            self.max_setup = time
+        return time
+
+    def release(self, ID):
+        # finished order leaves memory
+        if ID != -1 and hasattr(self.setup, "drop"):
+            self.setup.drop(ID)
+
+    def observation(self):
+        # waiting orders: ID, arrival time, process time on each machine, due date
+        order_list = list(self.queue.buffer)
+        m0 = np.array([[i.ID, i.arrival_time, *i.process_time, i.due_date]
+                       for i in order_list], dtype = float).reshape(-1, self.M + 3)
+        # processor data
+        m1 = np.array([[i.MAT, i.last_order_ID, i.current_order_ID,
+                        0 if i.latest_setup_time == -1
+                        else round(self.env.now, 2) - i.latest_setup_time]
+                       for i in self.processor_list], dtype = float)
+        # setup time of waiting orders after the last order of each machine
+        m2 = np.array([[0 if i.last_order_ID == -1 else j.setup_time[i.last_order_ID]
+                        for j in order_list] for i in self.processor_list],
+                      dtype = float).reshape(self.M, -1)
+        return m0, m1, m2
+
+    def kpi(self):
+        kpi = self.gantt.kpi(self.env.now)
+        kpi["arrived"]  = self.source.arrived
+        kpi["done"]     = self.sink.throughput
+        kpi["queue"]    = len(self.queue.buffer)
+        kpi["live"]     = self.live
+        return kpi
+
+    def check_feed(self, asynchronous):
+        if (self.source.agen is not None) != asynchronous:
+            raise ValueError("an async feed runs with areset, astep and arun" if not asynchronous
+                             else "areset, astep and arun need an async feed")
+
+    # start with this function
+    def reset(self, feed):
+        self.build(feed)
+        self.check_feed(False)
+        self.env.run(self.decision_point)
+        m1, m2, m3 = self.observation()
+        return [m1, m2, m3]
+
+    # run with this process
+    def step(self, action):
+        self.check_feed(False)
+        self.dispatcher.dispatch(action)
+        self.env.run(self.decision_point)
+        return self.transition()
+
+    def transition(self):
+        m1, m2, m3 = self.observation()
+        state = [m1, m2, m3]
+        done = self.terminal.triggered
+        reward = self.new_reward(done)
+        self.step_reward = 0
+        if done:
+            self.tracer.flush()
+        return state, reward, done
+
+    def snapshot(self):
+        raise ValueError("a stream cannot be restored, its feed is consumed")
+
+    def restore(self, snapshot):
+        raise ValueError("a stream cannot be restored, its feed is consumed")
+
+    # like env.run(decision_point), but stop at time bound; True at the decision point
+    def run_to(self, bound = float('inf')):
+        point = self.decision_point
+        while not point.processed:
+            time = self.env.peek()
+            if time > bound:
+                if bound > self.env.now:
+                    self.env.run(until = bound)
+                return False
+            if time == float('inf'):
+                raise RuntimeError("no event left before the decision point")
+            self.env.step()
+        return True
+
+    def bound(self, until, mark):
+        # next stop of run: the end time or the next report
+        return min(float('inf') if until is None else until,
+                   float('inf') if mark is None else mark)
+
+    # run a stream with a rule or a function of the factory returning the action,
+    # until the feed ends or the time until; report(kpi) is called every time units
+    def run(self, feed, policy, until = None, every = None, report = print):
+        self.build(feed)
+        self.check_feed(False)
+        mark = every
+        point = self.run_to(self.bound(until, mark))
+        while True:
+            if mark is not None and self.env.now >= mark:
+                report(self.kpi())
+                mark += every
+            if self.terminal.triggered or (until is not None and self.env.now >= until):
+                break
+            if point:
+                action = policy(self) if callable(policy) else policy
+                self.dispatcher.dispatch(action)
+            point = self.run_to(self.bound(until, mark))
+        self.tracer.flush()
+        return self.kpi()
+
+    # async driver: like run_to, fetching the records the next event may read before
+    # it is processed
+    async def advance(self, bound = float('inf')):
+        point = self.decision_point
+        while not point.processed:
+            time = self.env.peek()
+            if time > bound:
+                if bound > self.env.now:
+                    self.env.run(until = bound)
+                return False
+            if time == float('inf'):
+                raise RuntimeError("no event left before the decision point")
+            await self.source.fetch(time)
+            self.env.step()
+        return True
+
+    async def areset(self, feed):
+        self.build(feed)
+        self.check_feed(True)
+        await self.advance()
+        m1, m2, m3 = self.observation()
+        return [m1, m2, m3]
+
+    async def astep(self, action):
+        self.check_feed(True)
+        self.dispatcher.dispatch(action)
+        await self.advance()
+        return self.transition()
+
+    async def arun(self, feed, policy, until = None, every = None, report = print):
+        self.build(feed)
+        self.check_feed(True)
+        mark = every
+        point = await self.advance(self.bound(until, mark))
+        while True:
+            if mark is not None and self.env.now >= mark:
+                report(self.kpi())
+                mark += every
+            if self.terminal.triggered or (until is not None and self.env.now >= until):
+                break
+            if point:
+                action = policy(self) if callable(policy) else policy
+                self.dispatcher.dispatch(action)
+            point = await self.advance(self.bound(until, mark))
+        self.tracer.flush()
+        return self.kpi()
+
+
+# main program
+# dispatch an endless generated stream, or one from a file or a stand-in socket server
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Dispatch a stream of orders.")
+    parser.add_argument("-M", type = int, default = 5)
+    parser.add_argument("--t-factor", type = float, default = 1.5)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--rule", type = int, default = 2)
+    parser.add_argument("--inter-arrival", type = float, default = None)
+    parser.add_argument("--until", type = float, default = 100000)
+    parser.add_argument("--every", type = float, default = 10000)
+    parser.add_argument("--window", type = float, default = 10000)
+    parser.add_argument("--file", default = None, help = "json lines file of orders")
+    parser.add_argument("--socket", type = int, default = None,
+                        help = "orders sent by a local stand-in server")
+    args = parser.parse_args()
+    # parameter setting
+    if args.file:
+        feed = file_feed(args.file)
+    else:
+        feed = generated_feed(args.M, args.t_factor, args.seed, args.inter_arrival,
+                              args.socket)
+        if args.socket:
+            feed = socket_feed(serve_feed(feed))
+    # start simulation
+    env = Stream_Factory(args.M, random_setup(args.seed + 1), args.window, "indexed")
+    reported = []
+    def report(kpi):
+        reported.append(kpi["time"])
+        print(f"t {kpi['time']:.0f}: {kpi['finished']} finished, "
+              f"throughput {kpi['throughput']:.4f}, "
+              f"mean lateness {kpi['mean_lateness']:.1f}, tardy {kpi['tardy_orders']}, "
+              f"setup {kpi['setup_ratio']:.2f}, queue {kpi['queue']}, live {kpi['live']}")
+    kpi = env.run(feed, args.rule, args.until, args.every, report)
+    # the end is reported once, also when it falls on a report time
+    if not reported or reported[-1] != kpi["time"]:
+        report(kpi)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import itertools
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from assignment import assign, match
+from order_store import Order_Store
+from tracer import TRACE_ALL
+from test_equivalence import instance, result
+
+
+def brute_force(cost):
+    # least total cost over every matching of the short side
+    n, m = cost.shape
+    if n <= m:
+        return min(cost[range(n), list(c)].sum() for c in itertools.permutations(range(m), n))
+    return min(cost[list(r), range(m)].sum() for r in itertools.permutations(range(n), m))
+
+
+# the matching is complete on the short side, one-to-one and of least cost
+@pytest.mark.parametrize("shape", [(1, 1), (1, 5), (3, 3), (2, 6), (4, 5), (6, 3), (5, 1)])
+@pytest.mark.parametrize("seed", range(5))
+def test_assign(shape, seed):
+    rng = np.random.default_rng(seed)
+    # few distinct values, so ties are common
+    cost = rng.integers(0, 4 if seed % 2 else 100, size = shape).astype(float)
+    row, col = assign(cost)
+    assert len(row) == min(shape) and np.all(np.diff(row) > 0)
+    assert len(set(col.tolist())) == len(col)
+    assert cost[row, col].sum() == brute_force(cost)
+
+def test_match():
+    O = [[0, [5, 1, 9], 9], [0, [1, 8, 9], 9], [0, [4, 4, 1], 9], [0, [3, 3, 3], 9]]
+    S = np.array([[0, 9, 9, 1], [9, 0, 9, 9], [9, 9, 0, 9], [9, 9, 9, 0]])
+    store = Order_Store(O, S)
+    # machine 2 has no last order, machine 0 pays setup from order 0
+    pair = match(store, [0, 2], [0, -1], [1, 2, 3])
+    assert pair == [(0, 3), (2, 2)]
+    # a single machine and order are paired without setup
+    assert match(store, [1], [-1], [3]) == [(1, 3)]
+
+
+# the heap engine matches idle machines like the simpy engine
+@pytest.mark.parametrize("k", range(24))
+def test_heap_engine(k):
+    N, M, O, S = instance(k)
+    for action in [0, 3, 4]:
+        base = Factory(trace = TRACE_ALL, record = False, assignment = "matching")
+        base.run(N, M, O, S, action)
+        env = Factory(trace = TRACE_ALL, record = False, assignment = "matching",
+                      engine = "heap")
+        env.run(N, M, O, S, action)
+        assert result(env) == result(base)
+
+# with one machine there is never a joint decision
+@pytest.mark.parametrize("k", [0, 4, 8])
+def test_single_machine(k):
+    N, M, O, S = instance(k)
+    assert M == 1
+    for action in range(7):
+        schedule = []
+        for assignment in ["greedy", "matching"]:
+            env = Factory(trace = TRACE_ALL, record = False, assignment = assignment)
+            env.run(N, M, O, S, action)
+            schedule.append(result(env))
+        assert schedule[0] == schedule[1]
+
+def test_unknown_assignment():
+    with pytest.raises(ValueError):
+        Factory(assignment = "auction")
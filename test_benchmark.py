@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import json
+
+
+# import files
+from benchmark import CONFIG, measure, check_import, compare, make_instance, run_episode
+
+
+# every configuration runs the same schedule
+def test_configs_agree():
+    order, setup = make_instance(20, 3, 1.5, 0)
+    makespan = {config: run_episode(config, 20, 3, order, setup, 2)[2] for config in CONFIG}
+    assert len(set(makespan.values())) == 1
+
+def test_measure_row():
+    row = measure("fast", 10, 2, 0, 1.5, episodes = 2, seed = 0)
+    assert row["episodes"] == 2 and row["steps"] > 0
+    assert row["episodes_per_sec"] > 0 and row["peak_memory_mb"] > 0
+    assert row["step_p50_ms"] <= row["step_p99_ms"]
+    heap = measure("heap", 10, 2, 0, 1.5, episodes = 2, seed = 0, memory = False)
+    assert heap["steps"] == 0 and heap["step_p50_ms"] is None
+    assert heap["mean_makespan"] == row["mean_makespan"]
+
+def test_check_import():
+    result = [{"module": "main", "seconds": 0.1, "heavy": []},
+              {"module": "gantt_plot", "seconds": 0.5, "heavy": ["pandas"]}]
+    assert check_import(result, None) == ["gantt_plot imports pandas"]
+    assert len(check_import(result, 0.2)) == 2
+
+def test_compare(tmp_path, capsys):
+    row = measure("fast", 10, 2, 0, 1.5, episodes = 1, seed = 0, memory = False)
+    path = tmp_path / "old.json"
+    old = dict(row, episodes_per_sec = row["episodes_per_sec"] / 2)
+    path.write_text(json.dumps({"results": [old]}))
+    compare(str(path), {"results": [row]})
+    assert "2.00" in capsys.readouterr().out
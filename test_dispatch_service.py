@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import asyncio
+import numpy as np
+import pytest
+
+
+# import files
+from dispatch_service import Dispatch_Service, Dispatch_Client, Live_Queue
+from streaming import Sparse_Setup
+
+
+def orders(service, count, M = 2):
+    # order k takes k + 1 on every machine, due in reverse order
+    for k in range(count):
+        service.arrive({"arrival_time": 0, "process_time": [k + 1] * M, "due_date": count - k})
+
+async def started(service):
+    server = await service.start()
+    return server
+
+async def stop(service, server):
+    assert not service.task.done()
+    service.task.cancel()
+    server.close()
+    await server.wait_closed()
+
+
+def test_live_queue():
+    queue = Live_Queue(2, capacity = 4)
+    for k in range(200):
+        queue.append(k, [1, 2], k)
+    for k in range(0, 200, 3):
+        queue.remove(k)
+    assert len(queue) == 200 - 67
+    assert queue.ID[queue.live()].tolist() == [k for k in range(200) if k % 3]
+    with pytest.raises(ValueError):
+        queue.append(1, [1, 2], 0)
+
+# one evaluation answers a batch with distinct orders per rule
+def test_decide():
+    service = Dispatch_Service(3, np.zeros((6, 6)))
+    orders(service, 6, M = 3)
+    assert service.decide([(0, 0, 0, None), (1, 0, 4, None), (2, 0, 1, None)]) == [0, 5, 4]
+    assert service.current == [0, 5, 4] and len(service.queue) == 3
+    # the next query of a machine finishes its order
+    assert service.decide([(0, 1, 2, None)]) == [1]
+    assert service.last == [0, -1, -1] and service.decisions == 4 and service.batches == 2
+
+# concurrent queries are answered together
+def test_batch():
+    async def run():
+        service = Dispatch_Service(4, np.zeros((8, 8)), rule = 0, window = 0.01)
+        server = await started(service)
+        orders(service, 8, M = 4)
+        pick = await asyncio.gather(*[service.dispatch(m, 0) for m in range(4)])
+        await stop(service, server)
+        return service, pick
+    service, pick = asyncio.run(run())
+    assert pick == [0, 1, 2, 3] and service.batches == 1 and service.stats()["mean_batch"] == 4
+
+# a cancelled query leaves its order waiting and the batcher serving
+def test_cancel():
+    async def run():
+        service = Dispatch_Service(2, np.zeros((2, 2)), window = 0.02)
+        server = await started(service)
+        orders(service, 2)
+        first = asyncio.create_task(service.dispatch(0, 0))
+        await asyncio.sleep(0)
+        first.cancel()
+        second = await asyncio.wait_for(service.dispatch(1, 0), 1)
+        third = await asyncio.wait_for(service.dispatch(0, 0), 1)
+        await stop(service, server)
+        return service, second, third
+    service, second, third = asyncio.run(run())
+    assert (second, third) == (0, 1) and service.current == [1, 0]
+
+# a failing policy fails its batch only
+def test_policy_error():
+    def policy(service, machines, times):
+        if times[0] < 0:
+            raise ValueError("no rule")
+        return [2] * len(machines)
+    async def run():
+        service = Dispatch_Service(2, np.zeros((3, 3)), policy = policy)
+        server = await started(service)
+        orders(service, 3)
+        with pytest.raises(ValueError):
+            await service.dispatch(0, -1)
+        pick = await service.dispatch(1, 0)
+        await stop(service, server)
+        return pick
+    assert asyncio.run(run()) == 0
+
+# any error of the policy is answered to the client, which keeps its connection
+def test_policy_error_response():
+    def policy(service, machines, times):
+        if times[0] < 0:
+            raise RuntimeError("policy down")
+        return [0] * len(machines)
+    async def run():
+        service = Dispatch_Service(2, np.zeros((3, 3)), policy = policy)
+        server = await started(service)
+        host, port = server.sockets[0].getsockname()[:2]
+        orders(service, 3)
+        client = await Dispatch_Client.connect(host, port)
+        with pytest.raises(ValueError, match = "policy down"):
+            await client.request({"op": "dispatch", "machine": 0, "time": -1})
+        response = await client.request({"op": "dispatch", "machine": 1, "time": 0})
+        await client.close()
+        await stop(service, server)
+        return response
+    assert asyncio.run(run()) == {"machine": 1, "order": 0}
+
+# finished orders leave the sparse setup, also when the client names the last order
+def test_release():
+    setup = Sparse_Setup()
+    service = Dispatch_Service(1, setup, rule = 0)
+    for k in range(4):
+        record = {"ID": k, "arrival_time": 0, "process_time": [1], "due_date": 0,
+                  "setup": {str(j): 5 for j in range(k)}}
+        record["setup"]["9"] = 1
+        service.arrive(record)
+    assert service.decide([(0, 0, 0, None)]) == [0]
+    assert service.decide([(0, 1, 0, None)]) == [1]
+    # order 0 is the last order of the machine, order 1 is in process
+    assert 0 in setup.row and service.last == [0]
+    assert service.decide([(0, 2, 3, 9)]) == [2]
+    assert 0 not in setup.row and 1 not in setup.row and service.last == [9]
+    assert setup(9, 3) == 1 and len(setup) == 1 + 2
+
+def test_protocol():
+    async def run():
+        service = Dispatch_Service(2, np.zeros((4, 4)), rule = 2)
+        server = await started(service)
+        host, port = server.sockets[0].getsockname()[:2]
+        client = await Dispatch_Client.connect(host, port)
+        ID = [(await client.request({"op": "arrive", "arrival_time": 0,
+                                     "process_time": [3 - k, 1], "due_date": 9}))["ID"]
+              for k in range(3)]
+        response = await client.request({"op": "dispatch", "machine": 0, "time": 0})
+        with pytest.raises(ValueError):
+            await client.request({"op": "dispatch", "machine": 5})
+        stats = await client.request({"op": "stats"})
+        await client.close()
+        await stop(service, server)
+        return ID, response, stats
+    ID, response, stats = asyncio.run(run())
+    assert ID == [0, 1, 2] and response == {"machine": 0, "order": 2}
+    assert stats["decisions"] == 1 and stats["queue"] == 2
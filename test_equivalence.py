@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from tracer import TRACE_ALL
+from test_instance_generator import generate
+
+
+# small instances, with batch arrivals and tied keys in some of them
+def instance(k):
+    np.random.seed(k)
+    N = [1, 2, 5, 8, 20, 40][k % 6]
+    M = [1, 2, 3, 5][k % 4]
+    O, S = generate(N, M, [1.0, 1.5, 2.0][k % 3])
+    if k % 2:
+        O = [[o[0] // 7, o[1], o[2]] for o in O]
+    if k % 4 == 3:
+        O = [[o[0], [p % 10 + 1 for p in o[1]], o[2]] for o in O]
+        S = np.array(S) % 3 + 1
+        np.fill_diagonal(S, 0)
+    return N, M, O, S
+
+def result(env):
+    gantt = {k: list(v) for k, v in env.gantt.gantt_data.items()}
+    return env.makespan, gantt, env.sim_record
+
+
+# the heap engine gives the schedule and trace of the simpy engine under Factory.run
+@pytest.mark.parametrize("k", range(24))
+def test_heap_engine(k):
+    N, M, O, S = instance(k)
+    for action in range(7):
+        base = Factory(trace = TRACE_ALL, record = False)
+        base.run(N, M, O, S, action)
+        env = Factory(trace = TRACE_ALL, record = False, engine = "heap")
+        env.run(N, M, O, S, action)
+        assert result(env) == result(base), action
+        assert env.order_status == [-1] * N
+
+# the heap engine stops at the same decision points as reset/step
+@pytest.mark.parametrize("k", range(0, 24, 5))
+def test_heap_decisions(k):
+    N, M, O, S = instance(k)
+    base = Factory(record = False)
+    base.reset(N, M, O, S)
+    steps, done = 0, base.terminal.triggered
+    while not done:
+        done = base.step(2)[2]
+        steps += 1
+    env = Factory(record = False, engine = "heap")
+    env.run(N, M, O, S, 2)
+    assert env.decisions == steps
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        Factory(engine = "event")
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from gantt_plot import Gantt
+from test_instance_generator import generate
+
+
+def schedule(seed, N = 40, M = 4):
+    np.random.seed(seed)
+    env = Factory(record = False)
+    env.run(N, M, *generate(N, M, 1.5), seed % 7)
+    return env
+
+def reference(gantt, makespan):
+    # KPI of the former loop over the dict of lists
+    data = gantt.gantt_data
+    lateness, busy = [], {}
+    for m, o, s, p, d in zip(*data.values()):
+        if o == -1:
+            continue
+        lateness.append(s + p - d)
+        busy[m] = busy.get(m, 0) + p
+    return {"makespan": makespan,
+            "total_lateness": sum(lateness),
+            "max_lateness": max(lateness),
+            "total_tardiness": sum(max(i, 0) for i in lateness),
+            "tardy_orders": sum(i > 0 for i in lateness),
+            "utilization": {m: busy[m] / makespan for m in sorted(busy)}}
+
+
+# bars survive the doubling of the arrays
+def test_grow():
+    gantt = Gantt(capacity = 2)
+    for i in range(5):
+        gantt.update_gantt(i % 2, i - 1, 2 * i, 1.5, 4)
+    assert len(gantt) == 5 and len(gantt.machine) == 8
+    assert gantt.gantt_data == {"M": ["Machine 0", "Machine 1"] * 2 + ["Machine 0"],
+                                "Order": [-1, 0, 1, 2, 3],
+                                "Start time": [0, 2, 4, 6, 8],
+                                "Process time": [1.5] * 5,
+                                "Due Date": [4] * 5}
+    gantt.truncate(3)
+    assert len(gantt) == 3 and gantt.process_bar().tolist() == [1, 2]
+
+@pytest.mark.parametrize("seed", range(4))
+def test_kpi(seed):
+    env = schedule(seed)
+    kpi = env.gantt.kpi(env.makespan)
+    expected = reference(env.gantt, env.makespan)
+    for key in ["makespan", "total_lateness", "max_lateness", "total_tardiness", "tardy_orders"]:
+        assert kpi[key] == pytest.approx(expected[key])
+    assert kpi["utilization"] == pytest.approx(expected["utilization"])
+    assert env.gantt.tardiness() == pytest.approx(expected["total_tardiness"])
+
+def test_empty_kpi():
+    kpi = Gantt().kpi(0)
+    assert kpi["max_lateness"] == 0 and kpi["tardy_orders"] == 0 and kpi["utilization"] == {}
+
+def test_tardiness_from():
+    gantt = Gantt()
+    for order, start, due in [(0, 0, 1), (-1, 3, 0), (1, 4, 2), (2, 6, 20)]:
+        gantt.update_gantt(0, order, start, 3, due)
+    assert gantt.tardiness() == 2 + 5
+    assert gantt.tardiness(2) == 5
+
+
+def test_draw_gantt(tmp_path):
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    env = schedule(1)
+    path = tmp_path / "gantt.png"
+    env.gantt.draw_gantt(env.makespan, str(path))
+    assert path.stat().st_size > 0 and env.gantt.makespan == env.makespan
+    Gantt().draw_gantt(0, str(tmp_path / "empty.png"))
+
+def test_output_report(capsys):
+    pytest.importorskip("pandas")
+    env = schedule(2, N = 10, M = 2)
+    env.gantt.makespan = env.makespan
+    env.gantt.output_report()
+    out = capsys.readouterr().out
+    assert "Lateness:" in out and "Machine 1" in out and str(env.makespan) in out
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from test_instance_generator import generate, generate_arrays, setup_chunks
+from test_instance_generator import instance_stream, write_instances
+from test_instance_generator import SETUP_UL, PT_UL, AT_FACTOR
+from instance_io import load_arrays
+
+
+def test_generate_lists():
+    np.random.seed(0)
+    order, setup = generate(20, 3, 1.5)
+    assert [i[0] for i in order] == sorted(i[0] for i in order)
+    assert all(len(i[1]) == 3 and i[2] == i[0] + 1.5 * np.mean(i[1]) for i in order)
+    assert all(setup[i][i] == 0 for i in range(20))
+
+# bulk arrays follow the distributions of generate
+@pytest.mark.parametrize("dtype", [np.int32, np.int16])
+def test_generate_arrays(dtype):
+    N, M = 300, 4
+    arrival_time, process_time, due_date, setup_time = generate_arrays(N, M, 2.0, 0, dtype)
+    assert setup_time.dtype == dtype and setup_time.shape == (N, N)
+    assert np.all(np.diff(arrival_time) >= 0)
+    assert arrival_time.min() >= 1 and arrival_time.max() <= AT_FACTOR * N / M
+    assert process_time.min() >= 1 and process_time.max() <= PT_UL
+    assert np.allclose(due_date, arrival_time + 2.0 * process_time.mean(axis = 1))
+    off = ~np.eye(N, dtype = bool)
+    assert np.all(np.diag(setup_time) == 0)
+    assert setup_time[off].min() >= 1 and setup_time[off].max() <= SETUP_UL
+
+# the setup matrix does not depend on the chunk size
+def test_chunk_size():
+    N = 50
+    matrix = []
+    for rows in [1, 7, 64]:
+        rng = np.random.default_rng(3)
+        setup = np.empty((N, N), dtype = np.int32)
+        for start, chunk in setup_chunks(N, rng, rows = rows):
+            setup[start:start+len(chunk)] = chunk
+        matrix.append(setup)
+    assert all(np.array_equal(matrix[0], i) for i in matrix[1:])
+
+def test_instance_stream():
+    first = list(instance_stream(3, 10, 2, 1.5, seed = 7))
+    again = list(instance_stream(3, 10, 2, 1.5, seed = 7))
+    assert all(np.array_equal(a, b) for x, y in zip(first, again) for a, b in zip(x, y))
+    assert not np.array_equal(first[0][3], first[1][3])
+
+# instance files hold the instances of the stream with the same seed
+def test_write_instances(tmp_path):
+    path_list = write_instances(str(tmp_path / "case_{}.upms"), 3, 40, 3, 1.5, seed = 5,
+                                rows = 16)
+    for path, instance in zip(path_list, instance_stream(3, 40, 3, 1.5, seed = 5)):
+        array = load_arrays(path)
+        for name, value in zip(["arrival_time", "process_time", "due_date", "setup_time"],
+                               instance):
+            assert np.array_equal(array[name], value)
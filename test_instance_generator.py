@@ -7,7 +7,10 @@ Created on Fri Sep  3 21:02:05 2021
 
 # import packages
 import numpy as np
-import pandas as pd
+
+
+# import files
+from instance_io import Instance_Writer
 
 
 # parameter setting
@@ -51,9 +54,60 @@ def setup_data(N):
     return data
 
 
+# return global table as arrays, drawn in bulk from a numpy Generator
+# setup is int32 to halve memory, orders are sorted by arrival like order_data
+def generate_arrays(N, M, T_FACTOR, rng = None, dtype = np.int32):
+    rng = np.random.default_rng(rng)
+    arrival_time, process_time, due_date = order_arrays(N, M, T_FACTOR, rng)
+    setup_time = np.empty((N, N), dtype = dtype)
+    for start, chunk in setup_chunks(N, rng, dtype):
+        setup_time[start:start+len(chunk)] = chunk
+    return arrival_time, process_time, due_date, setup_time
+
+def order_arrays(N, M, T_FACTOR, rng):
+    arrival_time = rng.integers(1, int(AT_FACTOR * N / M + 1), size = N)
+    process_time = rng.integers(1, PT_UL + 1, size = (N, M))
+    due_date = arrival_time + T_FACTOR * process_time.mean(axis = 1)
+    index = np.argsort(arrival_time, kind = "stable")
+    return arrival_time[index], process_time[index], due_date[index]
+
+def setup_chunks(N, rng, dtype = np.int32, rows = 1024):
+    # int64 draws are unbuffered, so any chunk size yields the same matrix
+    for start in range(0, N, rows):
+        chunk = rng.integers(1, SETUP_UL + 1, size = (min(rows, N - start), N))
+        chunk = chunk.astype(dtype)
+        i = np.arange(len(chunk))
+        chunk[i, start + i] = 0
+        yield start, chunk
+
+# independent instances from one seed
+def instance_stream(count, N, M, T_FACTOR, seed = None):
+    for child in np.random.SeedSequence(seed).spawn(count):
+        yield generate_arrays(N, M, T_FACTOR, np.random.default_rng(child))
+
+# write instances to instance files without holding a full setup matrix in memory
+def write_instances(path_format, count, N, M, T_FACTOR, seed = None, rows = 1024,
+                    dtype = np.int32):
+    path_list = []
+    for k, child in enumerate(np.random.SeedSequence(seed).spawn(count)):
+        rng = np.random.default_rng(child)
+        path = path_format.format(k)
+        arrival_time, process_time, due_date = order_arrays(N, M, T_FACTOR, rng)
+        writer = Instance_Writer(path, N, M, dtype, process_time.dtype,
+                                 arrival_time.dtype, due_date.dtype)
+        writer.write_orders(arrival_time, process_time, due_date)
+        for start, chunk in setup_chunks(N, rng, dtype, rows):
+            writer.write_setup(start, chunk)
+        writer.close()
+        path_list.append(path)
+    return path_list
+
+
 # main program
 # data presentation in excel
 if __name__ == "__main__":
+    # import packages
+    import pandas as pd
     # writer setting
     path = './test_instance/UPMS_case.xlsx'
     writer = pd.ExcelWriter(path, engine = 'xlsxwriter')
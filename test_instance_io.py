@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pandas as pd
+import pytest
+
+
+# import files
+import instance_io
+from instance_io import Instance_Writer, save_instance, load_arrays, load_instance
+from main import Factory
+from order_store import Order_Store
+from runner import generate_instances, run_sweep
+from test_instance_generator import generate_arrays
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(tmp_path, mmap):
+    path = str(tmp_path / "case.upms")
+    arrays = generate_arrays(30, 4, 1.5, 0, np.int16)
+    save_instance(path, *arrays)
+    loaded = load_arrays(path, mmap)
+    for name, value in zip(instance_io.FIELDS, arrays):
+        assert loaded[name].dtype == value.dtype
+        assert np.array_equal(loaded[name], value)
+    assert np.array_equal(loaded["setup_max"], arrays[3].max(axis = 0))
+    assert isinstance(loaded["setup_time"], np.memmap) == mmap
+    assert not isinstance(loaded["process_time"], np.memmap)
+
+# column maxima gathered over row chunks are the ones of the whole matrix
+def test_chunked_maxima(tmp_path):
+    path = str(tmp_path / "case.upms")
+    arrival_time, process_time, due_date, setup_time = generate_arrays(50, 3, 1.5, 1)
+    writer = Instance_Writer(path, 50, 3)
+    writer.write_orders(arrival_time, process_time, due_date)
+    for start in range(0, 50, 7)[::-1]:
+        writer.write_setup(start, setup_time[start:start+7])
+    writer.close()
+    assert np.array_equal(load_arrays(path)["setup_max"], setup_time.max(axis = 0))
+
+# the order store takes the stored maxima instead of scanning the mapped matrix
+def test_store_uses_stored_maxima(tmp_path):
+    path = str(tmp_path / "case.upms")
+    arrival_time, process_time, due_date, setup_time = generate_arrays(20, 3, 1.5, 2)
+    writer = Instance_Writer(path, 20, 3)
+    writer.write_orders(arrival_time, process_time, due_date)
+    writer.write_setup(0, setup_time)
+    writer.array["setup_max"][:] = 99
+    writer.close()
+    N, M, order_data, setup_data = load_instance(path)
+    store = Order_Store(order_data, setup_data)
+    assert np.all(store.max_setup_time == 99)
+    _, _, _, setup_data = load_instance(path, mmap = False)
+    assert np.array_equal(Order_Store(order_data, setup_data).max_setup_time,
+                          setup_time.max(axis = 0))
+
+# a file written before setup_max is read and the maxima are computed
+def test_file_without_maxima(tmp_path, monkeypatch):
+    path = str(tmp_path / "case.upms")
+    arrays = generate_arrays(20, 3, 1.5, 3)
+    monkeypatch.setattr(instance_io, "FIELDS", instance_io.FIELDS[:4])
+    writer = Instance_Writer(path, 20, 3)
+    writer.write_orders(*arrays[:3])
+    writer.array["setup_time"][:] = arrays[3]
+    writer.close()
+    monkeypatch.undo()
+    N, M, order_data, setup_data = load_instance(path)
+    assert not hasattr(setup_data, "column_max")
+    assert np.array_equal(Order_Store(order_data, setup_data).max_setup_time,
+                          arrays[3].max(axis = 0))
+
+# a loaded instance runs like the arrays it was written from
+def test_factory_on_file(tmp_path):
+    path = str(tmp_path / "case.upms")
+    arrays = generate_arrays(40, 3, 1.5, 4)
+    save_instance(path, *arrays)
+    N, M, order_data, setup_data = load_instance(path)
+    memory = Factory(record = False)
+    memory.reset(N, M, order_data, np.array(arrays[3]))
+    mapped = Factory()
+    mapped.reset(N, M, order_data, setup_data)
+    done = False
+    while not done:
+        a, r, done = memory.step(3)
+        b, s, _ = mapped.step(3)
+        assert r == s and np.array_equal(a[0], b[0])
+    assert memory.makespan == mapped.makespan
+
+# runner workers map instance files themselves
+def test_runner_files(tmp_path):
+    instances = generate_instances(2, 8, 3, 1.5)
+    path_list = []
+    for k, (N, M, order, setup) in enumerate(instances):
+        path = str(tmp_path / f"case_{k}.upms")
+        save_instance(path, [i[0] for i in order], [i[1] for i in order],
+                      [i[2] for i in order], setup)
+        path_list.append(path)
+    memory = run_sweep(instances, [3], workers = 1)
+    files = run_sweep(path_list, [3], workers = 2)
+    pd.testing.assert_frame_equal(memory.sort_values("instance").reset_index(drop = True),
+                                  files.sort_values("instance").reset_index(drop = True))
+
+def test_not_an_instance(tmp_path):
+    path = tmp_path / "case.upms"
+    path.write_bytes(b"not an instance file")
+    with pytest.raises(ValueError):
+        load_instance(str(path))
+
+# a workbook in the layout of test_instance_generator converts to the same instance
+def test_excel_to_instance(tmp_path):
+    pytest.importorskip("openpyxl")
+    from test_instance_generator import generate
+    np.random.seed(1)
+    N, M = 8, 3
+    order, setup = generate(N, M, 1.5)
+    excel_path = str(tmp_path / "UPMS_case.xlsx")
+    with pd.ExcelWriter(excel_path, engine = "openpyxl") as writer:
+        pd.DataFrame({"arrival_time": [i[0] for i in order],
+                      "process_time": [str(i[1]) for i in order],
+                      "due_date": [i[2] for i in order]}).to_excel(writer, sheet_name = "order")
+        pd.DataFrame(setup).to_excel(writer, sheet_name = "setup")
+    path = str(tmp_path / "UPMS_case.upms")
+    instance_io.excel_to_instance(excel_path, path)
+    N_file, M_file, order_data, setup_data = load_instance(path)
+    assert (N_file, M_file) == (N, M)
+    arrival_time, process_time, due_date = (np.array([i[k] for i in order]) for k in range(3))
+    assert order_data == instance_io.to_order_data(arrival_time, process_time, due_date)
+    assert np.array_equal(setup_data, np.array(setup))
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import pytest
+
+
+# import files
+from benchmark import CORE_MODULES, import_time
+
+
+# worker processes import the simulation without matplotlib or pandas
+@pytest.mark.parametrize("module", CORE_MODULES + ["gantt_plot", "runner", "lookahead"])
+def test_no_heavy_import(module):
+    assert import_time(module, repeat = 1)["heavy"] == []
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import random
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from local_search import Schedule_Evaluator, Schedule, Local_Search, seed_schedule
+from test_instance_generator import generate
+
+
+def instance(seed, N = 30, M = 3):
+    np.random.seed(seed)
+    O, S = generate(N, M, 1.5)
+    return N, M, O, S
+
+def naive_completion(evaluator, machine, sequence, finish = 0, last = -1):
+    C = []
+    for k in sequence:
+        setup = 0 if last == -1 else evaluator.setup[last, k]
+        finish = max(finish, evaluator.arrival[k]) + setup + evaluator.process[k, machine]
+        C.append(finish)
+        last = k
+    return C
+
+def random_schedule(evaluator, rng):
+    order = list(range(evaluator.N))
+    rng.shuffle(order)
+    cut = sorted(rng.sample(range(evaluator.N + 1), evaluator.M - 1))
+    return Schedule(evaluator, [order[i:j] for i, j in zip([0] + cut, cut + [evaluator.N])])
+
+def same(schedule, other):
+    for m in range(schedule.evaluator.M):
+        assert np.array_equal(schedule.sequence[m], other.sequence[m])
+        assert np.allclose(schedule.completion[m], other.completion[m])
+        assert np.allclose(schedule.late[m], other.late[m])
+    assert schedule.makespan == pytest.approx(other.makespan)
+    assert schedule.tardiness == pytest.approx(other.tardiness)
+
+
+# the prefix maximum timing equals the order by order recursion
+@pytest.mark.parametrize("seed", range(5))
+def test_completion(seed):
+    N, M, O, S = instance(seed)
+    evaluator = Schedule_Evaluator(O, S)
+    rng = random.Random(seed)
+    for _ in range(20):
+        sequence = rng.sample(range(N), rng.randrange(N + 1))
+        machine, finish = rng.randrange(M), rng.choice([0, 100.0, 1000.0])
+        last = rng.choice([-1, rng.randrange(N)])
+        C = evaluator.completion(machine, np.array(sequence, dtype = np.int64), finish, last)
+        assert np.allclose(C, naive_completion(evaluator, machine, sequence, finish, last))
+
+# the sequences of a rule schedule time out as simulated
+@pytest.mark.parametrize("rule", range(7))
+def test_seed_schedule(rule):
+    N, M, O, S = instance(rule)
+    evaluator = Schedule_Evaluator(O, S)
+    schedule = seed_schedule(evaluator, O, S, rule)
+    env = Factory(record = False)
+    env.run(N, M, O, S, rule)
+    assert schedule.makespan == env.makespan
+    assert schedule.tardiness == pytest.approx(env.gantt.tardiness())
+    assert evaluator.evaluate(schedule.sequence) == pytest.approx(
+        (schedule.makespan, schedule.tardiness))
+    kpi = schedule.gantt().kpi(schedule.makespan)
+    assert kpi["total_tardiness"] == pytest.approx(env.gantt.kpi(env.makespan)["total_tardiness"])
+
+# a move evaluated on suffixes equals a full evaluation, and applies like a rebuild
+@pytest.mark.parametrize("seed", range(6))
+def test_moves(seed):
+    N, M, O, S = instance(seed, N = 12, M = 2 + seed % 3)
+    evaluator = Schedule_Evaluator(O, S)
+    rng = random.Random(seed)
+    schedule = random_schedule(evaluator, rng)
+    for _ in range(200):
+        a, b = rng.randrange(M), rng.randrange(M)
+        if len(schedule.sequence[a]) == 0:
+            continue
+        i = rng.randrange(len(schedule.sequence[a]))
+        sequence = [list(s) for s in schedule.sequence]
+        order = sequence[a].pop(i)
+        if rng.random() < 0.5 or len(schedule.sequence[b]) == 0:
+            j = rng.randrange(len(sequence[b]) + 1)
+            move = schedule.insert(a, i, b, j)
+            sequence[b].insert(j, order)
+        else:
+            j = rng.randrange(len(schedule.sequence[b]))
+            move = schedule.swap(a, i, b, j)
+            sequence[a].insert(i, order)
+            sequence[a][i], sequence[b][j] = sequence[b][j], sequence[a][i]
+        if move is None:
+            assert [list(s) for s in schedule.sequence] == sequence
+            continue
+        assert (move.makespan, move.tardiness) == pytest.approx(evaluator.evaluate(sequence))
+        schedule.apply(move)
+        same(schedule, Schedule(evaluator, sequence))
+
+def test_copy():
+    N, M, O, S = instance(0)
+    evaluator = Schedule_Evaluator(O, S)
+    schedule = random_schedule(evaluator, random.Random(0))
+    other = schedule.copy()
+    schedule.apply(schedule.insert(0, 0, 1, 0))
+    same(other, Schedule(evaluator, other.sequence))
+    assert len(other.sequence[0]) == len(schedule.sequence[0]) + 1
+
+
+# the result is never worse than the seed, and the same seed searches the same way
+@pytest.mark.parametrize("objective", ["makespan", "tardiness"])
+@pytest.mark.parametrize("temperature", [None, 0])
+def test_search(objective, temperature):
+    N, M, O, S = instance(3)
+    search = Local_Search(objective, 2000, temperature, seed = 1)
+    schedule = search.solve(O, S)
+    assert schedule.value(objective) <= min(search.seed_value.values())
+    assert sorted(np.concatenate(schedule.sequence).tolist()) == list(range(N))
+    same(schedule, Schedule(Schedule_Evaluator(O, S), schedule.sequence))
+    again = Local_Search(objective, 2000, temperature, seed = 1).solve(O, S)
+    same(schedule, again)
+
+def test_unknown_objective():
+    with pytest.raises(ValueError):
+        Local_Search("flowtime")
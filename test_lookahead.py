@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import time
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from lookahead import Rollout_Policy, branch_factory, simulate
+from instance_io import to_order_data
+from test_instance_generator import generate, generate_arrays
+
+
+def instance(seed, N = 15, M = 3):
+    np.random.seed(seed)
+    O, S = generate(N, M, 1.5)
+    return N, M, O, S
+
+def decide(policy, N, M, O, S):
+    # action of the policy at the first decision point
+    env = Factory(record = False)
+    env.reset(N, M, O, S)
+    return env, policy.act(env)
+
+
+# the chosen action is the best simulated branch
+@pytest.mark.parametrize("objective", ["makespan", "tardiness"])
+def test_best_branch(objective):
+    N, M, O, S = instance(0)
+    policy = Rollout_Policy(objective = objective)
+    env, action = decide(policy, N, M, O, S)
+    snapshot = env.snapshot().detach()
+    other = branch_factory(N, M, O, S)
+    value = [simulate(other, snapshot, a, None, objective, None) for a in policy.actions]
+    assert value[action] == min(value) and value.index(min(value)) == action
+    assert policy.misses == len(policy.actions) and policy.skipped == 0
+
+def test_memo():
+    N, M, O, S = instance(1)
+    policy = Rollout_Policy()
+    first = decide(policy, N, M, O, S)[1]
+    # the same data and state hit the memo
+    assert decide(policy, N, M, O, S)[1] == first
+    assert policy.hits == len(policy.actions)
+
+# worker processes simulate the same branches
+def test_pool():
+    N, M, O, S = instance(2)
+    serial = decide(Rollout_Policy(base = 1, horizon = 5), N, M, O, S)[1]
+    policy = Rollout_Policy(base = 1, horizon = 5, workers = 2)
+    try:
+        assert decide(policy, N, M, O, S)[1] == serial
+    finally:
+        policy.close()
+
+def test_past_deadline():
+    N, M, O, S = instance(3)
+    env = branch_factory(N, M, O, S)
+    snapshot = env.snapshot().detach()
+    assert simulate(env, snapshot, 0, None, "makespan", None, time.time() - 1) is None
+
+@pytest.mark.parametrize("base", [None, 2])
+def test_no_budget(base):
+    N, M, O, S = instance(4)
+    policy = Rollout_Policy(base = base, budget = 0)
+    action = decide(policy, N, M, O, S)[1]
+    assert action == (0 if base is None else base)
+    assert policy.skipped == len(policy.actions) and len(policy.memo) == 0
+
+# a branch abandoned at the deadline frees its worker for the next decision
+def test_pool_deadline():
+    N, M = 2000, 3
+    arrival_time, process_time, due_date, S = generate_arrays(N, M, 1.5, 0)
+    O = to_order_data(arrival_time, process_time, due_date)
+    policy = Rollout_Policy(workers = 2, budget = 0.05)
+    try:
+        env, action = decide(policy, N, M, O, S)
+        assert policy.skipped == len(policy.actions) and action == 0
+        begin = time.perf_counter()
+        policy.pool.submit(time.time).result()
+        assert time.perf_counter() - begin < 1
+    finally:
+        policy.close()
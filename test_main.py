@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+
+
+# import files
+from main import Factory
+from test_instance_generator import generate
+
+
+# orders read their setup column from the shared matrix instead of copying it
+def test_setup_column_is_shared():
+    np.random.seed(0)
+    N, M = 12, 3
+    O, S = generate(N, M, 1.5)
+    env = Factory(buffer = "list")
+    env.reset(N, M, O, S)
+    assert len(env.queue.buffer) > 0
+    for order in env.queue.buffer:
+        assert np.shares_memory(order.setup_time, env.store.setup_time)
+        assert np.array_equal(order.setup_time, np.array(S)[:, order.ID])
+        assert order.max_setup_time == max(S[i][order.ID] for i in range(N))
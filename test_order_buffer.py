@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory, Order
+from dispatching_rule import Dispatching_Rule
+from order_buffer import Order_Buffer
+from tracer import TRACE_ALL
+from test_instance_generator import generate
+
+
+def orders(N, M, rng):
+    # small value ranges, so many keys tie
+    setup = rng.integers(0, 4, size = (N, N))
+    process = rng.integers(1, 5, size = (N, M))
+    due = rng.integers(0, 10, size = N).astype(float)
+    return setup, [Order(i, 0, process[i].tolist(), due[i], setup[:, i], 0, 0)
+                   for i in range(N)]
+
+def pick(DR, buffer, action, machine, last, now):
+    if action == 0:
+        return DR.FIFO(buffer)
+    elif action == 1:
+        return DR.LIFO(buffer)
+    elif action == 2:
+        return DR.SPT(buffer, machine)
+    elif action == 3:
+        return DR.MST(buffer, last)
+    elif action == 4:
+        return DR.EDD(buffer)
+    elif action == 5:
+        return DR.LST(buffer, machine, now)
+    return DR.CR(buffer, machine, now)
+
+
+# every rule picks the order np.argmin picks over the list buffer, through
+# lazy deletion, heap compaction and slot growth
+@pytest.mark.parametrize("shared", [True, False])
+@pytest.mark.parametrize("seed", range(4))
+def test_select_matches_list(seed, shared):
+    rng = np.random.default_rng(seed)
+    N, M = 400, 3
+    setup, order = orders(N, M, rng)
+    buffer = Order_Buffer(M, capacity = 4, setup = setup if shared else None)
+    plain = []
+    DR = Dispatching_Rule()
+    arrived = 0
+    while arrived < N or plain:
+        if arrived < N and (not plain or rng.random() < 0.55):
+            buffer.append(order[arrived])
+            plain.append(order[arrived])
+            arrived += 1
+            continue
+        action = int(rng.integers(7))
+        machine = int(rng.integers(M))
+        last = int(rng.integers(-1, N))
+        now = float(rng.integers(0, 5))
+        expected = pick(DR, plain, action, machine, last, now)
+        assert buffer.select(action, machine, last, now) is expected
+        buffer.remove(expected)
+        plain.remove(expected)
+        assert len(buffer) == len(plain)
+    assert list(buffer) == []
+
+def test_list_interface():
+    rng = np.random.default_rng(0)
+    _, order = orders(10, 2, rng)
+    buffer = Order_Buffer(2)
+    for i in order[:5]:
+        buffer.append(i)
+    assert buffer[0] is order[0] and buffer[-1] is order[4]
+    assert buffer[2] is order[2]
+    assert buffer.pop(0) is order[0]
+    assert buffer.pop() is order[4]
+    assert list(buffer) == order[1:4]
+
+
+# the indexed buffer gives the schedule of the list buffer
+@pytest.mark.parametrize("k", range(8))
+def test_factory_schedule(k):
+    np.random.seed(k)
+    N, M = [5, 20, 40, 60][k % 4], [1, 2, 3, 5][k % 4]
+    O, S = generate(N, M, 1.5)
+    for action in range(7):
+        result = []
+        for buffer in ["list", "indexed"]:
+            env = Factory(buffer = buffer, trace = TRACE_ALL, record = False)
+            env.run(N, M, O, S, action)
+            result.append((env.makespan, env.sim_record))
+        assert result[0] == result[1], action
+
+def test_default_buffer():
+    assert Factory().buffer_type == "array"
+    with pytest.raises(ValueError):
+        Factory(buffer = "heap")
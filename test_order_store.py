@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory, Order
+from dispatching_rule import Dispatching_Rule, Vector_Rule
+from order_store import Order_Store, Mask_Buffer
+from tracer import TRACE_ALL
+from test_instance_generator import generate
+from test_order_buffer import pick
+
+
+def store(N, M, rng):
+    # small value ranges, so many keys tie
+    process = rng.integers(1, 5, size = (N, M))
+    due = rng.integers(0, 10, size = N).astype(float)
+    setup = rng.integers(0, 4, size = (N, N))
+    order_data = [[0, process[i].tolist(), due[i]] for i in range(N)]
+    return Order_Store(order_data, setup)
+
+
+def test_store_arrays():
+    np.random.seed(0)
+    O, S = generate(6, 3, 1.5)
+    s = Order_Store(O, S)
+    assert s.process_time.shape == (6, 3)
+    assert np.array_equal(s.due_date, [i[2] for i in O])
+    assert np.array_equal(s.max_process_time, [max(i[1]) for i in O])
+    assert np.array_equal(s.max_setup_time, np.max(S, axis = 0))
+    assert np.array_equal(s.setup_column(4), np.array(S)[:, 4])
+
+# every rule over the waiting mask picks the order of the list buffer
+@pytest.mark.parametrize("seed", range(4))
+def test_select_matches_list(seed):
+    rng = np.random.default_rng(seed)
+    N, M = 300, 3
+    s = store(N, M, rng)
+    order = [Order(i, 0, s.process_time[i].tolist(), s.due_date[i], s.setup_column(i), 0, 0)
+             for i in range(N)]
+    buffer = Mask_Buffer(s)
+    plain = []
+    DR = Dispatching_Rule()
+    arrived = 0
+    while arrived < N or plain:
+        if arrived < N and (not plain or rng.random() < 0.55):
+            buffer.append(order[arrived])
+            plain.append(order[arrived])
+            arrived += 1
+            continue
+        action = int(rng.integers(7))
+        machine = int(rng.integers(M))
+        last = int(rng.integers(-1, N))
+        now = float(rng.integers(0, 5))
+        expected = pick(DR, plain, action, machine, last, now)
+        assert buffer.select(action, machine, last, now) is expected
+        ID = Vector_Rule(s).pick(action, buffer.index(), machine, last, now)
+        assert ID == expected.ID
+        buffer.remove(expected)
+        plain.remove(expected)
+        assert list(buffer) == plain
+    assert len(buffer) == 0 and len(buffer.index()) == 0
+
+
+# the array buffer gives the schedule of the list buffer, with either observation
+@pytest.mark.parametrize("incremental", [False, True])
+@pytest.mark.parametrize("k", range(8))
+def test_factory_schedule(k, incremental):
+    np.random.seed(k)
+    N, M = [5, 20, 40, 60][k % 4], [1, 2, 3, 5][k % 4]
+    O, S = generate(N, M, 1.5)
+    for action in range(7):
+        result = []
+        for buffer in ["list", "array"]:
+            env = Factory(buffer = buffer, trace = TRACE_ALL, record = False,
+                          incremental = incremental)
+            env.run(N, M, O, S, action)
+            result.append((env.makespan, env.sim_record))
+        assert result[0] == result[1], action
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import random
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from prefix_cache import Prefix_Cache, Cached_Factory, fingerprint
+from test_instance_generator import generate
+
+
+def instance(seed, N = 25, M = 3):
+    np.random.seed(seed)
+    O, S = generate(N, M, 1.5)
+    return N, M, O, S
+
+def episode(env, N, M, O, S, actions):
+    # states, rewards and makespan of one episode, action 0 after the list ends
+    # a cached reset may leave the simulation behind, so done comes from step only
+    state = env.reset(N, M, O, S)
+    states, rewards, i, done = [state], [], 0, False
+    while not done:
+        state, reward, done = env.step(actions[i] if i < len(actions) else 0)
+        states.append(state)
+        rewards.append(reward)
+        i += 1
+    return states, rewards, env.makespan
+
+def same(a, b, observe = True):
+    # the gantt chart of a cached episode starts at its checkpoint
+    assert a[1] == b[1] and a[2] == b[2]
+    if observe:
+        for s, t in zip(a[0], b[0]):
+            assert all(np.array_equal(x, y) for x, y in zip(s, t))
+
+def action_lists(seed, N, count = 6):
+    # episodes sharing prefixes of a few shapes
+    rng = random.Random(seed)
+    base = [rng.randrange(7) for _ in range(N)]
+    result = [base]
+    for _ in range(count):
+        cut = rng.randrange(N)
+        result.append(base[:cut] + [rng.randrange(7) for _ in range(N - cut)])
+    return result + [base, result[1]]
+
+
+def test_fingerprint():
+    N, M, O, S = instance(0)
+    key = fingerprint(O, S)
+    assert fingerprint([list(i) for i in O], np.asarray(S).tolist()) == key
+    other = [list(i) for i in O]
+    other[3] = [other[3][0] + 1, other[3][1], other[3][2]]
+    assert fingerprint(other, S) != key
+
+# episodes through the cache equal plain episodes, wherever the checkpoints are
+@pytest.mark.parametrize("observe", [True, False])
+@pytest.mark.parametrize("interval", [1, 3, 50])
+@pytest.mark.parametrize("seed", range(3))
+def test_replay(seed, interval, observe):
+    N, M, O, S = instance(seed)
+    env = Cached_Factory(Prefix_Cache(interval = interval), observe = observe)
+    for actions in action_lists(seed, N):
+        expected = episode(Factory(record = False), N, M, O, S, actions)
+        same(episode(env, N, M, O, S, actions), expected, observe)
+
+# a repeated episode is taken from the trie only
+def test_hits():
+    N, M, O, S = instance(1)
+    env = Cached_Factory(observe = False)
+    episode(env, N, M, O, S, [2] * N)
+    misses, nodes = env.cache.misses, len(env.cache)
+    hits = env.cache.hits
+    episode(env, N, M, O, S, [2] * N)
+    assert env.cache.misses == misses and len(env.cache) == nodes
+    assert env.cache.hits - hits == nodes
+    assert env.cache.resumed == 1
+
+# a full cache evicts least recently used leaves and keeps the rest resumable
+@pytest.mark.parametrize("capacity", [1, 5, 12])
+def test_evict(capacity):
+    N, M, O, S = instance(2)
+    cache = Prefix_Cache(capacity, interval = 2)
+    env = Cached_Factory(cache)
+    for actions in action_lists(2, N):
+        expected = episode(Factory(record = False), N, M, O, S, actions)
+        same(episode(env, N, M, O, S, actions), expected)
+        assert len(cache) <= capacity
+    assert cache.evictions > 0
+    for node in cache.nodes:
+        assert node.parent is None or node.parent in cache.nodes
+    assert set(cache.leaves) == {i for i in cache.nodes if not i.children}
+
+# the least recently used leaf goes first, a parent left without children is next
+def test_evict_order():
+    cache = Prefix_Cache(capacity = 4)
+    root = cache.root("key")
+    a = cache.add(root, 0, 0, False)
+    b = cache.add(root, 1, 0, False)
+    aa = cache.add(a, 0, 0, False)
+    assert list(cache.leaves) == [b, aa]
+    cache.child(root, 1)
+    cache.add(b, 0, 0, False)
+    # aa was the oldest leaf, then a lost its only child
+    assert aa not in cache.nodes and list(cache.leaves)[0] is a
+    assert cache.child(root, 0) is a and not a.children
+
+# instances are keyed by content, the assignment and the skip rules
+def test_instance_key():
+    N, M, O, S = instance(3)
+    cache = Prefix_Cache()
+    env = Cached_Factory(cache)
+    episode(env, N, M, O, S, [])
+    episode(Cached_Factory(cache), N, M, [list(i) for i in O], np.array(S), [])
+    assert len(cache.roots) == 1
+    episode(Cached_Factory(cache, assignment = "matching"), N, M, O, S, [])
+    assert len(cache.roots) == 2
+    expected = episode(Factory(record = False), *instance(4), [])
+    same(episode(env, *instance(4), []), expected)
+    assert len(cache.roots) == 3
+
+def test_record():
+    with pytest.raises(ValueError):
+        Cached_Factory(record = True)
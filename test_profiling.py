@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import time
+import pstats
+import pytest
+
+
+# import files
+from main import Factory
+from profiling import Profiler, profile_episode
+from tracer import TRACE_ALL
+from test_equivalence import instance, result
+
+
+# self time leaves out nested components, total time keeps them
+def test_nested_time():
+    profiler = Profiler()
+    inner = profiler.wrap("inner", lambda: time.sleep(0.02))
+    outer = profiler.wrap("outer", lambda: [inner(), time.sleep(0.01)])
+    outer()
+    outer()
+    timing = profiler.result()
+    assert timing["outer"]["calls"] == 2 and timing["inner"]["calls"] == 2
+    assert timing["outer"]["total"] >= timing["inner"]["total"] >= 0.04
+    assert timing["outer"]["self"] == pytest.approx(
+        timing["outer"]["total"] - timing["inner"]["total"])
+    assert profiler.stack == []
+
+def test_wrap_once():
+    class Box:
+        def run(self):
+            return 1
+    profiler = Profiler()
+    box = Box()
+    profiler.patch(box, "run", "run")
+    profiler.patch(box, "run", "run")
+    assert box.run() == 1 and profiler.result()["run"]["calls"] == 1
+
+# a profiled factory runs the same schedule and counts every step
+@pytest.mark.parametrize("engine", ["simpy", "heap"])
+@pytest.mark.parametrize("k", [4, 5, 11])
+def test_factory(k, engine):
+    N, M, O, S = instance(k)
+    base = Factory(trace = TRACE_ALL, engine = engine)
+    base.run(N, M, O, S, 3)
+    env = Factory(trace = TRACE_ALL, engine = engine, profiler = True)
+    env.run(N, M, O, S, 3)
+    assert result(env) == result(base)
+    timing = env.profiler.result()
+    assert {"simulation", "gantt", "trace"} <= set(timing)
+    assert timing["gantt"]["calls"] == len(env.gantt)
+    if engine == "simpy":
+        assert timing["step"]["calls"] == len(env.step_record)
+
+# objects built by restore are timed too
+def test_restore():
+    N, M, O, S = instance(10)
+    env = Factory(profiler = True)
+    env.reset(N, M, O, S)
+    snapshot = env.snapshot()
+    env.step(0)
+    env.restore(snapshot)
+    env.profiler.reset()
+    env.step(1)
+    assert {"step", "simulation", "dispatch"} <= set(env.profiler.result())
+
+def test_table():
+    pytest.importorskip("pandas")
+    N, M, O, S = instance(5)
+    env = Factory(profiler = True)
+    env.run(N, M, O, S, 0)
+    table = env.profiler.table()
+    assert list(table["self"]) == sorted(table["self"], reverse = True)
+    assert table["self %"].sum() == pytest.approx(100)
+
+def test_profile_episode(tmp_path):
+    N, M, O, S = instance(11)
+    path = str(tmp_path / "episode.prof")
+    stats = profile_episode(Factory(), N, M, O, S, lambda env: 2, path)
+    assert stats.total_calls > 0
+    assert pstats.Stats(path).total_calls == stats.total_calls
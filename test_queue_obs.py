@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import random
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from order_store import Key_Index
+from test_instance_generator import generate
+
+
+def instance(seed, N, M = 3):
+    np.random.seed(seed)
+    O, S = generate(N, M, 1.5)
+    return N, M, O, S
+
+def rank(env, ID):
+    # key of each waiting order
+    store = env.store
+    if env.queue_key == "fifo":
+        return store.arrival_time[ID]
+    if env.queue_key == "due":
+        return store.due_date[ID]
+    return store.due_date[ID] - store.process_time[ID].min(axis = 1)
+
+def check(env, state, K):
+    m0, m1, m2 = state
+    M, store, now = env.M, env.store, env.env.now
+    assert m0.shape == (K, M + 3) and m1.shape == (M, 4) and m2.shape == (M, K)
+    waiting = np.array([i.ID for i in env.queue.buffer], dtype = np.int64)
+    ID = waiting[np.lexsort((waiting, rank(env, waiting)))][:K]
+    n = len(ID)
+    assert m0[:, M+2].sum() == n and np.all(m0[n:] == 0) and np.all(m2[:, n:] == 0)
+    assert np.allclose(m0[:n, 0], now - store.arrival_time[ID])
+    assert np.array_equal(m0[:n, 1:M+1], store.process_time[ID])
+    assert np.allclose(m0[:n, M+1], store.due_date[ID] - now)
+    for m, processor in enumerate(env.processor_list):
+        last = processor.last_order_ID
+        expected = np.zeros(n) if last == -1 else store.setup_time[last, ID]
+        assert np.array_equal(m2[m, :n], expected)
+
+
+# the observation holds the first K waiting orders by key, in key order
+@pytest.mark.parametrize("key", ["fifo", "due", "slack"])
+@pytest.mark.parametrize("K", [1, 4, 16])
+@pytest.mark.parametrize("seed", range(3))
+def test_top_orders(seed, K, key):
+    N, M, O, S = instance(seed, 40)
+    env = Factory(queue_obs = K, queue_key = key, buffer = "list")
+    state = env.reset(N, M, O, S)
+    rng = random.Random(seed)
+    done = False
+    while not done:
+        check(env, state, K)
+        state, reward, done = env.step(rng.randrange(7))
+    assert len(env.queue.index) == 0
+
+# the shape does not depend on N
+def test_fixed_shape():
+    shape = set()
+    for N in [5, 30, 120]:
+        env = Factory(queue_obs = 8, record = False)
+        env.reset(*instance(N, N))
+        done = False
+        while not done:
+            state, _, done = env.step(4)
+            shape.add(tuple(i.shape for i in state))
+    assert shape == {((8, 6), (3, 4), (3, 8))}
+
+# the observation does not change the schedule
+@pytest.mark.parametrize("buffer", ["list", "indexed", "array"])
+def test_same_schedule(buffer):
+    N, M, O, S = instance(5, 30)
+    makespan = []
+    for queue_obs in [None, 4]:
+        env = Factory(queue_obs = queue_obs, buffer = buffer, record = False)
+        env.run(N, M, O, S, 5)
+        makespan.append(env.makespan)
+    assert makespan[0] == makespan[1]
+
+def test_key_index():
+    key = np.array([5, 1, 5, 3, 0])
+    index = Key_Index(key)
+    for ID in [0, 1, 2, 3]:
+        index.add(ID)
+    assert index.top(3) == [1, 3, 0]
+    index.remove(3)
+    index.add(4)
+    assert index.top(10) == [4, 1, 0, 2] and len(index) == 4
+
+def test_unknown_key():
+    with pytest.raises(ValueError):
+        Factory(queue_obs = 4, queue_key = "spt")
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pandas as pd
+
+
+# import files
+import runner
+from runner import Shared_Setup, generate_instances, run_episode, run_sweep
+
+
+# setup matrices read back from shared memory are the packed ones
+def test_shared_setup():
+    setup_list = [np.arange(9).reshape(3, 3), np.arange(25).reshape(5, 5) * 2]
+    shared = Shared_Setup(setup_list)
+    try:
+        runner.init_worker([], shared.handle())
+        for i, setup in enumerate(setup_list):
+            view = runner.worker_setup(i)
+            assert np.array_equal(view, setup)
+            assert not view.flags.writeable
+        runner.WORKER_SHM.close()
+    finally:
+        shared.close()
+
+# the pool gives the rows of the serial run
+def test_pool_matches_serial():
+    instances = generate_instances(3, 8, 3, 1.5)
+    serial = run_sweep(instances, [0, 2, "random"], seeds = (0, 1), workers = 1)
+    pool = run_sweep(instances, [0, 2, "random"], seeds = (0, 1), workers = 2,
+                     chunksize = 2)
+    key = ["instance", "policy", "seed"]
+    serial = serial.sort_values(key).reset_index(drop = True)
+    pool = pool.sort_values(key).reset_index(drop = True)
+    pd.testing.assert_frame_equal(serial, pool)
+    assert len(serial) == 3 * 3 * 2
+
+# a fixed rule episode gives the makespan of Factory.run
+def test_run_episode():
+    from main import Factory
+    N, M, order, setup = generate_instances(1, 10, 3, 1.5)[0]
+    row = run_episode(N, M, order, setup, 4)
+    assert row["policy"] == "EDD"
+    assert row["makespan"] == Factory(record = False).run(N, M, order, setup, 4)
+
+# an episode over at reset takes no decision
+def test_terminal_at_reset():
+    from main import Factory
+    order = [[0, [5, 5], 10]]
+    setup = np.zeros((1, 1))
+    env = Factory(record = False)
+    env.reset(1, 2, order, setup)
+    assert env.terminal.triggered
+    row = run_episode(1, 2, order, setup, 0)
+    assert row["steps"] == 0 and row["makespan"] == 5
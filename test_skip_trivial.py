@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from vector_factory import Vector_Factory
+from test_equivalence import result
+from test_instance_generator import generate
+
+
+def instance(seed, N = 60, M = 3):
+    np.random.seed(seed)
+    O, S = generate(N, M, 1.5)
+    return N, M, O, S
+
+def episode(env, N, M, O, S, actions):
+    # the action depends on the decision point only, so skipped points of a run with
+    # the same policy are exactly the ones where every action dispatches the same orders
+    env.reset(N, M, O, S)
+    steps, total, done = 0, 0, env.terminal.triggered
+    while not done:
+        key = (env.env.now, len(env.queue.buffer), sum(i.idle for i in env.processor_list))
+        _, reward, done = env.step(actions[hash(key) % len(actions)])
+        steps += 1
+        total += reward
+    return steps, total, result(env)
+
+
+# skipping leaves the schedule and the summed reward unchanged
+@pytest.mark.parametrize("actions", [[4, 5], [2, 4], [2, 3, 4]])
+@pytest.mark.parametrize("assignment", ["greedy", "matching"])
+@pytest.mark.parametrize("seed", range(3))
+def test_same_schedule(seed, assignment, actions):
+    N, M, O, S = instance(seed)
+    env = Factory(skip_rules = actions, assignment = assignment, record = False)
+    steps, total, schedule = episode(env, N, M, O, S, actions)
+    base = episode(Factory(assignment = assignment, record = False), N, M, O, S, actions)
+    assert schedule == base[2] and total == pytest.approx(base[1])
+    assert steps + env.skipped == base[0]
+
+def test_skips_decisions():
+    N, M, O, S = instance(0, N = 200)
+    env = Factory(skip_rules = [4, 5], record = False)
+    episode(env, N, M, O, S, [4, 5])
+    assert env.skipped > 0
+
+# a single rule resolves every decision point inside reset()
+def test_single_rule():
+    N, M, O, S = instance(1)
+    env = Factory(skip_rules = [2], record = False)
+    env.reset(N, M, O, S)
+    assert env.terminal.triggered
+    fixed = Factory(record = False)
+    fixed.run(N, M, O, S, 2)
+    assert result(env) == result(fixed)
+
+@pytest.mark.parametrize("skip_rules", [[7], [-1, 2]])
+def test_unknown_rule(skip_rules):
+    with pytest.raises(ValueError):
+        Factory(skip_rules = skip_rules)
+
+def test_vector_factory():
+    vector = Vector_Factory(2, skip_rules = [4, 5])
+    assert all(env.skip_rules == [4, 5] for env in vector.envs)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import pickle
+import random
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from tracer import TRACE_ALL
+from test_equivalence import instance, result
+from test_instance_generator import generate
+
+
+def rollout(env, actions):
+    # step actions from the current decision point to the end, then action 0
+    done, i, reward, state = env.terminal.triggered, 0, [], []
+    while not done:
+        s, r, done = env.step(actions[i] if i < len(actions) else 0)
+        reward.append(r)
+        state.append([np.array(j) for j in s[:2]])
+        i += 1
+    return reward, state, result(env)
+
+def same(a, b):
+    # rollouts with equal rewards, observations and schedule
+    return a[0] == b[0] and a[2] == b[2] and \
+        all(np.array_equal(x, y) for s, t in zip(a[1], b[1]) for x, y in zip(s, t))
+
+def start(config, N, M, O, S, prefix):
+    env = Factory(trace = TRACE_ALL, **config)
+    env.reset(N, M, O, S)
+    for action in prefix:
+        if env.step(action)[2]:
+            break
+    return env
+
+
+CONFIG = [{"buffer": "list"}, {"buffer": "indexed"}, {"buffer": "array"},
+          {"buffer": "array", "incremental": True}, {"incremental": True, "copy_obs": False},
+          {"queue_obs": 4}]
+
+# a restored snapshot replays like the episode it was taken from
+@pytest.mark.parametrize("config", CONFIG)
+@pytest.mark.parametrize("k", range(12))
+def test_snapshot_restore(k, config):
+    N, M, O, S = instance(k)
+    rng = random.Random(k)
+    prefix = [rng.randrange(7) for _ in range(rng.randrange(N + 1))]
+    A = [rng.randrange(7) for _ in range(N)]
+    B = [rng.randrange(7) for _ in range(N)]
+    env = start(config, N, M, O, S, prefix)
+    snapshot = env.snapshot()
+    first = rollout(env, A)
+    env.restore(snapshot)
+    rollout(env, B)
+    env.restore(snapshot)
+    assert same(rollout(env, A), first)
+    # the same prefix and actions without a restore
+    assert same(rollout(start(config, N, M, O, S, prefix), A), first)
+
+# a detached snapshot continues on another factory of the same instance
+@pytest.mark.parametrize("k", [3, 4, 9, 10])
+def test_detached_snapshot(k):
+    N, M, O, S = instance(k)
+    env = start({"record": False}, N, M, O, S, [2, 3])
+    snapshot = pickle.loads(pickle.dumps(env.snapshot()))
+    assert snapshot.store is None
+    first = rollout(env, [5] * N)
+    other = Factory(trace = TRACE_ALL, record = False)
+    other.reset(N, M, O, S)
+    other.restore(snapshot)
+    reward, state, (makespan, _, _) = rollout(other, [5] * N)
+    assert reward == first[0] and makespan == first[2][0]
+    assert all(np.array_equal(x, y) for s, t in zip(state, first[1]) for x, y in zip(s, t))
+
+def test_key():
+    N, M, O, S = instance(10)
+    env = start({}, N, M, O, S, [1, 1])
+    snapshot = env.snapshot()
+    rollout(env, [4] * N)
+    env.restore(snapshot)
+    assert env.snapshot().key() == snapshot.key()
+
+# a finished episode restores as finished
+def test_restore_finished():
+    N, M, O, S = instance(4)
+    env = start({}, N, M, O, S, [])
+    rollout(env, [])
+    snapshot = env.snapshot()
+    env.restore(snapshot)
+    assert env.terminal.triggered and env.decision_point.triggered
+    assert env.makespan == snapshot.makespan
+
+def test_restore_errors():
+    N, M, O, S = instance(4)
+    env = start({}, N, M, O, S, [])
+    snapshot = env.snapshot()
+    env.reset(N, M, O, S)
+    with pytest.raises(ValueError):
+        env.restore(snapshot)
+    other = instance(5)
+    env.reset(*other)
+    with pytest.raises(ValueError):
+        env.restore(pickle.loads(pickle.dumps(snapshot)))
+
+# a detached snapshot is checked against the content of the instance, not its size
+def test_detached_other_instance():
+    N, M, O, S = instance(10)
+    env = start({}, N, M, O, S, [1])
+    snapshot = env.snapshot().detach()
+    assert snapshot.store is None and env.snapshot().store is env.store
+    # equal data in other containers is the same instance
+    env.reset(N, M, [list(i) for i in O], np.array(S))
+    env.restore(snapshot)
+    np.random.seed(99)
+    other = Factory()
+    other.reset(N, M, *generate(N, M, 1.5))
+    for s in [snapshot, pickle.loads(pickle.dumps(env.snapshot()))]:
+        with pytest.raises(ValueError):
+            other.restore(s)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import asyncio
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from streaming import Stream_Factory, Sparse_Setup, instance_feed, generated_feed
+from streaming import file_feed, write_feed, socket_feed, serve_feed
+from streaming import matrix_setup, random_setup
+from test_instance_generator import generate
+
+
+def instance(seed, N = 40, M = 3):
+    np.random.seed(seed)
+    O, S = generate(N, M, 1.5)
+    return N, M, O, S
+
+def bars(gantt):
+    return [tuple(float(j) for j in i) for i in gantt]
+
+async def async_feed(records):
+    for i in records:
+        await asyncio.sleep(0)
+        yield i
+
+def underloaded(count = None):
+    # one order every 200 time units on average, the factory idles in between
+    return generated_feed(3, 1.5, 0, inter_arrival = 200, count = count)
+
+
+# a stored instance replayed as a stream gives the schedule of Factory
+@pytest.mark.parametrize("action", range(7))
+@pytest.mark.parametrize("buffer", ["list", "indexed"])
+def test_replay_instance(buffer, action):
+    N, M, O, S = instance(action)
+    base = Factory(record = False)
+    base.run(N, M, O, S, action)
+    env = Stream_Factory(M, matrix_setup(S), window = float('inf'), buffer = buffer)
+    kpi = env.run(instance_feed(O), action, report = None)
+    g = base.gantt
+    expected = zip(g.machine[:len(g)], g.order[:len(g)], g.start[:len(g)],
+                   g.duration[:len(g)], g.due[:len(g)])
+    assert env.makespan == base.makespan and kpi["done"] == N and kpi["live"] == 0
+    assert bars(env.gantt.bars) == bars(expected)
+
+# reports fall on every mark and the run stops at until, also while idle
+@pytest.mark.parametrize("every, until", [(5000, 20000), (3000, 20000), (None, 7000),
+                                          (5000, None)])
+def test_report_and_until(every, until):
+    report = []
+    env = Stream_Factory(3, random_setup(1), window = 5000)
+    count = None if until is not None else 60
+    kpi = env.run(underloaded(count), 2, until, every, lambda i: report.append(i["time"]))
+    if until is not None:
+        assert env.env.now == until and kpi["time"] == until
+    else:
+        assert env.terminal.triggered
+    end = until if until is not None else env.env.now
+    assert report == ([] if every is None else list(range(every, int(end) + 1, every)))
+
+def test_step():
+    N, M, O, S = instance(2)
+    env = Stream_Factory(M, matrix_setup(S), window = float('inf'))
+    run = env.run(instance_feed(O), 4, report = None)
+    env.reset(instance_feed(O))
+    done = env.terminal.triggered
+    while not done:
+        state, reward, done = env.step(4)
+        assert state[0].shape[1] == M + 3 and state[2].shape == (M, len(state[0]))
+    assert env.kpi() == run
+
+# an async feed runs like the same records fed synchronously
+@pytest.mark.parametrize("every, until", [(None, None), (2000, 9000)])
+def test_async_feed(every, until):
+    records = list(underloaded(80))
+    report, async_report = [], []
+    env = Stream_Factory(3, random_setup(2), window = 4000)
+    kpi = env.run(iter(records), 3, until, every, report.append)
+    env = Stream_Factory(3, random_setup(2), window = 4000)
+    async_kpi = asyncio.run(env.arun(async_feed(records), 3, until, every,
+                                     async_report.append))
+    assert async_kpi == kpi and async_report == report
+
+def test_async_step():
+    records = list(underloaded(30))
+    env = Stream_Factory(3, random_setup(3))
+    expected = env.run(iter(records), 2, report = None)
+    async def run():
+        env = Stream_Factory(3, random_setup(3))
+        await env.areset(async_feed(records))
+        done = env.terminal.triggered
+        while not done:
+            _, _, done = await env.astep(2)
+        return env.kpi()
+    assert asyncio.run(run()) == expected
+
+def test_feed_type():
+    env = Stream_Factory(3, random_setup(0))
+    with pytest.raises(ValueError):
+        env.run(async_feed([]), 0)
+    with pytest.raises(ValueError):
+        asyncio.run(env.arun(iter([]), 0))
+
+
+# setup entries of finished orders are dropped, memory follows the live orders
+def test_sparse_setup():
+    env = Stream_Factory(3, random_setup(0))
+    kpi = env.run(underloaded(500), 3, report = None)
+    assert kpi["done"] == 500 and len(env.setup) <= 3 * 3
+    setup = Sparse_Setup(default = 7)
+    setup.add(2, {"setup": {"0": 4, "1": 5}})
+    assert setup(0, 2) == 4 and setup(3, 2) == 7 and len(setup) == 2
+    setup.drop(0)
+    assert setup(0, 2) == 7 and len(setup) == 1
+
+def test_file_and_socket_feed(tmp_path):
+    N, M, O, S = instance(5, N = 20)
+    path = str(tmp_path / "orders.jsonl")
+    write_feed(path, instance_feed(O))
+    kpi = []
+    for feed in [instance_feed(O), file_feed(path), socket_feed(serve_feed(instance_feed(O)))]:
+        env = Stream_Factory(M, matrix_setup(S), window = float('inf'))
+        kpi.append(env.run(feed, 1, report = None))
+    assert kpi[0] == kpi[1] == kpi[2]
+
+def test_unsupported():
+    with pytest.raises(ValueError):
+        Stream_Factory(3, random_setup(0), buffer = "array")
+    env = Stream_Factory(3, random_setup(0))
+    env.reset(underloaded(5))
+    with pytest.raises(ValueError):
+        env.snapshot()
+
+# records naming long dropped last orders do not grow the setup
+def test_sparse_setup_stale_keys():
+    setup = Sparse_Setup()
+    for k in range(1000):
+        setup.add(k, {"setup": {str(j): 1 for j in range(max(0, k - 50), k)}})
+        if k >= 5:
+            setup.drop(k - 5)
+    assert len(setup.row) <= 5 + 50 and len(setup.column) <= 5
+    for k in range(995, 1000):
+        setup.drop(k)
+    assert setup.row == {} and setup.column == {} and len(setup) == 0
+    # also in a stream whose records name old orders
+    records = []
+    for k, record in enumerate(underloaded(300)):
+        record["ID"] = k
+        record["setup"] = {str(j): 3 for j in range(max(0, k - 40), k, 7)}
+        records.append(record)
+    env = Stream_Factory(3, Sparse_Setup(default = 1))
+    kpi = env.run(iter(records), 3, report = None)
+    assert kpi["done"] == 300 and len(env.setup.row) <= 3 * 7 and len(env.setup.column) <= 3
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from tracer import Tracer, read_trace, render, TRACE_OFF, TRACE_ORDER, TRACE_ALL
+from tracer import EVENT_ARRIVE, EVENT_SETUP, EVENT_START, EVENT_FINISH
+from test_instance_generator import generate
+
+
+def instance(seed, N = 12, M = 3):
+    np.random.seed(seed)
+    O, S = generate(N, M, 1.5)
+    return N, M, O, S
+
+
+def test_render():
+    assert render(3, EVENT_ARRIVE, 1, -1) == "3: order 1 arrive."
+    assert render(4.5, EVENT_SETUP, 2, 0) == "4.5: order 2 setup at machine 0."
+    assert render(5, EVENT_START, 2, 1) == "5: order 2 start at machine 1."
+    assert render(9, EVENT_FINISH, 2, 1) == "9: order 2 finish at machine 1."
+
+# events written in small chunks read back as recorded, for both file formats
+@pytest.mark.parametrize("suffix", [".trace", ".ndjson"])
+def test_file_round_trip(tmp_path, suffix):
+    path = str(tmp_path / ("events" + suffix))
+    tracer = Tracer(TRACE_ALL, path, chunk = 3)
+    events = [(0, 1, EVENT_ARRIVE, 0, -1), (0, 1.5, EVENT_SETUP, 0, 2),
+              (0, 2, EVENT_START, 0, 2), (0, 7, EVENT_FINISH, 0, 2)]
+    for i in events:
+        tracer.record(*i[1:])
+    assert tracer.written == 3
+    tracer.new_episode()
+    tracer.record(0, EVENT_ARRIVE, 5)
+    tracer.flush()
+    assert read_trace(path) == events + [(1, 0, EVENT_ARRIVE, 5, -1)]
+    assert list(tracer.messages()) == ["0: order 5 arrive."]
+
+# the messages of a traced factory are the same in memory and from either file
+@pytest.mark.parametrize("suffix", [".trace", ".ndjson"])
+def test_factory_trace_file(tmp_path, suffix):
+    N, M, O, S = instance(0)
+    env = Factory(trace = TRACE_ALL)
+    env.run(N, M, O, S, 2)
+    expected = env.sim_record
+    tracer = Tracer(TRACE_ALL, str(tmp_path / ("events" + suffix)), chunk = 5)
+    env = Factory(trace = tracer)
+    for action in [0, 2]:
+        env.run(N, M, O, S, action)
+    assert env.sim_record == expected
+    assert len({i[0] for i in read_trace(tracer.path)}) == 2
+
+# levels keep order events only or nothing
+def test_levels():
+    N, M, O, S = instance(1)
+    count = {}
+    for level in [TRACE_OFF, TRACE_ORDER, TRACE_ALL]:
+        env = Factory(trace = level)
+        env.run(N, M, O, S, 0)
+        count[level] = len(env.sim_record)
+    assert count[TRACE_OFF] == 0
+    assert count[TRACE_ORDER] == 2 * N
+    assert count[TRACE_ALL] > count[TRACE_ORDER]
+
+def test_rewind():
+    tracer = Tracer(TRACE_ALL)
+    tracer.record(0, EVENT_ARRIVE, 0)
+    mark = tracer.mark()
+    tracer.record(1, EVENT_ARRIVE, 1)
+    tracer.rewind(mark)
+    assert list(tracer.messages()) == ["0: order 0 arrive."]
+
+def test_rewind_past_flush(tmp_path):
+    tracer = Tracer(TRACE_ALL, str(tmp_path / "events.trace"), chunk = 2)
+    mark = tracer.mark()
+    tracer.record(0, EVENT_ARRIVE, 0)
+    tracer.record(1, EVENT_ARRIVE, 1)
+    with pytest.raises(ValueError):
+        tracer.rewind(mark)
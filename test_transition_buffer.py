@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from transition_buffer import Transition_Buffer
+from test_instance_generator import generate
+
+
+def episode(k, incremental = False, capacity = None, interval = 64, queue_obs = None):
+    # random actions; transitions recorded by hand and by a buffer
+    np.random.seed(k)
+    N, M = [6, 15, 30][k % 3], [1, 2, 4][k % 3]
+    O, S = generate(N, M, 1.5)
+    env = Factory(incremental = incremental, record = False, queue_obs = queue_obs)
+    state = env.copy_state(env.reset(N, M, O, S)) if incremental else env.reset(N, M, O, S)
+    if queue_obs is None:
+        buffer = Transition_Buffer(env, capacity, interval)
+    else:
+        env.capacity = capacity
+        buffer = env.new_record()
+    buffer.start(state)
+    rng = np.random.default_rng(k)
+    expected = []
+    done = env.terminal.triggered
+    while not done:
+        action = int(rng.integers(7))
+        new_state, reward, done = env.step(action)
+        if incremental:
+            new_state = env.copy_state(new_state)
+        buffer.store_transition(action, reward, new_state, done)
+        expected.append((state, action, reward, new_state))
+        state = new_state
+    return env, buffer, expected
+
+def check(buffer, expected):
+    assert len(buffer) == len(expected)
+    for i, (old, action, reward, new) in zip(range(len(buffer)), expected):
+        t = buffer[i]
+        assert t['action'] == action and t['reward'] == reward
+        for a, b in [(t['old state'], old), (t['new state'], new)]:
+            assert all(np.array_equal(x, y) for x, y in zip(a, b))
+
+
+# rebuilt observations equal the ones step() returned, across keyframes and growth
+@pytest.mark.parametrize("interval", [1, 3, 64])
+@pytest.mark.parametrize("incremental", [False, True])
+@pytest.mark.parametrize("k", range(6))
+def test_rebuilt_states(k, incremental, interval):
+    env, buffer, expected = episode(k, incremental, interval = interval)
+    check(buffer, expected)
+    assert len(list(buffer)) == len(buffer)
+
+# a bounded buffer keeps the latest transitions after wrapping, also in the change logs
+@pytest.mark.parametrize("capacity", [1, 2, 5])
+@pytest.mark.parametrize("interval", [1, 2, 4])
+@pytest.mark.parametrize("k", [1, 2, 4, 5])
+def test_ring_wraparound(k, capacity, interval):
+    env, buffer, expected = episode(k, capacity = capacity, interval = interval)
+    assert len(expected) > capacity
+    check(buffer, expected[-capacity:])
+    with pytest.raises(IndexError):
+        buffer[capacity]
+
+# only changed entries are stored: an order status changes twice per episode
+@pytest.mark.parametrize("k", range(3))
+def test_changes_only(k):
+    env, buffer, expected = episode(k)
+    assert buffer.status_log.end <= 2 * env.N
+    assert buffer.processor_log.end <= 4 * env.N
+    assert buffer.status_log.value.dtype == np.int8
+
+# a bounded buffer squeezes out old changes instead of growing its logs
+def test_bounded_logs():
+    np.random.seed(0)
+    N, M = 150, 2
+    env = Factory(record = False)
+    state = env.reset(N, M, *generate(N, M, 1.5))
+    buffer = Transition_Buffer(env, 8, 4)
+    buffer.start(state)
+    done = False
+    while not done:
+        state, reward, done = env.step(0)
+        buffer.store_transition(0, reward, state, done)
+    assert buffer.count > 100
+    assert len(buffer.status_log.ID) == 64 and len(buffer.processor_log.ID) == 64
+    assert buffer.status_log.end > 64
+
+def test_sample():
+    env, buffer, expected = episode(4, interval = 3)
+    rng = np.random.RandomState(0)
+    sample = buffer.sample(16, rng)
+    index = np.random.RandomState(0).randint(0, len(buffer), size = 16)
+    for j, i in enumerate(index.tolist()):
+        old, action, reward, new = expected[i]
+        assert sample['action'][j] == action and sample['reward'][j] == reward
+        assert np.array_equal(sample['old status'][j], old[0][:, env.M+2])
+        assert np.array_equal(sample['new processor'][j], new[1])
+
+# queue observations are kept whole in the ring
+@pytest.mark.parametrize("capacity", [None, 3])
+def test_queue_buffer(capacity):
+    env, buffer, expected = episode(5, capacity = capacity, queue_obs = 4)
+    check(buffer, expected if capacity is None else expected[-capacity:])
+    sample = buffer.sample(4)
+    assert sample['old order'].shape == (4, 4, env.M + 3)
+
+
+# a restore rewinds the record to the snapshot, and the replay records as before
+@pytest.mark.parametrize("capacity", [None, 50])
+def test_factory_rewind(capacity):
+    np.random.seed(1)
+    N, M = 30, 3
+    O, S = generate(N, M, 1.5)
+    env = Factory(capacity = capacity)
+    env.reset(N, M, O, S)
+    for _ in range(5):
+        env.step(2)
+    snapshot = env.snapshot()
+    while not env.step(3)[2]:
+        pass
+    first = list(env.step_record)
+    env.restore(snapshot)
+    assert len(env.step_record) == 5
+    env.step(0)
+    env.restore(snapshot)
+    while not env.step(3)[2]:
+        pass
+    after = list(env.step_record)
+    assert len(after) == len(first)
+    for a, b in zip(after, first):
+        assert a['action'] == b['action']
+        assert np.array_equal(a['new state'][0], b['new state'][0])
+        assert np.array_equal(a['new state'][1], b['new state'][1])
+
+def test_overwritten_rewind():
+    np.random.seed(1)
+    env = Factory(capacity = 2)
+    env.reset(30, 3, *generate(30, 3, 1.5))
+    snapshot = env.snapshot()
+    for _ in range(4):
+        env.step(0)
+    with pytest.raises(ValueError):
+        env.restore(snapshot)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+import pytest
+
+
+# import files
+from main import Factory
+from vector_factory import Vector_Factory
+from test_instance_generator import generate
+
+
+def instances(K, N, M, seed = 0):
+    result = []
+    for k in range(K):
+        np.random.seed(seed + k)
+        order, setup = generate(N, M, 1.5)
+        result.append((N, M, order, setup))
+    return result
+
+
+# each batch row follows the factory run alone with the same actions
+def test_lockstep_matches_single():
+    K, N, M = 3, 12, 3
+    batch = Vector_Factory(K, auto_reset = False)
+    instance = instances(K, N, M)
+    state = batch.reset(instance)
+    single = [Factory(incremental = True, record = False) for k in range(K)]
+    single_state = [single[k].reset(*instance[k]) for k in range(K)]
+    for k in range(K):
+        assert np.array_equal(state[0][k], single_state[k][0])
+        assert np.array_equal(state[1][k], single_state[k][1])
+        assert np.array_equal(state[2][k], np.asarray(instance[k][3]))
+    rng = np.random.default_rng(0)
+    done = np.zeros(K, dtype = bool)
+    while not done.all():
+        actions = rng.integers(0, 7, size = K)
+        state, rewards, dones, infos = batch.step(actions)
+        for k in range(K):
+            if done[k]:
+                assert dones[k] and rewards[k] == 0
+                continue
+            s, r, d = single[k].step(int(actions[k]))
+            assert rewards[k] == r and dones[k] == d
+            if d:
+                assert infos[k]["makespan"] == single[k].makespan
+                s = infos[k]["final state"]
+            assert np.array_equal(state[0][k], s[0])
+            assert np.array_equal(state[1][k], s[1])
+        done |= dones
+
+# a finished row starts its instance again
+def test_auto_reset():
+    batch = Vector_Factory(2)
+    instance = instances(2, 12, 2)
+    first = batch.reset(instance)
+    assert not batch.done.any()
+    makespan = [[], []]
+    for _ in range(100):
+        state, _, dones, infos = batch.step([0, 0])
+        for k in np.flatnonzero(dones):
+            makespan[k].append(infos[k]["makespan"])
+        if all(len(i) >= 2 for i in makespan):
+            break
+    # fixed rule, so every episode of a row has the same makespan
+    assert all(len(set(i)) == 1 for i in makespan)
+    for k in np.flatnonzero(dones):
+        assert np.array_equal(state[0][k], first[0][k])
+
+# the batch state is a copy, the setup matrix is read-only
+def test_batch_state_is_isolated():
+    batch = Vector_Factory(2)
+    state = batch.reset(instances(2, 6, 2))
+    state[0][:] = -1
+    assert (batch.order_obs != -1).any()
+    with pytest.raises(ValueError):
+        state[2][0, 0, 0] = 1
+
+def test_instance_shape_errors():
+    batch = Vector_Factory(2)
+    with pytest.raises(ValueError):
+        batch.reset(instances(1, 6, 2))
+    with pytest.raises(ValueError):
+        batch.reset(instances(1, 6, 2) + instances(1, 7, 2))
+    batch.reset(instances(2, 6, 2))
+    with pytest.raises(ValueError):
+        batch.step([0, 0, 0])
+
+# an episode over at reset is done and never stepped, also with auto reset
+@pytest.mark.parametrize("auto_reset", [False, True])
+def test_terminal_at_reset(auto_reset):
+    instance = instances(2, 5, 2)
+    batch = Vector_Factory(2, auto_reset = auto_reset, skip_rules = [2])
+    batch.reset(instance)
+    assert batch.done.all()
+    makespan = batch.envs[0].makespan
+    for _ in range(3):
+        state, rewards, dones, infos = batch.step([0, 0])
+        assert dones.all() and np.all(rewards == 0) and infos == [{}, {}]
+    assert batch.envs[0].makespan == makespan
+    # a slot that ends at reset stays done while the others run on
+    instance = instances(2, 12, 2)
+    batch = Vector_Factory(2, auto_reset = auto_reset)
+    batch.envs[0].skip_rules = [2]
+    batch.reset(instance)
+    assert batch.done.tolist() == [True, False]
+    state, rewards, dones, infos = batch.step([0, 0])
+    assert dones[0] and rewards[0] == 0 and infos[0] == {}
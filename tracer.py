@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import json
+import numpy as np
+
+
+# trace level
+TRACE_OFF   = 0
+TRACE_ORDER = 1 # arrival and finish of order
+TRACE_ALL   = 2 # also setup and process start
+
+# event kind
+EVENT_ARRIVE  = 0
+EVENT_SETUP   = 1
+EVENT_START   = 2
+EVENT_FINISH  = 3
+EVENT_NAME = ["arrive", "setup", "start", "finish"]
+
+# binary record
+TRACE_DTYPE = np.dtype([("episode", "<i4"), ("time", "<f8"), ("kind", "i1"),
+                        ("order", "<i4"), ("machine", "<i4")])
+
+
+def scalar(value):
+    # numpy scalar to python number
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# render one event as the debug message of the simulation
+def render(time, kind, order, machine):
+    if kind == EVENT_ARRIVE:
+        return f"{time}: order {order} arrive."
+    return f"{time}: order {order} {EVENT_NAME[kind]} at machine {machine}."
+
+
+# event trace kept as tuples and written to file in chunks
+# path ending with .ndjson or .jsonl is written as json lines, others as raw TRACE_DTYPE
+class Tracer:
+    def __init__(self, level = TRACE_ALL, path = None, chunk = 4096):
+        # attribute
+        self.level      = level
+        self.path       = path
+        self.chunk      = chunk
+        self.episode    = 0
+        self.events     = [] # (episode, time, kind, order, machine)
+        self.written    = 0  # events flushed to file
+        self.ndjson     = path is not None and path.endswith((".ndjson", ".jsonl"))
+        if path is not None:
+            open(path, "w").close()
+
+    def new_episode(self):
+        self.flush()
+        self.episode += 1
+        if self.path is None:
+            self.events = []
+
+    def record(self, time, kind, order, machine = -1):
+        self.events.append((self.episode, time, kind, order, machine))
+        if self.path is not None and len(self.events) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        # stream buffered events to file
+        if self.path is None or len(self.events) == 0:
+            return
+        if self.ndjson:
+            with open(self.path, "a") as f:
+                for episode, time, kind, order, machine in self.events:
+                    f.write(json.dumps({"episode": episode, "time": scalar(time),
+                                        "event": EVENT_NAME[kind], "order": int(order),
+                                        "machine": int(machine)}) + "\n")
+        else:
+            with open(self.path, "ab") as f:
+                np.array(self.events, dtype = TRACE_DTYPE).tofile(f)
+        self.written += len(self.events)
+        self.events = []
+
+    def mark(self):
+        # position to rewind to
+        return self.written + len(self.events)
+
+    def check_rewind(self, mark):
+        if mark < self.written:
+            raise ValueError("trace is already flushed past the mark")
+
+    def rewind(self, mark):
+        # drop events recorded after the mark
+        self.check_rewind(mark)
+        del self.events[mark - self.written:]
+
+    def messages(self):
+        # debug message of the current episode rendered on demand
+        if self.path is None:
+            events = self.events
+        else:
+            self.flush()
+            events = [i for i in read_trace(self.path) if i[0] == self.episode]
+        for _, time, kind, order, machine in events:
+            # binary times are float, integral ones render like the simulation clock
+            if not self.ndjson and self.path is not None and time.is_integer():
+                time = int(time)
+            yield render(time, kind, order, machine)
+
+
+def read_trace(path):
+    # list of (episode, time, kind, order, machine)
+    if path.endswith((".ndjson", ".jsonl")):
+        events = []
+        with open(path) as f:
+            for line in f:
+                i = json.loads(line)
+                events.append((i["episode"], i["time"], EVENT_NAME.index(i["event"]),
+                               i["order"], i["machine"]))
+        return events
+    return np.fromfile(path, dtype = TRACE_DTYPE).tolist()
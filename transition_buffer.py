@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+
+
+# replay-style ring of transitions: action, reward and done per transition, and
+# one state per transition, since the new state of a transition is the old state
+# of the next one. state s is the new state of transition s-1.
+class Transition_Ring:
+    fields = ("action", "reward", "done")
+
+    def __init__(self, capacity = None):
+        # attribute
+        self.capacity   = capacity  # None keeps every transition
+        self.count      = 0         # transitions stored in total
+        self.allocate(capacity if capacity is not None else 64)
+
+    def allocate(self, size):
+        self.action     = np.zeros(size, dtype = np.int64)
+        self.reward     = np.zeros(size)
+        self.done       = np.zeros(size, dtype = bool)
+
+    def grow(self):
+        # only without capacity, so nothing has wrapped yet
+        old = {i: getattr(self, i) for i in self.fields}
+        self.allocate(2 * len(self.action))
+        for name, array in old.items():
+            getattr(self, name)[:len(array)] = array
+
+    def start(self, state):
+        # state after reset
+        self.count = 0
+        self.write_state(0, state)
+
+    def store_transition(self, action, reward, new_state, done):
+        size = len(self.action)
+        if self.capacity is None and self.count == size:
+            self.grow()
+            size = len(self.action)
+        self.action[self.count % size] = action
+        self.reward[self.count % size] = reward
+        self.done[self.count % size] = done
+        self.count += 1
+        self.write_state(self.count, new_state)
+
+    def check_rewind(self, count):
+        # transitions kept before count must not be overwritten by later ones
+        size = len(self.action)
+        if count > self.count or self.count - count > size - min(count, size):
+            raise ValueError("transitions before the rewind point are overwritten")
+
+    def rewind(self, count):
+        # drop transitions stored after the first count ones
+        self.check_rewind(count)
+        self.count = count
+
+    def __len__(self):
+        return min(self.count, len(self.action))
+
+    def first(self):
+        # number of the oldest retained transition
+        return self.count - len(self)
+
+    def number(self, index):
+        # transition number of the index-th retained transition
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transition index out of range")
+        return self.first() + index
+
+    def __getitem__(self, index):
+        i = self.number(index)
+        t = i % len(self.action)
+        return {'old state': self.state(i), 'action': int(self.action[t]),
+                'reward': float(self.reward[t]), 'new state': self.state(i + 1)}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+# changes of one kind in state order: IDs and their new values
+# offsets are counted from the start of the episode; changes before the one still
+# needed are squeezed out when the arrays are full, before they grow
+class Change_Log:
+    def __init__(self, shape = (), dtype = float, capacity = 64):
+        # attribute
+        self.ID     = np.zeros(capacity, dtype = np.int32)
+        self.value  = np.zeros((capacity,) + shape, dtype = dtype)
+        self.base   = 0 # offset of the first kept change
+        self.end    = 0 # offset after the last change
+
+    def clear(self):
+        self.base   = 0
+        self.end    = 0
+
+    def append(self, ID, value, keep):
+        # changes before offset keep are no longer needed
+        if self.end - self.base + len(ID) > len(self.ID):
+            n = self.end - keep
+            self.ID[:n] = self.ID[keep-self.base:self.end-self.base]
+            self.value[:n] = self.value[keep-self.base:self.end-self.base]
+            self.base = keep
+            if n + len(ID) > len(self.ID) // 2:
+                size = 2 * max(len(self.ID), n + len(ID))
+                self.ID = np.resize(self.ID, size)
+                self.value = np.resize(self.value, (size,) + self.value.shape[1:])
+        i = self.end - self.base
+        self.ID[i:i+len(ID)] = ID
+        self.value[i:i+len(ID)] = value
+        self.end += len(ID)
+
+    def apply(self, target, start, end):
+        # write the changes from offset start to end into target, the latest one wins
+        ID = self.ID[start-self.base:end-self.base][::-1]
+        value = self.value[start-self.base:end-self.base][::-1]
+        ID, latest = np.unique(ID, return_index = True)
+        target[ID] = value[latest]
+
+
+# transition log of one episode (Factory record)
+# a state is kept as its changes from the state before it: the order statuses and raw
+# processor rows (MAT, last order, current order, latest setup time) that changed, and
+# the time. every interval states there is a full keyframe, so a state is rebuilt from
+# at most interval changes; the static order columns and setup matrix come from the
+# order store. memory per transition is the changes plus (N + 4M) / interval keyframe
+# bytes, and the state ring holds interval states more than the transition ring.
+class Transition_Buffer(Transition_Ring):
+    fields = Transition_Ring.fields + ("time", "status_end", "processor_end",
+                                       "key_status", "key_processor")
+
+    def __init__(self, factory, capacity = None, interval = 64):
+        # reference
+        self.factory    = factory
+        self.store      = factory.store
+        # attribute
+        self.N          = self.store.N
+        self.M          = self.store.M
+        self.interval   = interval
+        Transition_Ring.__init__(self, capacity)
+        # static order columns: arrival, process time, due date
+        self.order_static = np.empty((self.N, self.M + 2))
+        self.order_static[:, 0] = self.store.arrival_time
+        self.order_static[:, 1:self.M+1] = self.store.process_time
+        self.order_static[:, self.M+1] = self.store.due_date
+        # changes and the last written state
+        self.status_log     = Change_Log((), np.int8)
+        self.processor_log  = Change_Log((4,), float)
+        self.status         = np.zeros(self.N, dtype = np.int8)
+        self.processor      = np.zeros((self.M, 4))
+
+    def allocate(self, size):
+        Transition_Ring.allocate(self, size)
+        # states back to the keyframe of the oldest retained transition
+        self.time           = np.zeros(size + self.interval)
+        self.status_end     = np.zeros(size + self.interval, dtype = np.int64)
+        self.processor_end  = np.zeros(size + self.interval, dtype = np.int64)
+        self.key_status     = np.zeros((size // self.interval + 2, self.N), dtype = np.int8)
+        self.key_processor  = np.zeros((size // self.interval + 2, self.M, 4))
+
+    def raw_processor(self):
+        return np.array([[i.MAT, i.last_order_ID, i.current_order_ID, i.latest_setup_time]
+                         for i in self.factory.processor_list], dtype = float)
+
+    def write_state(self, s, state):
+        R = len(self.time)
+        status = state[0][:, self.M+2]
+        processor = self.raw_processor()
+        if s == 0:
+            self.status_log.clear()
+            self.processor_log.clear()
+            self.status[:] = status
+            self.processor[:] = processor
+        else:
+            # changes after the keyframe of the oldest retained state are kept
+            oldest = self.first()
+            keyframe = (oldest - oldest % self.interval) % R
+            ID = np.flatnonzero(status != self.status)
+            self.status_log.append(ID, status[ID], self.status_end[keyframe])
+            self.status[ID] = status[ID]
+            ID = np.flatnonzero((processor != self.processor).any(axis = 1))
+            self.processor_log.append(ID, processor[ID], self.processor_end[keyframe])
+            self.processor[ID] = processor[ID]
+        self.time[s % R] = self.factory.env.now
+        self.status_end[s % R] = self.status_log.end
+        self.processor_end[s % R] = self.processor_log.end
+        if s % self.interval == 0:
+            slot = (s // self.interval) % len(self.key_status)
+            self.key_status[slot] = self.status
+            self.key_processor[slot] = self.processor
+
+    def rewind(self, count):
+        Transition_Ring.rewind(self, count)
+        R = len(self.time)
+        self.status, self.processor, _ = self.dynamic(count)
+        self.status_log.end = self.status_end[count % R]
+        self.processor_log.end = self.processor_end[count % R]
+
+    def dynamic(self, s):
+        # order status, raw processor data and time of state s
+        R = len(self.time)
+        k = s - s % self.interval
+        slot = (k // self.interval) % len(self.key_status)
+        status = self.key_status[slot].copy()
+        processor = self.key_processor[slot].copy()
+        self.status_log.apply(status, self.status_end[k % R], self.status_end[s % R])
+        self.processor_log.apply(processor, self.processor_end[k % R],
+                                 self.processor_end[s % R])
+        return status, processor, self.time[s % R]
+
+    def processor_obs(self, processor, now):
+        # setup age in place of the latest setup time, as in Factory.observation
+        latest = processor[:, 3].copy()
+        processor[:, 3] = np.where(latest == -1, 0, round(float(now), 2) - latest)
+        return processor
+
+    def state(self, s):
+        # rebuild full observation [m0, m1, m2]
+        status, processor, now = self.dynamic(s)
+        m0 = np.empty((self.N, self.M + 3))
+        m0[:, :self.M+2] = self.order_static
+        m0[:, self.M+2] = status
+        return [m0, self.processor_obs(processor, now), self.store.setup_time]
+
+    def sample(self, batch_size, rng = np.random):
+        # dynamic parts of random retained transitions
+        i = self.first() + rng.randint(0, len(self), size = batch_size)
+        old = [self.dynamic(j) for j in i.tolist()]
+        new = [self.dynamic(j + 1) for j in i.tolist()]
+        size = len(self.action)
+        return {'old status': np.array([j[0] for j in old]).reshape(-1, self.N),
+                'old processor': np.array([self.processor_obs(*j[1:]) for j in old]
+                                          ).reshape(-1, self.M, 4),
+                'action': self.action[i % size], 'reward': self.reward[i % size],
+                'new status': np.array([j[0] for j in new]).reshape(-1, self.N),
+                'new processor': np.array([self.processor_obs(*j[1:]) for j in new]
+                                          ).reshape(-1, self.M, 4),
+                'done': self.done[i % size]}
+
+
+# transition log of queue observations (Factory queue_obs)
+# a queue state is small, fixed in shape and fully dynamic, so it is kept whole
+# in a state ring one slot larger than the transition ring
+class Queue_Transition_Buffer(Transition_Ring):
+    fields = ("order", "processor", "setup") + Transition_Ring.fields
+
+    def __init__(self, M, K, capacity = None):
+        # attribute
+        self.M          = M
+        self.K          = K
+        Transition_Ring.__init__(self, capacity)
+
+    def allocate(self, size):
+        Transition_Ring.allocate(self, size)
+        self.order      = np.zeros((size + 1, self.K, self.M + 3))
+        self.processor  = np.zeros((size + 1, self.M, 4))
+        self.setup      = np.zeros((size + 1, self.M, self.K))
+
+    def write_state(self, s, state):
+        slot = s % len(self.order)
+        self.order[slot] = state[0]
+        self.processor[slot] = state[1]
+        self.setup[slot] = state[2]
+
+    def state(self, s):
+        slot = s % len(self.order)
+        return [self.order[slot].copy(), self.processor[slot].copy(), self.setup[slot].copy()]
+
+    def sample(self, batch_size, rng = np.random):
+        i = self.first() + rng.randint(0, len(self), size = batch_size)
+        size = len(self.action)
+        old, new = i % (size + 1), (i + 1) % (size + 1)
+        return {'old order': self.order[old], 'old processor': self.processor[old],
+                'old setup': self.setup[old],
+                'action': self.action[i % size], 'reward': self.reward[i % size],
+                'new order': self.order[new], 'new processor': self.processor[new],
+                'new setup': self.setup[new], 'done': self.done[i % size]}
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+# import packages
+import numpy as np
+
+
+# import files
+from main import Factory
+
+
+# batch of factories stepped in lockstep
+class Vector_Factory:
+    def __init__(self, K, auto_reset = True, skip_rules = None):
+        # attribute
+        self.K          = K
+        self.auto_reset = auto_reset
+        self.instances  = None
+        # each factory writes into the batch arrays through read-only views
+        self.envs = [Factory(incremental = True, copy_obs = False, record = False,
+                             skip_rules = skip_rules) for k in range(K)]
+
+    def check_instances(self, instances):
+        if len(instances) != self.K:
+            raise ValueError(f"expected {self.K} instances, got {len(instances)}")
+        shapes = {(N, M) for N, M, _, _ in instances}
+        if len(shapes) != 1:
+            raise ValueError(f"instances must share N and M to be stacked, got {sorted(shapes)}")
+        return shapes.pop()
+
+    def write_state(self, k, state):
+        self.order_obs[k] = state[0]
+        self.processor_obs[k] = state[1]
+
+    # start with this function
+    def reset(self, instances = None):
+        if instances is None:
+            instances = self.instances
+        N, M = self.check_instances(instances)
+        self.instances = list(instances)
+        # batch arrays
+        self.order_obs      = np.zeros((self.K, N, M + 3))
+        self.processor_obs  = np.zeros((self.K, M, 4))
+        self.done           = np.zeros(self.K, dtype = bool)
+        setup_list = []
+        for k in range(self.K):
+            state = self.envs[k].reset(*self.instances[k])
+            # an episode can be over at reset, when every decision is skipped
+            self.done[k] = self.envs[k].terminal.triggered
+            self.write_state(k, state)
+            setup_list.append(state[2])
+        self.setup_obs = np.stack(setup_list)
+        self.setup_obs.flags.writeable = False
+        return self.batch_state()
+
+    def batch_state(self):
+        # setup matrix is static while the instance is unchanged
+        return [self.order_obs.copy(), self.processor_obs.copy(), self.setup_obs]
+
+    # run with this process
+    def step(self, actions):
+        actions = np.asarray(actions)
+        if actions.shape != (self.K,):
+            raise ValueError(f"expected {self.K} actions, got shape {actions.shape}")
+        rewards = np.zeros(self.K)
+        dones   = np.zeros(self.K, dtype = bool)
+        infos   = [{} for k in range(self.K)]
+        for k in range(self.K):
+            env = self.envs[k]
+            if self.done[k]:
+                # finished episode without auto reset, or one over at reset
+                dones[k] = True
+                continue
+            state, reward, done = env.step(int(actions[k]))
+            rewards[k] = reward
+            dones[k] = done
+            if done:
+                infos[k]["final state"] = env.copy_state(state)
+                infos[k]["makespan"] = env.makespan
+                if self.auto_reset:
+                    state = env.reset(*self.instances[k])
+                    self.done[k] = env.terminal.triggered
+                else:
+                    self.done[k] = True
+            self.write_state(k, state)
+        return self.batch_state(), rewards, dones, infos